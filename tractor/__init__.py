@@ -19,7 +19,8 @@ __all__ = ['make_api',
            'AttachmentWrapper',
            'Base64Converter',
            'create_wrapper_for_ticket_creation',
-           'create_wrapper_for_ticket_update']
+           'create_wrapper_for_ticket_update',
+           'validate_many']
 
 
 make_api = factory.make_api
@@ -31,7 +32,4 @@ Base64Converter = attachment.Base64Converter
 
 create_wrapper_for_ticket_creation = ticket.create_wrapper_for_ticket_creation
 create_wrapper_for_ticket_update = ticket.create_wrapper_for_ticket_update
-
-
-
-
+validate_many = ticket.validate_many
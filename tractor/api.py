@@ -6,45 +6,657 @@ Created on Jan 06, 2012.
 """
 
 from .attachment import AttachmentWrapper
+from .batch import Batch
+from .batch import DEFAULT_CHUNK_SIZE
+from .batch import PendingCall
+from .cache import DEFAULT_CACHE_TTL
+from .cache import TicketCache
+from .deadline import Deadline
+from .deadline import RequestTimeout
 from .dummy import DummyConnection
 from .dummy import GET_ONLY_USER
 from .dummy import INVALID_REALM
 from .dummy import INVALID_USER
+from .governor import configure_governor
+from .governor import get_governor
+from .hooks import AFTER_RESPONSE
+from .hooks import BEFORE_REQUEST
+from .hooks import ON_ERROR
+from .hooks import RequestEvent
+from .hooks import RequestHooks
+from .pool import ConnectionPool
+from .pool import PoolTimeout
+from .profiler import RequestProfile
+from .schema import DEFAULT_SCHEMA_TTL
+from .schema import load_schema
 from .ticket import OwnerAttribute
 from .ticket import STATUS_ATTRIBUTE_VALUES
 from .ticket import TicketWrapper
-from xmlrpclib import ServerProxy
+from .transport import StreamingServerProxy
+from .transport import create_transport
+from contextlib import contextmanager
+from itertools import izip
+from threading import Lock
+from threading import local
+from xmlrpclib import Fault
+from xmlrpclib import ProtocolError
+import copy
+import os
+import time
+import urllib
 
 __docformat__ = 'reStructuredText en'
 __all__ = ['TractorApi',
            'Tractor',
-           'DummyTractor']
+           'DummyTractor',
+           'DEFAULT_MAX_FETCH_BYTES']
+
+
+#: The default limit for the (decoded) size of the attachment contents
+#: fetched at the same time.
+DEFAULT_MAX_FETCH_BYTES = 16 * 1024 * 1024
 
 
 class TractorApi(object):
 
-    def __init__(self, realm, username, password):
+    def __init__(self, realm, username, password, pool_size=None,
+                 pool_timeout=None, cache_size=None,
+                 cache_ttl=DEFAULT_CACHE_TTL, schema_file=None,
+                 schema_ttl=DEFAULT_SCHEMA_TTL, rate_limit=None,
+                 rate_burst=None, max_in_flight=None, target_latency=None,
+                 metrics=None, profiler=None, hooks=None, slow_log=None):
+        """
+        Constructor.
+
+        :param pool_size: If you pass a pool size, the API keeps a thread-safe
+            pool of up to this number of connections and may be shared by
+            several threads. Otherwise, the API uses one single connection
+            and must not be shared between threads.
+        :type pool_size: :class:`int`
+        :default pool_size: *None*
+
+        :param pool_timeout: The maximum number of seconds a request waits
+            for a pool connection (only used in pooled mode). If the timeout
+            is *None*, requests wait until a connection becomes available.
+        :type pool_timeout: :class:`float`
+        :default pool_timeout: *None*
+
+        :param cache_size: If you pass a cache size, up to this number of
+            tickets are cached (see :class:`tractor.cache.TicketCache`).
+            Tickets returned by the update methods are cached as well,
+            deleted tickets are removed from the cache.
+        :type cache_size: :class:`int`
+        :default cache_size: *None* (no caching)
+
+        :param cache_ttl: The number of seconds after which cached tickets
+            are revalidated.
+        :type cache_ttl: :class:`float`
+        :default cache_ttl: 300
+
+        :param schema_file: If you pass a schema file, tickets are validated
+            against the field definitions of the trac (see
+            :class:`tractor.schema.TicketSchema`) instead of the default
+            attribute lookups. The schema is loaded on first use and cached
+            in this file. You can also enable the schema validation with
+            :func:`load_schema`.
+        :default schema_file: *None*
+
+        :param schema_ttl: The number of seconds the cached schema is used
+            before it is fetched again.
+        :type schema_ttl: :class:`float`
+        :default schema_ttl: 86400
+
+        :param rate_limit: The maximum number of requests per second sent
+            to the realm.
+        :type rate_limit: :class:`float`
+        :default rate_limit: *None* (no limit)
+
+        :param rate_burst: The number of requests that may be sent at once
+            after an idle period.
+        :type rate_burst: :class:`int`
+        :default rate_burst: the rate limit
+
+        :param max_in_flight: The maximum number of concurrent requests to
+            the realm.
+        :type max_in_flight: :class:`int`
+        :default max_in_flight: *None* (no limit)
+
+        :param target_latency: If you pass a target latency (in seconds),
+            the concurrency limit is reduced while responses take longer
+            and raised again (up to *max_in_flight*, which is required)
+            while they are faster.
+        :type target_latency: :class:`float`
+        :default target_latency: *None* (no adaptation)
+
+        The rate and concurrency limits are enforced by a
+        :class:`tractor.governor.RequestGovernor` which is shared by all APIs
+        for the same realm (in all threads). APIs created without limits use
+        the governor of their realm as well, if there is one.
+
+        :param metrics: If you pass a metrics sink, the method name, latency,
+            request and response sizes and the error kind of each request
+            are recorded (see :class:`tractor.metrics.RequestMetrics`).
+        :type metrics: :class:`tractor.metrics.MetricsSink`
+        :default metrics: *None* (no metrics)
+
+        :param profiler: If you pass a profiler, the time of each phase of
+            a request (waiting, marshalling, network, unmarshalling and
+            converting the result) is recorded in it.
+        :type profiler: :class:`tractor.profiler.RequestProfiler`
+        :default profiler: *None* (no profiling)
+
+        :param hooks: The registry for request hook callbacks (pass a
+            registry to share callbacks between APIs).
+        :type hooks: :class:`tractor.hooks.RequestHooks`
+        :default hooks: a new registry (see :attr:`hooks`)
+
+        :param slow_log: If you pass a slow request log, requests exceeding
+            its latency threshold are logged with their phase breakdown
+            (this enables the phase measurement, like a profiler).
+        :type slow_log: :class:`tractor.slowlog.SlowRequestLog`
+        :default slow_log: *None* (no logging)
+        """
         self._realm = realm
         self._username = username
         self._password = password
         self._connection = None
+        if pool_size is None:
+            self._pool = None
+        else:
+            self._pool = ConnectionPool(self._create_connection, pool_size,
+                                        timeout=pool_timeout)
+        if cache_size is None:
+            self.__ticket_cache = None
+        else:
+            self.__ticket_cache = TicketCache(max_size=cache_size,
+                                              ttl=cache_ttl)
+        self.__schema_file = schema_file
+        self.__schema_ttl = schema_ttl
+        self.__schema = None
+        self.__schema_lock = Lock()
+        if not (rate_limit is None and rate_burst is None and
+                max_in_flight is None and target_latency is None):
+            configure_governor(realm, rate=rate_limit, burst=rate_burst,
+                               max_in_flight=max_in_flight,
+                               target_latency=target_latency)
+        self.__metrics = metrics
+        self.__profiler = profiler
+        self.__slow_log = slow_log
+        #: Indicates whether the request phases are measured.
+        self._is_profiled = not (profiler is None and slow_log is None)
+        if hooks is None:
+            hooks = RequestHooks()
+        self.__hooks = hooks
+        #: Batches are bound to the thread that has opened them.
+        self.__thread_state = local()
+
+    @property
+    def realm(self):
+        """
+        The XML-RPC location of the trac.
+        """
+        return self._realm
 
-    def _get_connection(self):
+    @property
+    def metrics(self):
         """
-        Returns a :class:`ServerProxy` object.
+        The :class:`tractor.metrics.MetricsSink` requests are recorded in
+        (*None* if metrics are disabled).
+        """
+        return self.__metrics
+
+    @property
+    def profiler(self):
+        """
+        The :class:`tractor.profiler.RequestProfiler` (*None* if profiling
+        is disabled).
+        """
+        return self.__profiler
+
+    @property
+    def slow_log(self):
+        """
+        The :class:`tractor.slowlog.SlowRequestLog` (*None* if slow requests
+        are not logged).
+        """
+        return self.__slow_log
+
+    @property
+    def hooks(self):
+        """
+        The :class:`tractor.hooks.RequestHooks` registry. The
+        *before_request*, *after_response* and *on_error* callbacks
+        registered here are invoked for each request, e.g. to start and end
+        tracing spans::
+
+            @api.hooks.after_response
+            def trace(event):
+                tracer.record(event.method_name, event.args_summary,
+                              event.latency, event.response_bytes)
+        """
+        return self.__hooks
+
+    @property
+    def governor(self):
+        """
+        The :class:`tractor.governor.RequestGovernor` limiting the requests
+        to the realm (*None* if the requests are not limited).
+        """
+        return get_governor(self._realm)
+
+    @property
+    def ticket_cache(self):
+        """
+        The :class:`tractor.cache.TicketCache` (*None* if caching is
+        disabled).
+        """
+        return self.__ticket_cache
+
+    @property
+    def schema(self):
+        """
+        The :class:`tractor.schema.TicketSchema` tickets are validated
+        against (*None* if the schema validation is disabled). If there is
+        a schema file, the schema is loaded on first access.
+        """
+        if self.__schema is None and not self.__schema_file is None:
+            self.load_schema()
+        return self.__schema
+
+    def load_schema(self, refresh=False):
+        """
+        Loads the ticket schema of the trac (from the schema file, if there
+        is one) and enables the schema validation.
+
+        :param refresh: If *True*, the schema is fetched from the trac even
+            if the schema file is up-to-date.
+        :type refresh: :class:`bool`
+        :return: The :class:`tractor.schema.TicketSchema`.
+        """
+        with self.__schema_lock:
+            if self.__schema is None or refresh:
+                self.__schema = load_schema(self,
+                                            cache_file=self.__schema_file,
+                                            ttl=self.__schema_ttl,
+                                            refresh=refresh)
+            return self.__schema
+
+    def _create_connection(self):
+        """
+        Returns a new :class:`ServerProxy` object.
         """
         raise NotImplementedError('Abstract method.')
 
+    def _get_url(self):
+        """
+        Returns the realm URL including the (quoted) credentials. Realms
+        without scheme are accessed via HTTP.
+        """
+        if '://' in self._realm:
+            scheme, address = self._realm.split('://', 1)
+        else:
+            scheme, address = 'http', self._realm
+        return '%s://%s:%s@%s' % (scheme, urllib.quote(self._username, ''),
+                                  urllib.quote(self._password, ''), address)
+
+    def _get_connection(self):
+        """
+        Returns the :class:`ServerProxy` object used in non-pooled mode.
+        """
+        if self._connection is None:
+            self._connection = self._create_connection()
+        return self._connection
+
     def send_request(self, method_name, args):
         """
-        Submits the request.
+        Submits the request. In pooled mode, a connection is checked out of
+        the pool for the duration of the request.
+
+        :raises tractor.pool.PoolTimeout: If no pool connection becomes
+            available within the pool timeout.
+        :raises tractor.deadline.RequestTimeout: If the deadline of the
+            current thread (see :func:`deadline`) has expired (also while
+            waiting for the governor of the realm).
+        """
+        deadline = self._get_deadline()
+        if not deadline is None:
+            deadline.check()
+        if self._is_profiled:
+            return self._send_profiled_request(method_name, args)
+        with self._govern_request():
+            with self._checkout_connection() as conn:
+                if self.__metrics is None and not self.__hooks.is_active:
+                    return self.__invoke(conn, method_name, args)
+                with self._record_request(conn, method_name, args):
+                    return self.__invoke(conn, method_name, args)
+
+    def _send_profiled_request(self, method_name, args, invoke=None):
+        """
+        Submits the request like :func:`send_request` and records its
+        profile in the profiler and the slow request log.
+
+        :param invoke: Sends the request over the connection passed as
+            only argument (instead of invoking the method on the
+            connection).
+        """
+        if invoke is None:
+            invoke = lambda conn: self.__invoke(conn, method_name, args)
+        with self.__profile_request(method_name, args) as profile:
+            start_time = time.time()
+            with self._govern_request():
+                with self._checkout_connection() as conn:
+                    profile.add('wait', time.time() - start_time)
+                    start_time = time.time()
+                    try:
+                        with self._record_request(conn, method_name, args):
+                            return invoke(conn)
+                    finally:
+                        profile.request_bytes, profile.response_bytes = \
+                                            self._get_transfer_sizes(conn)
+                        phase_times = self._get_phase_times(conn)
+                        if phase_times is None:
+                            profile.add('call', time.time() - start_time)
+                        else:
+                            for phase, seconds in phase_times.iteritems():
+                                profile.add(phase, seconds)
+
+    @contextmanager
+    def __profile_request(self, method_name, args):
+        # The outermost context of the current thread records the profile
+        # (so the conversion of the result is included).
+        profile = getattr(self.__thread_state, 'profile', None)
+        if not profile is None:
+            yield profile
+            return
+        profile = RequestProfile(method_name, args)
+        self.__thread_state.profile = profile
+        try:
+            yield profile
+        except Exception as exc:
+            profile.error = exc
+            raise
+        finally:
+            self.__thread_state.profile = None
+            if not self.__profiler is None:
+                self.__profiler.record(profile)
+            if not self.__slow_log is None:
+                self.__slow_log.observe(profile)
+
+    @contextmanager
+    def _govern_request(self):
+        """
+        Context manager waiting until the governor of the realm (if there
+        is one) admits the request and reporting the latency of the request
+        to the governor.
+        """
+        governor = get_governor(self._realm)
+        if governor is None:
+            yield
+        else:
+            with governor.request(deadline=self._get_deadline()):
+                yield
+
+    @contextmanager
+    def _checkout_connection(self):
+        """
+        Context manager providing the connection for one request (checked
+        out of the pool in pooled mode).
+        """
+        deadline = self._get_deadline()
+        if self._pool is None:
+            yield self._get_connection()
+        elif deadline is None:
+            with self._pool.connection() as conn:
+                yield conn
+        else:
+            try:
+                conn = self._pool.checkout(
+                            timeout=deadline.get_timeout(self._pool.timeout))
+            except PoolTimeout:
+                deadline.check()
+                raise
+            try:
+                yield conn
+            finally:
+                self._pool.checkin(conn)
+
+    def _download_base64(self, method_name, args, binary_output):
+        """
+        Submits a request returning a base64 value and writes the decoded
+        data to the given file object. Returns the number of bytes written.
+
+        The default implementation decodes the complete response in memory.
         """
-        conn = self._get_connection()
+        binary = self.send_request(method_name=method_name, args=args)
+        binary_output.write(binary.data)
+        return len(binary.data)
+
+    @contextmanager
+    def _record_request(self, conn, method_name, args):
+        """
+        Context manager recording the request sent over the given
+        connection within the context in the metrics sink and passing it
+        to the hooks (if there are any).
+        """
+        metrics = self.__metrics
+        hooks = self.__hooks
+        if not hooks.is_active:
+            hooks = None
+        if metrics is None and hooks is None:
+            yield
+            return
+        event = None
+        if not hooks is None:
+            event = RequestEvent(method_name, args, time.time())
+            hooks.fire(BEFORE_REQUEST, event)
+        error = None
+        start_time = time.time()
+        try:
+            yield
+        except Exception as exc:
+            error = exc
+            raise
+        finally:
+            latency = time.time() - start_time
+            request_bytes, response_bytes = self._get_transfer_sizes(conn)
+            if not metrics is None:
+                metrics.record_request(method_name, latency, request_bytes,
+                                       response_bytes,
+                                       self.__get_error_kind(error))
+            if not event is None:
+                event.latency = latency
+                event.request_bytes = request_bytes
+                event.response_bytes = response_bytes
+                event.error = error
+                if error is None:
+                    hooks.fire(AFTER_RESPONSE, event)
+                else:
+                    hooks.fire(ON_ERROR, event)
+
+    @staticmethod
+    def __get_error_kind(error):
+        if error is None:
+            return None
+        elif isinstance(error, Fault):
+            return 'fault'
+        elif isinstance(error, ProtocolError):
+            return 'protocol_error'
+        elif isinstance(error, RequestTimeout):
+            return 'timeout'
+        return 'error'
+
+    def _get_transfer_sizes(self, conn): # pylint: disable=W0613
+        """
+        Returns the request and response body sizes of the last request
+        sent over the given connection (*None* values if the connection does
+        not report sizes).
+        """
+        return None, None
+
+    def _get_phase_times(self, conn): # pylint: disable=W0613
+        """
+        Returns a dictionary with the marshal, network and unmarshal times
+        of the last request sent over the given connection (*None* if the
+        connection does not measure them).
+        """
+        return None
+
+    @staticmethod
+    def __invoke(conn, method_name, args):
         meth = conn
         for item in method_name.split('.'):
             meth = getattr(meth, item)
         return meth(*args)
 
+    @contextmanager
+    def batch(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Context manager collecting the API calls made within the context
+        and submitting them as chunked *system.multicall* requests.
+
+        Within the context, the API methods do not return their results
+        directly but :class:`tractor.batch.PendingCall` handles resolving to
+        the same value the method would have returned otherwise. Faults are
+        reported per call (see :attr:`tractor.batch.PendingCall.fault`).
+        The remaining calls are submitted when the context is left without
+        error; if the context raises an exception, the calls that have not
+        been submitted yet are not sent and fail with this exception::
+
+            with api.batch() as batch:
+                calls = [api.get_ticket(ticket_id) for ticket_id in ids]
+            tickets = [call.result() for call in calls if call.fault is None]
+
+        :param chunk_size: The maximum number of calls per multicall request.
+        :type chunk_size: :class:`int`
+        :default chunk_size: 100
+
+        A batch only applies to the thread that has opened it.
+
+        :raises ValueError: If batches are nested.
+        """
+        if not self._get_batch() is None:
+            raise ValueError('Batches must not be nested!')
+
+        batch = Batch(self._send_multicall, chunk_size=chunk_size)
+        self.__thread_state.batch = batch
+        try:
+            yield batch
+        except Exception as exc:
+            batch.abort(exc)
+            raise
+        finally:
+            self.__thread_state.batch = None
+        batch.flush()
+
+    @contextmanager
+    def deadline(self, timeout):
+        """
+        Context manager setting a deadline for all requests sent by the
+        current thread within the context. Each request only gets the time
+        remaining until the deadline (calls queued in a batch or by the
+        asynchronous client keep the deadline they have been made with).
+        Nested deadlines cannot extend the outer deadline::
+
+            with api.deadline(5):
+                ticket = api.get_ticket(ticket_id)
+
+        Requests that do not complete in time fail with a
+        :class:`tractor.deadline.RequestTimeout`.
+
+        :param timeout: The number of seconds from now on.
+        :type timeout: :class:`float`
+        """
+        deadline = Deadline.get_earliest([Deadline(timeout),
+                                          self._get_deadline()])
+        with self.__use_deadline(deadline):
+            yield deadline
+
+    def _get_deadline(self):
+        """
+        Returns the deadline set by the current thread (if there is any).
+        """
+        return getattr(self.__thread_state, 'deadline', None)
+
+    @contextmanager
+    def __use_deadline(self, deadline):
+        outer_deadline = self._get_deadline()
+        self.__thread_state.deadline = deadline
+        try:
+            yield
+        finally:
+            self.__thread_state.deadline = outer_deadline
+
+    def _get_batch(self):
+        """
+        Returns the batch opened by the current thread (if there is any).
+        """
+        return getattr(self.__thread_state, 'batch', None)
+
+    def _send_multicall(self, calls):
+        """
+        Submits the given :class:`tractor.batch.PendingCall` objects as one
+        *system.multicall* request and completes them. If the whole request
+        fails, the exception is stored for all calls and reraised.
+        """
+        signatures = [dict(methodName=call.method_name,
+                           params=list(call.args)) for call in calls]
+        # The request must meet the earliest deadline of its calls.
+        deadline = Deadline.get_earliest([call.deadline for call in calls]
+                                         + [self._get_deadline()])
+        try:
+            with self.__use_deadline(deadline):
+                results = self.send_request(method_name='system.multicall',
+                                            args=(signatures,))
+        except Exception as exc:
+            for call in calls:
+                call.set_fault(exc)
+            raise
+
+        for call, result in izip(calls, results):
+            if isinstance(result, dict):
+                fault = Fault(result['faultCode'], result['faultString'])
+                call.set_fault(fault)
+            else:
+                call.set_result(result[0])
+
+    def _submit(self, method_name, args, converter=None):
+        """
+        Submits the request and converts the result (if a converter is
+        passed). Within a batch context the request is queued instead and
+        a :class:`tractor.batch.PendingCall` is returned.
+        """
+        batch = self._get_batch()
+        if not batch is None:
+            return batch.add(method_name, args, converter=converter,
+                             deadline=self._get_deadline())
+
+        if self._is_profiled:
+            return self.__submit_profiled(method_name, args, converter)
+        result = self.send_request(method_name=method_name, args=args)
+        if not converter is None:
+            result = converter(result)
+        return result
+
+    def __submit_profiled(self, method_name, args, converter):
+        with self.__profile_request(method_name, args) as profile:
+            result = self.send_request(method_name=method_name, args=args)
+            if not converter is None:
+                with profile.measure('wrap'):
+                    result = converter(result)
+            return result
+
+    def _skip_request(self, method_name, args, result):
+        """
+        Returns the given result without submitting the request (for
+        requests that would not change anything). Within a batch context
+        a completed :class:`tractor.batch.PendingCall` is returned instead.
+        """
+        if self._get_batch() is None:
+            return result
+        call = PendingCall(method_name, args)
+        call.set_result(result)
+        return call
+
     def create_ticket(self, ticket_wrapper, notify=True):
         """
         Creates a new ticket.
@@ -59,34 +671,127 @@ class TractorApi(object):
 
         :return: The ID of the new ticket.
         """
-        attributes = ticket_wrapper.get_value_map_for_ticket_creation()
+        attributes = ticket_wrapper.get_value_map_for_ticket_creation(
+                                    self.__get_attribute_validator())
 
         meth_name = 'ticket.create'
         args = (ticket_wrapper.summary, ticket_wrapper.description, attributes,
                 notify)
-        ticket_id = self.send_request(method_name=meth_name, args=args)
-
-        return ticket_id
+        return self._submit(meth_name, args)
 
     def get_ticket(self, ticket_id):
         """
-        Returns the ticket with the desired ID.
+        Returns the ticket with the desired ID. If caching is enabled, the
+        ticket is looked up in the cache first (outside batches).
         """
         if ticket_id is None:
             raise ValueError('The ticket ID must not be None!')
 
+        if not self.__ticket_cache is None and self._get_batch() is None:
+            ticket = self.__ticket_cache.get(ticket_id,
+                            get_recent_changes=self.__get_recent_change_ids)
+            if not ticket is None:
+                return ticket
+
         meth_name = 'ticket.get'
         args = (ticket_id,)
-        ticket_data = self.send_request(method_name=meth_name, args=args)
+        return self._submit(meth_name, args, converter=self.__convert_ticket)
 
-        return TicketWrapper.create_from_trac_data(ticket_data)
+    def iter_query(self, query='status!=closed',
+                   page_size=DEFAULT_CHUNK_SIZE):
+        """
+        Runs a trac ticket query and lazily yields the matching tickets as
+        :class:`TicketWrapper` objects. Queries are not supported within
+        batches.
+
+        The query results are fetched page by page. The tickets of a page
+        are fetched with one *system.multicall* request that also reads
+        ahead the ticket IDs of the next page, so only one page is held in
+        memory at a time and the processing can start before the whole
+        result is known::
+
+            for ticket in api.iter_query('status=new&milestone=m1'):
+                ...
+
+        :param query: A trac query string (without *max* and *page*
+            parameters).
+        :type query: :class:`str`
+        :default query: *status!=closed*
+        :param page_size: The number of tickets fetched per request.
+        :type page_size: :class:`int`
+        :default page_size: 100
+
+        :raises ValueError: If a batch is open.
+        """
+        if not self._get_batch() is None:
+            raise ValueError('Queries are not supported within batches!')
+        if page_size < 1:
+            raise ValueError('The page size must be a positive number!')
+
+        meth_name = 'ticket.query'
+        page = 1
+        ticket_ids = self.send_request(method_name=meth_name,
+                            args=(self.__get_page_query(query, page_size,
+                                                        page),))
+        while ticket_ids:
+            with self.batch(chunk_size=page_size + 1):
+                calls = [self.get_ticket(ticket_id)
+                         for ticket_id in ticket_ids]
+                if len(ticket_ids) < page_size:
+                    next_page_call = None
+                else:
+                    page += 1
+                    next_page_call = self._submit(meth_name,
+                                    (self.__get_page_query(query, page_size,
+                                                           page),))
+            for call in calls:
+                yield call.result()
+            if next_page_call is None or \
+                        self.__is_beyond_last_page(next_page_call.fault):
+                break
+            ticket_ids = next_page_call.result()
+
+    def get_recent_changes(self, since):
+        """
+        Returns the IDs of the tickets changed since the given time. Use a
+        :class:`tractor.feed.ChangeFeed` to poll for changes continuously.
+
+        :param since: The time in UTC (trac stores times in UTC).
+        :type since: :class:`datetime.datetime`
+        """
+        if since is None:
+            raise ValueError('The time must not be None!')
+
+        meth_name = 'ticket.getRecentChanges'
+        args = (since,)
+        return self._submit(meth_name, args)
+
+    @staticmethod
+    def __is_beyond_last_page(fault):
+        # Trac raises a fault if the (read-ahead) page is beyond the last
+        # page.
+        return isinstance(fault, Fault) and \
+               'is beyond the number of pages' in str(fault.faultString)
+
+    @staticmethod
+    def __get_page_query(query, page_size, page):
+        constraints = [constraint for constraint in query.split('&')
+                       if constraint]
+        constraints.extend(['max=%i' % (page_size), 'page=%i' % (page)])
+        return '&'.join(constraints)
 
     def update_ticket(self, ticket_wrapper, comment=None, notify=True):
         """
         Updates the ticket with the given ID.
 
         At this, the ticket will only update the attributes that have been
-        set in the ticket wrapper. The wrapper may thus be incomplete.
+        set in the ticket wrapper. The wrapper may thus be incomplete. For
+        wrappers converted from trac data (e.g. by :func:`get_ticket`), only
+        the attributes changed since then are sent (see
+        :attr:`tractor.ticket.TicketWrapper.changed_attributes`).
+
+        If nothing has been changed and there is no comment, no request is
+        sent and (a copy of) the passed wrapper is returned.
 
         :param comment: If you do not specify a comment, the method will sent
             a default comment instead.
@@ -101,15 +806,18 @@ class TractorApi(object):
         if ticket_wrapper.ticket_id is None:
             raise ValueError('The ticket ID in the wrapper must not be None!')
 
+        validator = self.__get_attribute_validator()
+        attributes = ticket_wrapper.get_value_map_for_update(validator)
+        meth_name = 'ticket.update'
+        if not attributes and comment is None:
+            args = (ticket_wrapper.ticket_id, comment, attributes, notify)
+            return self._skip_request(meth_name, args,
+                                      copy.copy(ticket_wrapper))
+
         if comment is None:
             comment = 'Automated ticket update via Tractor.'
-        attributes = ticket_wrapper.get_value_map_for_update()
-
-        meth_name = 'ticket.update'
         args = (ticket_wrapper.ticket_id, comment, attributes, notify)
-        ticket_data = self.send_request(method_name=meth_name, args=args)
-
-        return TicketWrapper.create_from_trac_data(ticket_data)
+        return self._submit(meth_name, args, converter=self.__convert_ticket)
 
     def assign_ticket(self, ticket_id, username, comment=None, notify=True):
         """
@@ -134,9 +842,7 @@ class TractorApi(object):
 
         meth_name = 'ticket.update'
         args = (ticket_id, comment, attributes, notify)
-        ticket_data = self.send_request(method_name=meth_name, args=args)
-
-        return TicketWrapper.create_from_trac_data(ticket_data)
+        return self._submit(meth_name, args, converter=self.__convert_ticket)
 
     def close_ticket(self, ticket_id, resolution, comment=None, notify=True):
         """
@@ -161,13 +867,12 @@ class TractorApi(object):
         ticket_wrapper = TicketWrapper(ticket_id=ticket_id,
                                        resolution=resolution,
                                        status=STATUS_ATTRIBUTE_VALUES.CLOSED)
-        attributes = ticket_wrapper.get_value_map_for_update()
+        validator = self.__get_attribute_validator()
+        attributes = ticket_wrapper.get_value_map_for_update(validator)
 
         meth_name = 'ticket.update'
         args = (ticket_id, comment, attributes, notify)
-        ticket_data = self.send_request(method_name=meth_name, args=args)
-
-        return TicketWrapper.create_from_trac_data(ticket_data)
+        return self._submit(meth_name, args, converter=self.__convert_ticket)
 
     def delete_ticket(self, ticket_id):
         """
@@ -178,14 +883,13 @@ class TractorApi(object):
         if ticket_id is None:
             raise ValueError('The ticket ID must not be None!')
 
+        if not self.__ticket_cache is None:
+            self.__ticket_cache.invalidate(ticket_id)
+
         meth_name = 'ticket.delete'
         args = (ticket_id,)
-        success = self.send_request(method_name=meth_name, args=args)
-
-        if success == 0:
-            return True
-        else:
-            return False
+        return self._submit(meth_name, args,
+                            converter=self.__convert_delete_result)
 
     def add_attachment(self, ticket_id, attachment, replace_existing=True):
         """
@@ -193,10 +897,13 @@ class TractorApi(object):
         can be a string, a stream or file map. In case of a file map, the
         attachment will be converted into a zip archive, first. If you do not
         want the files to be converted into a zip file, call the method
-        separately for each single file.
+        separately for each single file. Files (passed as file object or
+        by :attr:`file_path`) are encoded on the fly while the request is
+        sent, so they are never loaded into memory as a whole.
 
-        :param attachment: :attr:`file_name`, :attr:`content` and
-            :attr:`description` of the attachment must be set.
+        :param attachment: :attr:`file_name`, :attr:`content` (or
+            :attr:`file_path`) and :attr:`description` of the attachment
+            must be set.
 
         :param replace_existing: Existing files with the same file names will be
             overwritten, if this is set to *True*. If overwriting is disabled,
@@ -214,14 +921,13 @@ class TractorApi(object):
         meth_name = 'ticket.putAttachment'
         args = (ticket_id, attachment.file_name, attachment.description,
                 base64_data, replace_existing)
-        trac_file_name = self.send_request(method_name=meth_name, args=args)
-
-        return trac_file_name
+        return self._submit(meth_name, args)
 
     def get_attachment(self, ticket_id, file_name):
         """
         Returns the content of the requested attachment as Binary -
-        use the :class:`tractor.Base64Converter` to decode it.
+        use the :class:`tractor.Base64Converter` to decode it. Use
+        :func:`download_attachment` for large attachments.
         """
         if ticket_id is None:
             raise ValueError('The ticket ID must not be None!')
@@ -230,39 +936,102 @@ class TractorApi(object):
 
         meth_name = 'ticket.getAttachment'
         args = (ticket_id, file_name)
-        binary_content = self.send_request(method_name=meth_name, args=args)
+        return self._submit(meth_name, args)
 
-        return binary_content
+    def download_attachment(self, ticket_id, file_name, target):
+        """
+        Downloads the content of the requested attachment into a file. In
+        contrast to :func:`get_attachment`, the response is decoded while it
+        is read, so the attachment is never held in memory as a whole.
+        Downloads are not supported within batches.
+
+        :param target: A file path or a writable file object. If the
+            download fails, a file created for a path is removed again.
+        :return: The number of bytes written.
+        """
+        if ticket_id is None:
+            raise ValueError('The ticket ID must not be None!')
+        if file_name is None:
+            raise ValueError('The attachment file name must not be None.')
+        if not self._get_batch() is None:
+            raise ValueError('Attachment downloads are not supported within '
+                             'batches!')
 
-    def get_all_ticket_attachments(self, ticket_id, fetch_content=False):
+        meth_name = 'ticket.getAttachment'
+        args = (ticket_id, file_name)
+        if not isinstance(target, basestring):
+            return self._download_base64(meth_name, args, target)
+        try:
+            with open(target, 'wb') as binary_output:
+                return self._download_base64(meth_name, args, binary_output)
+        except:
+            if os.path.exists(target):
+                os.remove(target)
+            raise
+
+    def get_all_ticket_attachments(self, ticket_id, fetch_content=False,
+                                   max_fetch_bytes=DEFAULT_MAX_FETCH_BYTES):
         """
         Returns information about all attachment of the given ticket.
 
         :param fetch_content: If set to *False* the returned list will
             only contain information about the attachments but not
-            their content. Enabling content fetches requires several
-            trac request and might hence increase the processing time and
-            the transaction load.
+            their content. The contents are fetched with *system.multicall*
+            requests, which might still increase the processing time and
+            the transaction load. Content fetches are not supported within
+            batches.
         :type fetch_content: :class:`bool`
         :default fetch_content: *False*
+
+        :param max_fetch_bytes: The maximum total size of the attachments
+            fetched in one request. Larger attachments are fetched alone.
+        :type max_fetch_bytes: :class:`int`
+        :default max_fetch_bytes: 16 MB
         """
         if ticket_id is None:
             raise ValueError('The ticket ID must not be None!')
+        if fetch_content and not self._get_batch() is None:
+            raise ValueError('Attachment contents cannot be fetched within '
+                             'a batch.')
 
         meth_name = 'ticket.listAttachments'
         args = (ticket_id,)
-        att_list = self.send_request(method_name=meth_name, args=args)
-
-        attachments = []
-        for att_data in att_list:
-            att = AttachmentWrapper.create_from_trac_data(att_data)
-            if fetch_content:
-                content = self.get_attachment(ticket_id, att.file_name)
-                att.content = content
-            attachments.append(att)
+        attachments = self._submit(meth_name, args,
+                                   converter=self.__convert_attachment_list)
+
+        if fetch_content:
+            for chunk in self._group_by_size(attachments, max_fetch_bytes):
+                calls = [PendingCall('ticket.getAttachment',
+                                     (ticket_id, att.file_name))
+                         for att in chunk]
+                self._send_multicall(calls)
+                for att, call in izip(chunk, calls):
+                    att.content = call.result()
 
         return attachments
 
+    @staticmethod
+    def _group_by_size(attachments, max_bytes):
+        """
+        Splits the attachment list into consecutive groups whose total size
+        does not exceed the given limit. Attachments of unknown size are
+        put into a group of their own.
+        """
+        group = []
+        group_size = 0
+        for att in attachments:
+            size = att.size
+            if size is None:
+                size = max_bytes
+            if group and group_size + size > max_bytes:
+                yield group
+                group = []
+                group_size = 0
+            group.append(att)
+            group_size += size
+        if group:
+            yield group
+
     def delete_attachment(self, ticket_id, file_name):
         """
         Deletes the specified attachment.
@@ -276,27 +1045,158 @@ class TractorApi(object):
 
         meth_name = 'ticket.deleteAttachment'
         args = (ticket_id, file_name)
-        success = self.send_request(method_name=meth_name, args=args)
+        return self._submit(meth_name, args)
 
-        return success
+    def __get_attribute_validator(self):
+        """
+        Returns the validator of the schema (or *None* if the schema
+        validation is disabled).
+        """
+        schema = self.schema
+        if schema is None:
+            return None
+        return schema.attribute_validator
+
+    def __convert_ticket(self, trac_ticket_data):
+        """
+        Converts ticket data and caches the ticket (if caching is enabled).
+        """
+        ticket = TicketWrapper.create_from_trac_data(trac_ticket_data)
+        if not self.__ticket_cache is None:
+            self.__ticket_cache.put(ticket)
+        return ticket
+
+    def __get_recent_change_ids(self, since):
+        return self.send_request(method_name='ticket.getRecentChanges',
+                                 args=(since,))
+
+    @staticmethod
+    def __convert_delete_result(trac_result):
+        """
+        The trac returns 0 for successful deletions.
+        """
+        return trac_result == 0
+
+    @staticmethod
+    def __convert_attachment_list(trac_attachment_list):
+        return [AttachmentWrapper.create_from_trac_data(att_data)
+                for att_data in trac_attachment_list]
 
 
 class Tractor(TractorApi):
 
-    def _get_connection(self):
+    def __init__(self, realm, username, password, pool_size=None,
+                 pool_timeout=None, max_idle_time=None, cache_size=None,
+                 cache_ttl=DEFAULT_CACHE_TTL, schema_file=None,
+                 schema_ttl=DEFAULT_SCHEMA_TTL, connect_timeout=None,
+                 read_timeout=None, rate_limit=None, rate_burst=None,
+                 max_in_flight=None, target_latency=None, metrics=None,
+                 profiler=None, hooks=None, slow_log=None):
         """
-        Returns a :class:`ServerProxy` object.
+        Constructor.
+
+        :param realm: The XML-RPC location of the trac. Realms without
+            scheme ("http://" or "https://") are accessed via HTTP.
+
+        :param pool_size: See :class:`TractorApi`.
+        :param pool_timeout: See :class:`TractorApi`.
+        :param cache_size: See :class:`TractorApi`.
+        :param cache_ttl: See :class:`TractorApi`.
+        :param schema_file: See :class:`TractorApi`.
+        :param schema_ttl: See :class:`TractorApi`.
+        :param rate_limit: See :class:`TractorApi`.
+        :param rate_burst: See :class:`TractorApi`.
+        :param max_in_flight: See :class:`TractorApi`.
+        :param target_latency: See :class:`TractorApi`.
+        :param metrics: See :class:`TractorApi`.
+        :param profiler: See :class:`TractorApi`.
+        :param hooks: See :class:`TractorApi`.
+        :param slow_log: See :class:`TractorApi`.
+
+        :param max_idle_time: The connection to the trac is kept alive
+            between requests. Connections that have been idle for longer than
+            this number of seconds are replaced by a new one.
+        :type max_idle_time: :class:`float`
+        :default max_idle_time: *None* (reuse until the server closes it)
+
+        :param connect_timeout: The maximum number of seconds for
+            establishing a connection (including the TLS handshake).
+        :type connect_timeout: :class:`float`
+        :default connect_timeout: *None* (the default socket timeout)
+
+        :param read_timeout: The maximum number of seconds a request waits
+            for data from the trac (per socket operation).
+        :type read_timeout: :class:`float`
+        :default read_timeout: *None* (the default socket timeout)
+
+        Connect and read timeouts are reduced to the time remaining until
+        the deadline (see :func:`TractorApi.deadline`). Timeouts are raised
+        as :class:`tractor.deadline.RequestTimeout`.
         """
-        if self._connection is None:
-            url = 'http://%s:%s@%s' % (self._username, self._password,
-                                       self._realm)
-            self._connection = ServerProxy(url)
-        return self._connection
+        self._max_idle_time = max_idle_time
+        self._connect_timeout = connect_timeout
+        self._read_timeout = read_timeout
+        TractorApi.__init__(self, realm, username, password,
+                            pool_size=pool_size, pool_timeout=pool_timeout,
+                            cache_size=cache_size, cache_ttl=cache_ttl,
+                            schema_file=schema_file, schema_ttl=schema_ttl,
+                            rate_limit=rate_limit, rate_burst=rate_burst,
+                            max_in_flight=max_in_flight,
+                            target_latency=target_latency, metrics=metrics,
+                            profiler=profiler, hooks=hooks,
+                            slow_log=slow_log)
+
+    def _create_connection(self):
+        """
+        Returns a new :class:`StreamingServerProxy` object using a
+        keep-alive transport.
+        """
+        url = self._get_url()
+        transport = create_transport(url, max_idle_time=self._max_idle_time,
+                                     connect_timeout=self._connect_timeout,
+                                     read_timeout=self._read_timeout,
+                                     get_deadline=self._get_deadline)
+        transport.measure_phases = self._is_profiled
+        return StreamingServerProxy(url, transport=transport)
+
+    def _get_transfer_sizes(self, conn):
+        """
+        The keep-alive transport counts the transferred bytes.
+        """
+        return conn.get_transfer_sizes()
+
+    def _get_phase_times(self, conn):
+        """
+        The server proxy and the keep-alive transport measure the phases.
+        """
+        return conn.get_phase_times()
+
+    def _download_base64(self, method_name, args, binary_output):
+        """
+        Decodes the base64 value into the output while the response is
+        read.
+        """
+        if self._is_profiled:
+            invoke = lambda conn: conn.download(binary_output, method_name,
+                                                *args)
+            return self._send_profiled_request(method_name, args,
+                                               invoke=invoke)
+        with self._govern_request():
+            with self._checkout_connection() as conn:
+                with self._record_request(conn, method_name, args):
+                    return conn.download(binary_output, method_name, *args)
 
 
 class DummyTractor(TractorApi):
 
     def _get_connection(self):
+        """
+        Dummy connections are cheap and reflect the current user settings
+        of the (shared) dummy trac, so they are not cached.
+        """
+        return self._create_connection()
+
+    def _create_connection(self):
         """
         Returns a dummy connection that acts like a real connection.
         """
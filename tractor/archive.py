@@ -0,0 +1,291 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from collections import deque
+from itertools import chain
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
+from tempfile import SpooledTemporaryFile
+import os
+import shutil
+import time
+import zipfile
+import zlib
+
+__docformat__ = 'reStructuredText en'
+__all__ = ['CompressionPolicy',
+           'DEFAULT_SPOOL_THRESHOLD',
+           'ZipArchiveBuilder']
+
+
+#: Archives (and compressed members) larger than this number of bytes are
+#: spilled to temporary files.
+DEFAULT_SPOOL_THRESHOLD = 16 * 1024 * 1024
+
+#: The number of bytes read and compressed at a time.
+CHUNK_SIZE = 1024 * 1024
+
+
+class CompressionPolicy(object):
+    """
+    Decides whether an archive member is deflated or stored.
+
+    Content that is compressed already (detected by the file extension or
+    the magic bytes at the start of the content) is stored, since
+    deflating it again costs CPU time without reducing the size. All
+    other content is deflated. Overrides take precedence.
+    """
+
+    #: Extensions of compressed file formats (lower case).
+    COMPRESSED_EXTENSIONS = frozenset(['.7z', '.apk', '.bz2', '.docx',
+                                       '.ear', '.egg', '.gif', '.gz',
+                                       '.jar', '.jpeg', '.jpg', '.lz4',
+                                       '.lzma', '.mp3', '.mp4', '.odp',
+                                       '.ods', '.odt', '.png', '.pptx',
+                                       '.rar', '.tbz2', '.tgz', '.txz',
+                                       '.war', '.webp', '.whl', '.xlsx',
+                                       '.xz', '.zip', '.zst'])
+
+    #: Magic bytes of compressed file formats.
+    COMPRESSED_MAGIC_BYTES = ('\x1f\x8b', # gzip
+                              'PK\x03\x04', # zip (jar, docx, ...)
+                              '\x89PNG', # png
+                              '\xff\xd8\xff', # jpeg
+                              'GIF8', # gif
+                              'BZh', # bzip2
+                              '\xfd7zXZ\x00', # xz
+                              '7z\xbc\xaf\x27\x1c', # 7-zip
+                              '\x28\xb5\x2f\xfd', # zstandard
+                              'Rar!') # rar
+
+    #: The number of content bytes required for the magic byte detection.
+    MAGIC_SIZE = max([len(magic) for magic in COMPRESSED_MAGIC_BYTES])
+
+    def __init__(self, overrides=None, detect_compressed=True):
+        """
+        Constructor.
+
+        :param overrides: Maps member file names to the compression type
+            (:const:`zipfile.ZIP_STORED` or :const:`zipfile.ZIP_DEFLATED`)
+            to use for them.
+        :type overrides: :class:`dict`
+        :param detect_compressed: If set to *False*, all members without
+            override are deflated.
+        :type detect_compressed: :class:`bool`
+        :default detect_compressed: *True*
+        """
+        if overrides is None:
+            overrides = dict()
+        #: Compression types for particular member file names.
+        self.overrides = overrides
+        #: Store members with compressed content?
+        self.detect_compressed = detect_compressed
+
+    def get_compress_type(self, file_name, head):
+        """
+        Returns the compression type for an archive member.
+
+        :param file_name: The file name of the member.
+        :param head: The first bytes of the member content (at least
+            :attr:`MAGIC_SIZE` bytes unless the content is shorter).
+        """
+        if self.overrides.has_key(file_name):
+            return self.overrides[file_name]
+        if self.detect_compressed and self.is_compressed(file_name, head):
+            return zipfile.ZIP_STORED
+        return zipfile.ZIP_DEFLATED
+
+    def is_compressed(self, file_name, head):
+        """
+        Checks whether the member content is compressed already.
+        """
+        extension = os.path.splitext(file_name)[1].lower()
+        if extension in self.COMPRESSED_EXTENSIONS:
+            return True
+        for magic in self.COMPRESSED_MAGIC_BYTES:
+            if head.startswith(magic):
+                return True
+        return False
+
+
+class ZipArchiveBuilder(object):
+    """
+    Builds zip archives from file maps (file names as keys, contents as
+    values).
+
+    The members are compressed concurrently in a thread pool (zlib releases
+    the interpreter lock while compressing, so several cores are used) and
+    then written to the archive in file map order. Archives and compressed
+    members exceeding the spool threshold are spilled to temporary files.
+    With the default settings, the archive is identical to one written
+    with :func:`zipfile.ZipFile.writestr`.
+    """
+
+    def __init__(self, compression_level=zlib.Z_DEFAULT_COMPRESSION,
+                 spool_threshold=DEFAULT_SPOOL_THRESHOLD, worker_count=None,
+                 compression_policy=None):
+        """
+        Constructor.
+
+        :param compression_level: The zlib compression level (0 - 9).
+        :type compression_level: :class:`int`
+        :default compression_level: :const:`zlib.Z_DEFAULT_COMPRESSION`
+        :param compression_policy: Decides which members are deflated.
+        :type compression_policy: :class:`CompressionPolicy`
+        :default compression_policy: *None* (a default
+            :class:`CompressionPolicy` storing compressed content)
+        :param spool_threshold: The maximum number of bytes held in memory
+            for the archive.
+        :type spool_threshold: :class:`int`
+        :param worker_count: The number of compression threads.
+        :type worker_count: :class:`int`
+        :default worker_count: *None* (the number of CPUs)
+        """
+        if worker_count is None:
+            try:
+                worker_count = cpu_count()
+            except NotImplementedError:
+                worker_count = 1
+        if worker_count < 1:
+            raise ValueError('The worker count must be a positive number!')
+
+        #: The zlib compression level.
+        self.compression_level = compression_level
+        #: The maximum number of bytes held in memory for the archive.
+        self.spool_threshold = spool_threshold
+        #: The number of compression threads.
+        self.worker_count = worker_count
+        if compression_policy is None:
+            compression_policy = CompressionPolicy()
+        #: Decides which members are deflated.
+        self.compression_policy = compression_policy
+
+    def build(self, file_map):
+        """
+        Builds an archive containing the given files. The content of the
+        files can be a string, a :class:`StringIO` or a file object (which
+        are read from their current position on).
+
+        :return: A :class:`tempfile.SpooledTemporaryFile` containing the
+            archive (positioned at the start).
+        """
+        members = file_map.items()
+        archive_file = SpooledTemporaryFile(max_size=self.spool_threshold)
+        archive = zipfile.ZipFile(archive_file, 'w', zipfile.ZIP_DEFLATED,
+                                  True)
+        if self.worker_count == 1 or len(members) < 2:
+            for member in members:
+                self.__write_member(archive,
+                                    self.__compress_member(*member))
+        else:
+            self.__build_concurrently(archive, members)
+        archive.close()
+        archive_file.seek(0)
+        return archive_file
+
+    def __build_concurrently(self, archive, members):
+        # Keeps the number of compressed members waiting to be written
+        # (and thus the memory consumption) bounded.
+        window_size = self.worker_count * 2
+        pool = ThreadPool(min(self.worker_count, len(members)))
+        pending = deque()
+        try:
+            for member in members:
+                pending.append(pool.apply_async(self.__compress_member,
+                                                member))
+                if len(pending) >= window_size:
+                    self.__write_member(archive, pending.popleft().get())
+            while pending:
+                self.__write_member(archive, pending.popleft().get())
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def __compress_member(self, file_name, content):
+        member_threshold = max(1, self.spool_threshold \
+                                  // (self.worker_count * 2))
+        chunks = self.__iter_chunks(content)
+        # The compression type is decided upon the first chunk.
+        first_chunk = next(chunks, '')
+        compress_type = self.compression_policy.get_compress_type(file_name,
+                                                                  first_chunk)
+        member = _CompressedMember(file_name, compress_type,
+                                   SpooledTemporaryFile(
+                                            max_size=member_threshold))
+        if compress_type == zipfile.ZIP_DEFLATED:
+            compressor = zlib.compressobj(self.compression_level,
+                                          zlib.DEFLATED, -15)
+        else:
+            compressor = None
+        for chunk in chain([first_chunk], chunks):
+            member.crc = zlib.crc32(chunk, member.crc)
+            member.file_size += len(chunk)
+            if not compressor is None:
+                chunk = compressor.compress(chunk)
+            member.data.write(chunk)
+        if not compressor is None:
+            member.data.write(compressor.flush())
+        member.compress_size = member.data.tell()
+        member.data.seek(0)
+        return member
+
+    def __iter_chunks(self, content):
+        if isinstance(content, basestring):
+            for offset in xrange(0, len(content), CHUNK_SIZE):
+                yield content[offset:offset + CHUNK_SIZE]
+        elif hasattr(content, 'read'):
+            while True:
+                chunk = content.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        else:
+            raise TypeError('Unsupported data type "%s".' \
+                            % (content.__class__.__name__))
+
+    def __write_member(self, archive, member):
+        # Mirrors zipfile.ZipFile.writestr for data compressed beforehand.
+        # pylint: disable=W0212
+        zinfo = zipfile.ZipInfo(filename=member.file_name,
+                                date_time=time.localtime(time.time())[:6])
+        zinfo.compress_type = member.compress_type
+        if zinfo.filename[-1] == '/':
+            zinfo.external_attr = 0o40775 << 16
+            zinfo.external_attr |= 0x10
+        else:
+            zinfo.external_attr = 0o600 << 16
+        # A permission issue.
+        zinfo.create_system = 0
+        zinfo.file_size = member.file_size
+        zinfo.compress_size = member.compress_size
+        zinfo.CRC = member.crc & 0xffffffff
+        zinfo.header_offset = archive.fp.tell()
+        archive._writecheck(zinfo)
+        archive._didModify = True
+        zip64 = zinfo.file_size > zipfile.ZIP64_LIMIT or \
+                zinfo.compress_size > zipfile.ZIP64_LIMIT
+        archive.fp.write(zinfo.FileHeader(zip64))
+        try:
+            shutil.copyfileobj(member.data, archive.fp, CHUNK_SIZE)
+        finally:
+            member.data.close()
+        archive.filelist.append(zinfo)
+        archive.NameToInfo[zinfo.filename] = zinfo
+
+
+class _CompressedMember(object):
+    """
+    A compressed archive member waiting to be written.
+    """
+
+    def __init__(self, file_name, compress_type, data):
+        self.file_name = file_name
+        self.compress_type = compress_type
+        self.data = data
+        self.crc = 0
+        self.file_size = 0
+        self.compress_size = 0
@@ -0,0 +1,689 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from .api import DEFAULT_MAX_FETCH_BYTES
+from .api import TractorApi
+from .batch import PendingCall
+from .deadline import RequestTimeout
+from .transport import create_default_ssl_context
+from .transport import create_request_body
+from collections import deque
+from itertools import chain
+from itertools import count
+from xmlrpclib import ProtocolError
+import asyncore
+import base64
+import errno
+import heapq
+import socket
+import sys
+import time
+import urllib
+import xmlrpclib
+
+try:
+    import ssl
+except ImportError: # pragma: no cover
+    ssl = None
+
+__docformat__ = 'reStructuredText en'
+__all__ = ['AsyncTractor',
+           'DEFAULT_MAX_CONCURRENCY']
+
+
+#: The default maximum number of requests in flight per client.
+DEFAULT_MAX_CONCURRENCY = 8
+
+#: The maximum time (seconds) a single event loop iteration blocks.
+LOOP_INTERVAL = 0.05
+
+
+class AsyncTractor(TractorApi):
+    """
+    Non-blocking trac client built on the :mod:`asyncore` event loop.
+
+    The API methods do not block but return :class:`tractor.batch.PendingCall`
+    handles that resolve to the same :class:`tractor.ticket.TicketWrapper`,
+    :class:`tractor.attachment.AttachmentWrapper` or ID values the
+    synchronous methods return. Up to :attr:`max_concurrency` requests are
+    in flight at the same time, each on its own kept-alive connection;
+    further requests are queued (only their arguments are held in memory).
+    All I/O is done in the thread driving the event loop, which happens in
+    :func:`wait`, in :func:`poll` or when the result of a pending call is
+    requested::
+
+        api = AsyncTractor(realm, username, password, max_concurrency=32)
+        calls = [api.get_ticket(ticket_id) for ticket_id in ticket_ids]
+        api.wait(calls)
+        tickets = [call.result() for call in calls if call.fault is None]
+
+    Calls made within a :func:`deadline` context fail with a
+    :class:`tractor.deadline.RequestTimeout` as soon as the deadline has
+    expired (the connections of calls in flight are closed).
+
+    :Note: Instances must not be shared between threads. Within a
+        :func:`batch` context, calls are collected and submitted
+        synchronously as usual.
+    """
+
+    def __init__(self, realm, username, password,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, ssl_context=None):
+        """
+        Constructor.
+
+        :param max_concurrency: The maximum number of requests in flight.
+        :type max_concurrency: :class:`int`
+        :default max_concurrency: 8
+
+        :param ssl_context: The SSL context for HTTPS realms. If you do not
+            pass a context, the default HTTPS context is used.
+        """
+        TractorApi.__init__(self, realm, username, password)
+        if max_concurrency < 1:
+            raise ValueError('The maximum concurrency must be a positive '
+                             'number!')
+        #: The maximum number of requests in flight.
+        self.max_concurrency = max_concurrency
+
+        url = self._get_url()
+        scheme, address = urllib.splittype(url)
+        host, handler = urllib.splithost(address)
+        auth, host = urllib.splituser(host)
+        host, port = urllib.splitport(host)
+        is_secure = scheme == 'https'
+        if is_secure and ssl_context is None:
+            ssl_context = create_default_ssl_context()
+        if is_secure and ssl_context is None:
+            raise ValueError('HTTPS realms require SSL context support.')
+        if port is None:
+            port = is_secure and 443 or 80
+
+        self.__address = (host, int(port))
+        self.__ssl_context = is_secure and ssl_context or None
+        self.__url = '%s://%s%s' % (scheme, host, handler or '/RPC2')
+        self.__request_head = self.__create_request_head(host, port,
+                                                 handler or '/RPC2', auth)
+        self.__socket_map = dict()
+        self.__idle_channels = []
+        self.__channel_count = 0
+        self.__queue = deque()
+        # Maps the calls in flight onto their channels.
+        self.__in_flight = dict()
+        # A heap of (expiration time, sequence number, call) entries for
+        # the calls with deadline.
+        self.__deadlines = []
+        self.__deadline_sequence = count()
+
+    def _create_connection(self):
+        raise NotImplementedError('The asynchronous client does not use '
+                                  'server proxies.')
+
+    @property
+    def pending_count(self):
+        """
+        The number of calls that are queued or in flight.
+        """
+        return len(self.__queue) + len(self.__in_flight)
+
+    def send_request(self, method_name, args):
+        """
+        Submits the request and blocks until the response is received.
+        """
+        call = self.__enqueue(method_name, args, None)
+        self.wait([call])
+        return call.result()
+
+    def _submit(self, method_name, args, converter=None):
+        """
+        Queues the request and returns its :class:`tractor.batch.PendingCall`
+        handle. Within a batch context, the request is added to the batch.
+        """
+        if not self._get_batch() is None:
+            return TractorApi._submit(self, method_name, args,
+                                      converter=converter)
+        return self.__enqueue(method_name, args, converter)
+
+    def _skip_request(self, method_name, args, result):
+        """
+        Returns a completed :class:`tractor.batch.PendingCall` handle for
+        the given result without submitting the request.
+        """
+        call = PendingCall(method_name, args)
+        call.set_result(result)
+        return call
+
+    def get_all_ticket_attachments(self, ticket_id, fetch_content=False,
+                                   max_fetch_bytes=DEFAULT_MAX_FETCH_BYTES):
+        """
+        Returns a handle resolving to information about all attachments of
+        the given ticket. The contents are fetched concurrently, as long as
+        the total size of the attachments in flight does not exceed
+        *max_fetch_bytes* (larger attachments are fetched alone). The
+        attachments keep the order of the trac attachment list.
+        """
+        if not fetch_content or not self._get_batch() is None:
+            return TractorApi.get_all_ticket_attachments(self, ticket_id,
+                                                         fetch_content)
+
+        list_call = TractorApi.get_all_ticket_attachments(self, ticket_id)
+        result_call = PendingCall('ticket.listAttachments', (ticket_id,),
+                            resolver=lambda: self.wait([result_call]))
+        fetcher = _AttachmentContentFetcher(self, ticket_id, result_call,
+                                            max_fetch_bytes)
+        list_call.add_done_callback(fetcher.start)
+        return result_call
+
+    def poll(self, timeout=0):
+        """
+        Processes all pending I/O events, waiting at most for the given
+        number of seconds. Use this method to drive the client from an
+        outer event loop.
+        """
+        self.__expire_calls()
+        self.__dispatch()
+        if self.__socket_map:
+            asyncore.loop(timeout=timeout, use_poll=True,
+                          map=self.__socket_map, count=1)
+        elif timeout:
+            time.sleep(timeout)
+
+    def wait(self, calls=None, timeout=None):
+        """
+        Drives the event loop until the given calls (or all pending calls, if
+        no calls are passed) are completed.
+
+        :param timeout: The maximum number of seconds to wait (*None* for no
+            limit).
+        :return: *True* if all calls have been completed, *False* if the
+            timeout has been reached before (or if the calls cannot be
+            completed by this client).
+        """
+        if timeout is None:
+            deadline = None
+        else:
+            deadline = time.time() + timeout
+        while True:
+            if calls is None:
+                if self.pending_count == 0:
+                    return True
+            elif all(call.done for call in calls):
+                return True
+            elif self.pending_count == 0:
+                return False
+            interval = LOOP_INTERVAL
+            if not deadline is None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                interval = min(interval, remaining)
+            self.poll(interval)
+
+    def close(self):
+        """
+        Closes all connections. Queued calls and calls in flight fail.
+        """
+        exc = socket.error(errno.ECONNABORTED, 'Client connection closed.')
+        queue = self.__queue
+        self.__queue = deque()
+        for call in queue:
+            call.set_fault(exc)
+        for channel in self.__socket_map.values():
+            channel.abort(exc)
+
+    def __enqueue(self, method_name, args, converter):
+        deadline = self._get_deadline()
+        call = PendingCall(method_name, args, converter=converter,
+                           resolver=lambda: self.wait([call]),
+                           deadline=deadline)
+        if not deadline is None:
+            heapq.heappush(self.__deadlines, (deadline.expires_at,
+                                              next(self.__deadline_sequence),
+                                              call))
+        self.__queue.append(call)
+        self.__dispatch()
+        return call
+
+    def __expire_calls(self):
+        # Fails the queued calls and calls in flight whose deadline has
+        # expired. Calls in flight lose their connection.
+        now = time.time()
+        while self.__deadlines and self.__deadlines[0][0] <= now:
+            call = heapq.heappop(self.__deadlines)[2]
+            if call.done:
+                continue
+            exc = RequestTimeout('The request deadline has expired.')
+            channel = self.__in_flight.get(call)
+            if not channel is None:
+                channel.abort(exc)
+            elif call in self.__queue:
+                self.__queue.remove(call)
+                call.set_fault(exc)
+
+    def __dispatch(self):
+        while self.__queue:
+            if self.__idle_channels:
+                channel = self.__idle_channels.pop()
+            elif self.__channel_count < self.max_concurrency:
+                channel = _HttpChannel(self, self.__address,
+                                       self.__ssl_context, self.__socket_map)
+                self.__channel_count += 1
+            else:
+                break
+            call = self.__queue.popleft()
+            try:
+                request = self.__create_request(call)
+            except Exception as exc: # pylint: disable=W0703
+                self.__idle_channels.append(channel)
+                call.set_fault(exc)
+                continue
+            self.__in_flight[call] = channel
+            channel.start(call, request)
+
+    def _channel_completed(self, channel, call, response, keep_alive):
+        """
+        Is invoked by the channels after a response has been received.
+        """
+        self.__in_flight.pop(call, None)
+        if keep_alive:
+            self.__idle_channels.append(channel)
+        else:
+            channel.discard()
+        if response.status != 200:
+            call.set_fault(ProtocolError(self.__url, response.status,
+                                         response.reason, response.headers))
+        else:
+            try:
+                result = response.get_result()
+            except Exception as exc: # pylint: disable=W0703
+                call.set_fault(exc)
+            else:
+                call.set_result(result[0])
+        self.__dispatch()
+
+    def _channel_failed(self, channel, call, exc, may_retry):
+        """
+        Is invoked by the channels if a connection is lost or fails.
+        """
+        channel.discard()
+        if not call is None:
+            self.__in_flight.pop(call, None)
+            if may_retry:
+                self.__queue.appendleft(call)
+            else:
+                call.set_fault(exc)
+        self.__dispatch()
+
+    def _channel_closed(self, channel):
+        """
+        Is invoked by the channels after they have been closed.
+        """
+        self.__channel_count -= 1
+        if channel in self.__idle_channels:
+            self.__idle_channels.remove(channel)
+
+    def __create_request_head(self, host, port, handler, auth):
+        lines = ['POST %s HTTP/1.1' % (handler),
+                 'Host: %s:%s' % (host, port),
+                 'User-Agent: %s' % (xmlrpclib.Transport.user_agent),
+                 'Content-Type: text/xml']
+        if auth:
+            credentials = base64.b64encode(urllib.unquote(auth))
+            lines.append('Authorization: Basic %s' % (credentials))
+        return '\r\n'.join(lines) + '\r\n'
+
+    def __create_request(self, call):
+        # Returns an iterator over the request chunks (attachment streams
+        # are encoded while the request is sent).
+        body = create_request_body(call.method_name, tuple(call.args))
+        head = '%sContent-Length: %i\r\n\r\n' % (self.__request_head,
+                                                  len(body))
+        if isinstance(body, str):
+            return iter([head + body])
+        return chain([head], body)
+
+
+class _AttachmentContentFetcher(object):
+    """
+    Fetches attachment contents concurrently while bounding the total size
+    of the attachments in flight.
+    """
+
+    def __init__(self, client, ticket_id, result_call, max_bytes):
+        self.__client = client
+        self.__ticket_id = ticket_id
+        self.__result_call = result_call
+        self.__max_bytes = max_bytes
+        self.__attachments = None
+        self.__waiting = deque()
+        self.__in_flight_bytes = 0
+        self.__remaining_count = 0
+
+    def start(self, list_call):
+        if not list_call.fault is None:
+            self.__result_call.set_fault(list_call.fault)
+            return
+        self.__attachments = list_call.result()
+        self.__waiting.extend(self.__attachments)
+        self.__remaining_count = len(self.__attachments)
+        if self.__remaining_count == 0:
+            self.__result_call.set_result(self.__attachments)
+        else:
+            self.__submit()
+
+    def __submit(self):
+        while self.__waiting:
+            size = self.__get_size(self.__waiting[0])
+            if self.__in_flight_bytes > 0 and \
+                        self.__in_flight_bytes + size > self.__max_bytes:
+                break
+            att = self.__waiting.popleft()
+            self.__in_flight_bytes += size
+            call = self.__client.get_attachment(self.__ticket_id,
+                                                att.file_name)
+            call.add_done_callback(
+                    lambda call, att=att: self.__store_content(att, call))
+
+    def __store_content(self, att, content_call):
+        self.__in_flight_bytes -= self.__get_size(att)
+        if self.__result_call.done:
+            return
+        if not content_call.fault is None:
+            self.__waiting.clear()
+            self.__result_call.set_fault(content_call.fault)
+            return
+        att.content = content_call.result()
+        self.__remaining_count -= 1
+        if self.__remaining_count == 0:
+            self.__result_call.set_result(self.__attachments)
+        else:
+            self.__submit()
+
+    def __get_size(self, att):
+        if att.size is None:
+            return self.__max_bytes
+        return att.size
+
+
+class _HttpResponse(object):
+    """
+    Incremental HTTP/1.1 response reader feeding the body into an XML-RPC
+    parser.
+    """
+
+    def __init__(self):
+        self.status = None
+        self.reason = None
+        self.headers = dict()
+        self.is_complete = False
+        self.will_close = False
+        self.received_bytes = 0
+        self.__buffer = ''
+        self.__has_headers = False
+        self.__content_length = None
+        self.__is_chunked = False
+        self.__chunk_remaining = None
+        self.__is_in_trailer = False
+        self.__parser = None
+        self.__unmarshaller = None
+
+    def feed(self, data):
+        self.received_bytes += len(data)
+        self.__buffer += data
+        if not self.__has_headers:
+            end = self.__buffer.find('\r\n\r\n')
+            if end < 0:
+                return
+            self.__read_headers(self.__buffer[:end])
+            self.__buffer = self.__buffer[end + 4:]
+        if self.__is_chunked:
+            self.__read_chunks()
+        elif self.__content_length is None:
+            self.__consume(self.__buffer)
+            self.__buffer = ''
+        else:
+            data = self.__buffer[:self.__content_length]
+            self.__buffer = ''
+            self.__content_length -= len(data)
+            self.__consume(data)
+            if self.__content_length == 0:
+                self.is_complete = True
+
+    def feed_eof(self):
+        """
+        Completes responses delimited by the end of the connection.
+        """
+        if self.__has_headers and not self.__is_chunked and \
+                                        self.__content_length is None:
+            self.is_complete = True
+        return self.is_complete
+
+    def get_result(self):
+        self.__parser.close()
+        return self.__unmarshaller.close()
+
+    def __read_headers(self, head):
+        lines = head.split('\r\n')
+        version, status, reason = (lines[0].split(' ', 2) + [''])[:3]
+        self.status = int(status)
+        self.reason = reason
+        for line in lines[1:]:
+            name, value = line.split(':', 1)
+            self.headers[name.strip().lower()] = value.strip()
+        connection = self.headers.get('connection', '').lower()
+        self.will_close = connection == 'close' or \
+                          (version == 'HTTP/1.0' and connection != 'keep-alive')
+        if 'chunked' in self.headers.get('transfer-encoding', '').lower():
+            self.__is_chunked = True
+        elif 'content-length' in self.headers:
+            self.__content_length = int(self.headers['content-length'])
+            if self.__content_length == 0:
+                self.is_complete = True
+        else:
+            self.will_close = True
+        if self.status == 200:
+            self.__parser, self.__unmarshaller = xmlrpclib.getparser()
+        self.__has_headers = True
+
+    def __read_chunks(self):
+        while not self.is_complete:
+            if self.__chunk_remaining is None:
+                end = self.__buffer.find('\r\n')
+                if end < 0:
+                    return
+                line = self.__buffer[:end]
+                self.__buffer = self.__buffer[end + 2:]
+                if self.__is_in_trailer:
+                    if line == '':
+                        self.is_complete = True
+                    continue
+                size = int(line.split(';', 1)[0], 16)
+                if size == 0:
+                    self.__is_in_trailer = True
+                else:
+                    self.__chunk_remaining = size
+            elif self.__chunk_remaining > 0:
+                if not self.__buffer:
+                    return
+                data = self.__buffer[:self.__chunk_remaining]
+                self.__buffer = self.__buffer[len(data):]
+                self.__chunk_remaining -= len(data)
+                self.__consume(data)
+            else:
+                # Skip the line break terminating the chunk data.
+                if len(self.__buffer) < 2:
+                    return
+                self.__buffer = self.__buffer[2:]
+                self.__chunk_remaining = None
+
+    def __consume(self, data):
+        if data and not self.__parser is None:
+            self.__parser.feed(data)
+
+
+class _HttpChannel(asyncore.dispatcher):
+    """
+    A kept-alive (optionally TLS-wrapped) connection processing one
+    request at a time.
+    """
+
+    READ_SIZE = 65536
+
+    def __init__(self, client, address, ssl_context, socket_map):
+        asyncore.dispatcher.__init__(self, map=socket_map)
+        self.__client = client
+        self.__ssl_context = ssl_context
+        self.__host = address[0]
+        self.__call = None
+        self.__response = None
+        self.__out_buffer = ''
+        self.__out_chunks = None
+        self.__served_count = 0
+        self.__is_handshaking = False
+        self.__wants_write = False
+        self.__is_discarded = False
+        self.create_socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.connect(address)
+
+    def start(self, call, request):
+        self.__call = call
+        self.__response = _HttpResponse()
+        self.__out_buffer = ''
+        self.__out_chunks = request
+        if self.connected and not self.__is_handshaking:
+            self.__flush()
+
+    def discard(self):
+        if not self.__is_discarded:
+            self.__is_discarded = True
+            self.close()
+            self.__client._channel_closed(self) # pylint: disable=W0212
+
+    def abort(self, exc):
+        call = self.__call
+        self.__call = None
+        self.__client._channel_failed(self, call, exc, False) # pylint: disable=W0212
+
+    def readable(self):
+        return True
+
+    def writable(self):
+        if not self.connected:
+            return True
+        if self.__is_handshaking:
+            return self.__wants_write
+        return bool(self.__out_buffer) or not self.__out_chunks is None
+
+    def handle_connect(self):
+        if not self.__ssl_context is None:
+            self.socket = self.__ssl_context.wrap_socket(self.socket,
+                                    server_hostname=self.__host,
+                                    do_handshake_on_connect=False)
+            self.__is_handshaking = True
+            self.__handshake()
+
+    def handle_write(self):
+        if self.__is_handshaking:
+            self.__handshake()
+        else:
+            self.__flush()
+
+    def handle_read(self):
+        if self.__is_handshaking:
+            self.__handshake()
+            return
+        while True:
+            try:
+                data = self.recv(self.READ_SIZE)
+            except socket.error as exc:
+                if self.__is_ssl_retry_error(exc):
+                    return
+                raise
+            if not data:
+                return # Connection closed, handled by handle_close.
+            if self.__call is None:
+                # Unsolicited data, the connection cannot be reused.
+                self.__fail(socket.error(errno.EPROTO,
+                                         'Unexpected data from server.'))
+                return
+            self.__response.feed(data)
+            if self.__response.is_complete:
+                self.__complete()
+                return
+            if self.__ssl_context is None or not self.socket.pending():
+                return
+
+    def handle_close(self):
+        if not self.__response is None and self.__response.feed_eof():
+            self.__complete(keep_alive=False)
+            return
+        err = self.socket.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        if err:
+            exc = socket.error(err, errno.errorcode.get(err, str(err)))
+        else:
+            exc = socket.error(errno.ECONNRESET,
+                               'Connection closed by server.')
+        self.__fail(exc)
+
+    def handle_error(self):
+        self.__fail(sys.exc_info()[1])
+
+    def __fail(self, exc):
+        call = self.__call
+        may_retry = self.__served_count > 0 and \
+                    not self.__response is None and \
+                    self.__response.received_bytes == 0
+        self.__call = None
+        self.__response = None
+        self.__client._channel_failed(self, call, exc, may_retry) # pylint: disable=W0212
+
+    def __complete(self, keep_alive=True):
+        call = self.__call
+        response = self.__response
+        self.__call = None
+        self.__response = None
+        self.__served_count += 1
+        keep_alive = keep_alive and not response.will_close
+        self.__client._channel_completed(self, call, response, keep_alive) # pylint: disable=W0212
+
+    def __flush(self):
+        while True:
+            if not self.__out_buffer:
+                if self.__out_chunks is None:
+                    return
+                try:
+                    self.__out_buffer = next(self.__out_chunks)
+                except StopIteration:
+                    self.__out_chunks = None
+                    return
+            try:
+                sent = self.send(self.__out_buffer[:self.READ_SIZE])
+            except socket.error as exc:
+                if self.__is_ssl_retry_error(exc):
+                    return
+                raise
+            if not sent:
+                return
+            self.__out_buffer = self.__out_buffer[sent:]
+
+    def __handshake(self):
+        try:
+            self.socket.do_handshake()
+        except ssl.SSLError as exc:
+            if exc.args[0] == ssl.SSL_ERROR_WANT_READ:
+                self.__wants_write = False
+                return
+            elif exc.args[0] == ssl.SSL_ERROR_WANT_WRITE:
+                self.__wants_write = True
+                return
+            raise
+        self.__is_handshaking = False
+        self.__flush()
+
+    def __is_ssl_retry_error(self, exc):
+        return not ssl is None and isinstance(exc, ssl.SSLError) and \
+            exc.args[0] in (ssl.SSL_ERROR_WANT_READ, ssl.SSL_ERROR_WANT_WRITE)
+
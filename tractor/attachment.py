@@ -5,13 +5,17 @@ See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
 Created on Jan 06, 2012.
 """
 
+from .archive import ZipArchiveBuilder
 from StringIO import StringIO
 from xmlrpclib import Binary
-import zipfile
+import base64
+import os
+import zlib
 
 __docformat__ = 'reStructuredText en'
 __all__ = ['AttachmentWrapper',
-           'Base64Converter']
+           'Base64Converter',
+           'Base64Stream']
 
 
 class AttachmentWrapper(object):
@@ -27,14 +31,32 @@ class AttachmentWrapper(object):
     def __init__(self, content, file_name, description,
                  size=None,
                  author=None,
-                 time=None):
+                 time=None,
+                 file_path=None,
+                 compression_level=zlib.Z_DEFAULT_COMPRESSION,
+                 compression_policy=None):
 
         #: The content can either be a string, a stream or dictionary
         #: with file names as keys and streams or contents as values.
         #: If you use a dictionary, the attachment wil be converted
-        #: into a zip archive.
+        #: into a zip archive. File objects are streamed upon upload
+        #: (without loading them into memory).
         self.content = content
 
+        #: The path of a file to be streamed upon upload (alternative to
+        #: :attr:`content`).
+        self.file_path = file_path
+
+        #: The zlib compression level (0 - 9) for zip archives created from
+        #: dictionary contents.
+        self.compression_level = compression_level
+
+        #: Decides which members of zip archives created from dictionary
+        #: contents are deflated (see
+        #: :class:`tractor.archive.CompressionPolicy`). By default, members
+        #: that are compressed already are stored.
+        self.compression_policy = compression_policy
+
         #: The name of the file or zip archive in the trac.
         self.file_name = file_name
 
@@ -65,13 +87,34 @@ class AttachmentWrapper(object):
                                 content=None)
         return attachment
 
+    @classmethod
+    def create_from_file(cls, file_path, description, file_name=None):
+        """
+        Creates an attachment wrapper for a file that shall be streamed
+        upon upload.
+
+        :param file_name: The name of the file in the trac. If you do not
+            pass a file name, the base name of the path is used.
+        """
+        if file_name is None:
+            file_name = os.path.basename(file_path)
+        return AttachmentWrapper(content=None, file_name=file_name,
+                                 description=description,
+                                 size=os.path.getsize(file_path),
+                                 file_path=file_path)
+
     def get_base64_data_for_upload(self):
         """
-        Returns a base64-encoded string for the file upload.
+        Returns a base64-encoded string for the file upload. File paths and
+        file objects are returned as :class:`Base64Stream` to be encoded
+        while the request is sent.
 
         :raise TypeError: If the content is an unsupported data type.
         """
-        if isinstance(self.content, StringIO):
+        if self.content is None and not self.file_path is None:
+            return Base64Converter.encode_file(self.file_path)
+
+        elif isinstance(self.content, StringIO):
             return Base64Converter.encode_stream(self.content)
 
         elif isinstance(self.content, basestring):
@@ -79,20 +122,20 @@ class AttachmentWrapper(object):
 
         elif isinstance(self.content, dict):
 
-            zip_stream = StringIO()
-            archive = zipfile.ZipFile(zip_stream, 'a', zipfile.ZIP_DEFLATED,
-                                      False)
+            builder = ZipArchiveBuilder(
+                                    compression_level=self.compression_level,
+                                    compression_policy=self.compression_policy)
+            archive_file = builder.build(self.content)
+            archive_file.seek(0, os.SEEK_END)
+            is_spilled = archive_file.tell() > builder.spool_threshold
+            archive_file.seek(0)
+            # Archives spilled to disk are encoded during the upload.
+            if is_spilled:
+                return Base64Converter.encode_file(archive_file)
+            return Base64Converter.encode_stream(archive_file)
 
-            for file_name, f_content in self.content.iteritems():
-                if isinstance(f_content, StringIO):
-                    archive.writestr(file_name, f_content.read())
-                else:
-                    archive.writestr(file_name, f_content)
-            # A permission issue.
-            for zfile in archive.filelist: zfile.create_system = 0
-            archive.close()
-
-            return Base64Converter.encode_zip_stream(zip_stream)
+        elif hasattr(self.content, 'read') and hasattr(self.content, 'seek'):
+            return Base64Converter.encode_file(self.content)
 
         else:
             raise TypeError('Unsupported data type "%s".' \
@@ -137,6 +180,14 @@ class Base64Converter(object):
         zip_stream.seek(0)
         return cls.encode_string(zip_stream.getvalue())
 
+    @classmethod
+    def encode_file(cls, file_path_or_object):
+        """
+        Returns a :class:`Base64Stream` encoding the given file (passed as
+        path or seekable file object) on demand.
+        """
+        return Base64Stream(file_path_or_object)
+
     @classmethod
     def decode_to_string(cls, base64_data):
         """
@@ -153,3 +204,96 @@ class Base64Converter(object):
         stream.seek(0)
         return stream
 
+
+class Base64Stream(object):
+    """
+    Lazily base64-encoded file content for streamed uploads.
+
+    The file is read in chunks while the request is sent, so the memory
+    consumption does not depend on the file size. File objects are encoded
+    from their current position on. Iterating the stream again (e.g. for
+    a resent request) restarts at this position.
+    """
+
+    #: The number of raw bytes encoded at a time (a multiple of 3, so the
+    #: encoded chunks can be concatenated).
+    CHUNK_SIZE = 3 * 64 * 1024
+
+    __slots__ = ('__file_path', '__file', '__start', '__size')
+
+    def __init__(self, file_path_or_object):
+        """
+        Constructor.
+
+        :param file_path_or_object: A file path or a seekable file object.
+        """
+        if isinstance(file_path_or_object, basestring):
+            self.__file_path = file_path_or_object
+            self.__file = None
+            self.__start = 0
+            self.__size = os.path.getsize(file_path_or_object)
+        else:
+            self.__file_path = None
+            self.__file = file_path_or_object
+            self.__start = file_path_or_object.tell()
+            file_path_or_object.seek(0, os.SEEK_END)
+            self.__size = file_path_or_object.tell() - self.__start
+            file_path_or_object.seek(self.__start)
+
+    @property
+    def size(self):
+        """
+        The number of (decoded) bytes.
+        """
+        return self.__size
+
+    @property
+    def encoded_size(self):
+        """
+        The length of the base64-encoded content.
+        """
+        return (self.__size + 2) // 3 * 4
+
+    @property
+    def data(self):
+        """
+        The decoded content (loads the whole file into memory; meant for
+        in-process connections only).
+        """
+        stream = self.__open()
+        try:
+            return stream.read(self.__size)
+        finally:
+            self.__close(stream)
+
+    def __iter__(self):
+        """
+        Yields the base64-encoded content chunk by chunk.
+        """
+        stream = self.__open()
+        try:
+            remaining = self.__size
+            while remaining > 0:
+                chunk = stream.read(min(self.CHUNK_SIZE, remaining))
+                if not chunk:
+                    raise IOError('The file has been truncated during the '
+                                  'upload.')
+                remaining -= len(chunk)
+                yield base64.b64encode(chunk)
+        finally:
+            self.__close(stream)
+
+    def __open(self):
+        if self.__file is None:
+            return open(self.__file_path, 'rb')
+        self.__file.seek(self.__start)
+        return self.__file
+
+    def __close(self, stream):
+        if not stream is self.__file:
+            stream.close()
+
+    def __repr__(self):
+        str_format = '<%s, size: %s>'
+        params = (self.__class__.__name__, self.__size)
+        return str_format % params
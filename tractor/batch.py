@@ -0,0 +1,196 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+__docformat__ = 'reStructuredText en'
+__all__ = ['Batch',
+           'PendingCall',
+           'DEFAULT_CHUNK_SIZE']
+
+
+#: The default maximum number of calls submitted in one multicall request.
+DEFAULT_CHUNK_SIZE = 100
+
+
+class PendingCall(object):
+    """
+    A future-like handle for a request that has been queued but whose result
+    is not known yet.
+
+    The raw trac return value is passed through the converter of the call,
+    so the handle resolves to the same value the single-call API method
+    would return (e.g. a :class:`tractor.ticket.TicketWrapper`).
+    """
+
+    def __init__(self, method_name, args, converter=None, resolver=None,
+                 deadline=None):
+        """
+        Constructor.
+
+        :param converter: Converts the raw trac return value. If you do not
+            pass a converter, the raw value is used as result.
+        :param resolver: Is invoked without arguments if the result is
+            requested before the call has been submitted (e.g. the flush
+            method of the batch the call belongs to).
+        :param deadline: The deadline of the call.
+        :type deadline: :class:`tractor.deadline.Deadline`
+        """
+        #: The name of the XML-RPC method.
+        self.method_name = method_name
+        #: The arguments for the XML-RPC method.
+        self.args = args
+        #: The exception (usually a :class:`xmlrpclib.Fault`) raised for
+        #: this call - *None* as long as the call has not failed.
+        self.fault = None
+        #: The :class:`tractor.deadline.Deadline` the call must be completed
+        #: by (*None* for no deadline).
+        self.deadline = deadline
+
+        self.__converter = converter
+        self.__resolver = resolver
+        self.__value = None
+        self.__is_done = False
+        self.__callbacks = []
+
+    @property
+    def done(self):
+        """
+        Indicates whether the call has been completed (successfully or not).
+        """
+        return self.__is_done
+
+    def set_result(self, trac_value):
+        """
+        Completes the call with the given raw trac return value.
+        """
+        try:
+            if self.__converter is None:
+                self.__value = trac_value
+            else:
+                self.__value = self.__converter(trac_value)
+        except Exception as exc: # pylint: disable=W0703
+            self.fault = exc
+        self.__complete()
+
+    def set_fault(self, fault):
+        """
+        Completes the call with the given exception.
+        """
+        self.fault = fault
+        self.__complete()
+
+    def add_done_callback(self, callback):
+        """
+        Registers a callback that is invoked with the call as only argument
+        as soon as the call is completed. If the call has already been
+        completed, the callback is invoked immediately.
+        """
+        if self.__is_done:
+            callback(self)
+        else:
+            self.__callbacks.append(callback)
+
+    def result(self):
+        """
+        Returns the converted result of the call. Submits the call first,
+        if this has not happened yet.
+
+        :raises: The exception stored in :attr:`fault` if the call has failed.
+        :raises ValueError: If the call cannot be resolved.
+        """
+        if not self.__is_done and not self.__resolver is None:
+            self.__resolver()
+        if not self.__is_done:
+            raise ValueError('The call has not been submitted yet.')
+        if not self.fault is None:
+            raise self.fault
+        return self.__value
+
+    def __complete(self):
+        self.__is_done = True
+        callbacks = self.__callbacks
+        self.__callbacks = []
+        for callback in callbacks:
+            callback(self)
+
+    def __repr__(self):
+        str_format = '<%s, method: %s, done: %s>'
+        params = (self.__class__.__name__, self.method_name, self.__is_done)
+        return str_format % params
+
+
+class Batch(object):
+    """
+    Queues API calls and submits them as chunked *system.multicall*
+    requests.
+
+    Batches are created by :func:`tractor.api.TractorApi.batch`. The queue is
+    submitted as soon as it reaches the chunk size, when the batch context
+    is left or when the result of a pending call is requested. If the batch
+    context is left with an exception, the queued calls fail with it.
+    """
+
+    def __init__(self, multicall_function, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Constructor.
+
+        :param multicall_function: Submits a list of :class:`PendingCall`
+            objects as one request and completes them.
+        :param chunk_size: The maximum number of calls per multicall request.
+        :type chunk_size: :class:`int`
+        """
+        if chunk_size < 1:
+            raise ValueError('The chunk size must be a positive number!')
+
+        #: The maximum number of calls per multicall request.
+        self.chunk_size = chunk_size
+        #: All calls of this batch that have failed so far.
+        self.failed_calls = []
+
+        self.__multicall_function = multicall_function
+        self.__queue = []
+
+    def add(self, method_name, args, converter=None, deadline=None):
+        """
+        Queues a call and returns its :class:`PendingCall` handle.
+        """
+        call = PendingCall(method_name, args, converter=converter,
+                           resolver=self.flush, deadline=deadline)
+        call.add_done_callback(self.__record_failure)
+        self.__queue.append(call)
+        if len(self.__queue) >= self.chunk_size:
+            self.flush()
+        return call
+
+    def flush(self):
+        """
+        Submits all queued calls.
+        """
+        while self.__queue:
+            chunk = self.__queue[:self.chunk_size]
+            del self.__queue[:self.chunk_size]
+            self.__multicall_function(chunk)
+
+    def abort(self, fault):
+        """
+        Fails all queued calls with the given exception without submitting
+        them.
+        """
+        queue = self.__queue
+        self.__queue = []
+        for call in queue:
+            call.set_fault(fault)
+
+    @property
+    def pending_count(self):
+        """
+        The number of calls that have not been submitted yet.
+        """
+        return len(self.__queue)
+
+    def __record_failure(self, call):
+        if not call.fault is None:
+            self.failed_calls.append(call)
@@ -0,0 +1,511 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from .api import DummyTractor
+from .api import Tractor
+from .attachment import AttachmentWrapper
+from .server import DummyTracServer
+from .ticket import TicketWrapper
+from functools import partial
+from threading import Lock
+from threading import Thread
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+__docformat__ = 'reStructuredText en'
+__all__ = ['BACKENDS',
+           'BENCHMARK_NAMES',
+           'BenchmarkResult',
+           'BenchmarkSuite',
+           'compare_results',
+           'load_results',
+           'main',
+           'write_results']
+
+
+#: The benchmarked API operations.
+BENCHMARK_NAMES = ('create_ticket', 'get_ticket', 'update_ticket',
+                   'close_ticket', 'add_attachment',
+                   'get_all_ticket_attachments')
+
+#: The benchmarks depending on the attachment size.
+ATTACHMENT_BENCHMARK_NAMES = frozenset(['add_attachment',
+                                        'get_all_ticket_attachments'])
+
+#: The APIs the benchmarks are run against: the :class:`DummyTractor` (no
+#: marshalling, no network) and the :class:`Tractor` talking to a local
+#: :class:`tractor.server.DummyTracServer`.
+BACKENDS = ('dummy', 'http')
+
+#: The version of the result file format.
+RESULT_FORMAT_VERSION = 1
+
+
+class BenchmarkResult(object):
+    """
+    The latencies of one benchmark run.
+    """
+
+    def __init__(self, name, backend, ticket_count, attachment_size,
+                 concurrency, latencies, duration):
+        """
+        Constructor.
+
+        :param name: The benchmark name (see :const:`BENCHMARK_NAMES`).
+        :param backend: The backend name (see :const:`BACKENDS`).
+        :param ticket_count: The number of operations.
+        :param attachment_size: The attachment size in bytes (*None* for
+            benchmarks without attachments).
+        :param concurrency: The number of threads.
+        :param latencies: The latencies of all operations in seconds.
+        :param duration: The wall-clock time of all operations in seconds.
+        """
+        #: The benchmark name.
+        self.name = name
+        #: The backend name.
+        self.backend = backend
+        #: The number of operations.
+        self.ticket_count = ticket_count
+        #: The attachment size in bytes.
+        self.attachment_size = attachment_size
+        #: The number of threads.
+        self.concurrency = concurrency
+        #: The sorted latencies of all operations in seconds.
+        self.latencies = sorted(latencies)
+        #: The wall-clock time of all operations in seconds.
+        self.duration = duration
+
+    @property
+    def key(self):
+        """
+        Identifies the benchmark configuration (for comparisons).
+        """
+        return get_result_key(self.to_dict())
+
+    @property
+    def operations_per_second(self):
+        """
+        The throughput.
+        """
+        if self.duration <= 0:
+            return 0.0
+        return len(self.latencies) / self.duration
+
+    @property
+    def mean_latency(self):
+        """
+        The average latency in seconds.
+        """
+        if not self.latencies:
+            return 0.0
+        return sum(self.latencies) / len(self.latencies)
+
+    def get_percentile(self, share):
+        """
+        Returns the latency below which the given share (0 to 1) of the
+        operations completed (nearest rank).
+        """
+        if not self.latencies:
+            return 0.0
+        index = min(len(self.latencies) - 1,
+                    max(0, int(round(share * len(self.latencies))) - 1))
+        return self.latencies[index]
+
+    def to_dict(self):
+        """
+        Returns the result as (JSON serializable) dictionary.
+        """
+        return dict(name=self.name, backend=self.backend,
+                    ticket_count=self.ticket_count,
+                    attachment_size=self.attachment_size,
+                    concurrency=self.concurrency,
+                    operations=len(self.latencies),
+                    duration=self.duration,
+                    operations_per_second=self.operations_per_second,
+                    mean_latency=self.mean_latency,
+                    p50_latency=self.get_percentile(0.5),
+                    p95_latency=self.get_percentile(0.95),
+                    max_latency=self.get_percentile(1))
+
+    def __repr__(self):
+        str_format = '<%s %s (%s, %i tickets, %s bytes, %i threads), ' \
+                     'mean: %.2f ms>'
+        params = (self.__class__.__name__, self.name, self.backend,
+                  self.ticket_count, self.attachment_size, self.concurrency,
+                  self.mean_latency * 1000)
+        return str_format % params
+
+
+class BenchmarkSuite(object):
+    """
+    Measures the :class:`tractor.api.TractorApi` operations for all
+    combinations of the given backends, ticket counts, attachment sizes
+    (attachment benchmarks only) and concurrency levels::
+
+        suite = BenchmarkSuite(ticket_counts=(100,), concurrency_levels=(1,))
+        write_results(suite.run(), 'before.json')
+
+    Each benchmark prepares its tickets first and then times one operation
+    per ticket. Concurrent operations share one API with a connection pool.
+    Since the dummy trac is not thread-safe, the dummy backend only runs
+    with a concurrency of 1.
+    """
+
+    def __init__(self, names=BENCHMARK_NAMES, backends=BACKENDS,
+                 ticket_counts=(10, 100), attachment_sizes=(1024, 262144),
+                 concurrency_levels=(1, 4), server_options=None):
+        """
+        Constructor.
+
+        :param names: The names of the benchmarks to run.
+        :param backends: The backends to run the benchmarks against.
+        :param ticket_counts: The numbers of operations per run.
+        :param attachment_sizes: The attachment sizes in bytes.
+        :param concurrency_levels: The numbers of threads.
+        :param server_options: Keyword arguments for the
+            :class:`tractor.server.DummyTracServer` (e.g. a latency or a
+            bandwidth limit).
+        :type server_options: :class:`dict`
+        :raises ValueError: For unknown benchmark or backend names.
+        """
+        for name in names:
+            if not name in BENCHMARK_NAMES:
+                raise ValueError('Unknown benchmark "%s".' % (name))
+        for backend in backends:
+            if not backend in BACKENDS:
+                raise ValueError('Unknown backend "%s".' % (backend))
+        #: The names of the benchmarks to run.
+        self.names = tuple(names)
+        #: The backends to run the benchmarks against.
+        self.backends = tuple(backends)
+        #: The numbers of operations per run.
+        self.ticket_counts = tuple(ticket_counts)
+        #: The attachment sizes in bytes.
+        self.attachment_sizes = tuple(attachment_sizes)
+        #: The numbers of threads.
+        self.concurrency_levels = tuple(concurrency_levels)
+        #: Keyword arguments for the local server.
+        self.server_options = server_options or dict()
+        self.__server = None
+
+    @property
+    def settings(self):
+        """
+        The suite settings (as stored in result files).
+        """
+        return dict(names=list(self.names), backends=list(self.backends),
+                    ticket_counts=list(self.ticket_counts),
+                    attachment_sizes=list(self.attachment_sizes),
+                    concurrency_levels=list(self.concurrency_levels),
+                    server_options=self.server_options)
+
+    def run(self, callback=None):
+        """
+        Runs all benchmarks and returns a list of :class:`BenchmarkResult`
+        objects.
+
+        :param callback: Is invoked with each result (e.g. to report
+            progress).
+        """
+        results = []
+        if 'http' in self.backends:
+            self.__server = DummyTracServer(**self.server_options)
+            self.__server.start()
+        try:
+            for backend in self.backends:
+                for run_args in self.__get_runs(backend):
+                    result = self.run_benchmark(*run_args)
+                    results.append(result)
+                    if not callback is None:
+                        callback(result)
+        finally:
+            if not self.__server is None:
+                self.__server.stop()
+                self.__server = None
+        return results
+
+    def run_benchmark(self, name, backend, ticket_count, attachment_size,
+                      concurrency):
+        """
+        Runs one benchmark and returns its :class:`BenchmarkResult`. The
+        local server must be running for the HTTP backend (see :func:`run`).
+        """
+        api = self.__create_api(backend, concurrency)
+        prepare = getattr(self, '_prepare_%s' % (name))
+        operations = prepare(api, ticket_count, attachment_size)
+        latencies, duration = self.__execute(operations, concurrency)
+        return BenchmarkResult(name, backend, ticket_count, attachment_size,
+                               concurrency, latencies, duration)
+
+    def _prepare_create_ticket(self, api, ticket_count, attachment_size): # pylint: disable=W0613
+        return [partial(api.create_ticket,
+                        TicketWrapper(summary='Benchmark ticket %i' % (i),
+                                      description='Created by a benchmark.'))
+                for i in range(ticket_count)]
+
+    def _prepare_get_ticket(self, api, ticket_count, attachment_size): # pylint: disable=W0613
+        return [partial(api.get_ticket, ticket_id)
+                for ticket_id in self.__create_tickets(api, ticket_count)]
+
+    def _prepare_update_ticket(self, api, ticket_count, attachment_size): # pylint: disable=W0613
+        tickets = [api.get_ticket(ticket_id) for ticket_id
+                   in self.__create_tickets(api, ticket_count)]
+        for ticket in tickets:
+            ticket.summary = 'Updated benchmark ticket %i' % (ticket.ticket_id)
+        return [partial(api.update_ticket, ticket,
+                        comment='Updated by a benchmark.')
+                for ticket in tickets]
+
+    def _prepare_close_ticket(self, api, ticket_count, attachment_size): # pylint: disable=W0613
+        return [partial(api.close_ticket, ticket_id, 'fixed')
+                for ticket_id in self.__create_tickets(api, ticket_count)]
+
+    def _prepare_add_attachment(self, api, ticket_count, attachment_size):
+        attachment = self.__create_attachment(attachment_size)
+        return [partial(api.add_attachment, ticket_id, attachment)
+                for ticket_id in self.__create_tickets(api, ticket_count)]
+
+    def _prepare_get_all_ticket_attachments(self, api, ticket_count,
+                                            attachment_size):
+        attachment = self.__create_attachment(attachment_size)
+        ticket_ids = self.__create_tickets(api, ticket_count)
+        for ticket_id in ticket_ids:
+            api.add_attachment(ticket_id, attachment)
+        return [partial(api.get_all_ticket_attachments, ticket_id,
+                        fetch_content=True)
+                for ticket_id in ticket_ids]
+
+    def __get_runs(self, backend):
+        for name in self.names:
+            if name in ATTACHMENT_BENCHMARK_NAMES:
+                attachment_sizes = self.attachment_sizes
+            else:
+                attachment_sizes = (None,)
+            for ticket_count in self.ticket_counts:
+                for attachment_size in attachment_sizes:
+                    for concurrency in self.concurrency_levels:
+                        if backend == 'dummy' and concurrency > 1:
+                            continue
+                        yield (name, backend, ticket_count, attachment_size,
+                               concurrency)
+
+    def __create_api(self, backend, concurrency):
+        if backend == 'dummy':
+            return DummyTractor('http://localhost/benchmark/login/xmlrpc',
+                                'benchmark_user', 'pw')
+        return Tractor(self.__server.address, 'benchmark_user', 'pw',
+                       pool_size=concurrency)
+
+    @staticmethod
+    def __create_tickets(api, ticket_count):
+        with api.batch():
+            calls = [api.create_ticket(TicketWrapper(
+                                    summary='Benchmark ticket %i' % (i),
+                                    description='Created by a benchmark.'))
+                     for i in range(ticket_count)]
+        return [call.result() for call in calls]
+
+    @staticmethod
+    def __create_attachment(attachment_size):
+        # Random data is neither compressible nor cheap to encode.
+        return AttachmentWrapper(content=os.urandom(attachment_size),
+                                 file_name='benchmark.bin',
+                                 description='Benchmark attachment.')
+
+    @staticmethod
+    def __execute(operations, concurrency):
+        latencies = []
+        errors = []
+        operation_iterator = iter(operations)
+        lock = Lock()
+        def work():
+            while True:
+                with lock:
+                    operation = next(operation_iterator, None)
+                if operation is None or errors:
+                    break
+                start_time = time.time()
+                try:
+                    operation()
+                except Exception as exc: # pylint: disable=W0703
+                    errors.append(exc)
+                    break
+                latencies.append(time.time() - start_time)
+        start_time = time.time()
+        if concurrency == 1:
+            work()
+        else:
+            threads = [Thread(target=work) for _ in range(concurrency)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        duration = time.time() - start_time
+        if errors:
+            raise errors[0]
+        return latencies, duration
+
+    def __repr__(self):
+        str_format = '<%s, benchmarks: %s, backends: %s>'
+        params = (self.__class__.__name__, ', '.join(self.names),
+                  ', '.join(self.backends))
+        return str_format % params
+
+
+def get_result_key(result_map):
+    """
+    Returns the tuple identifying the configuration of the given result
+    dictionary.
+    """
+    return (result_map['name'], result_map['backend'],
+            result_map['ticket_count'], result_map['attachment_size'],
+            result_map['concurrency'])
+
+
+def write_results(results, path, settings=None):
+    """
+    Writes the given :class:`BenchmarkResult` objects to a JSON file
+    (together with information about the environment).
+    """
+    state = dict(format=RESULT_FORMAT_VERSION, created_at=time.time(),
+                 python=sys.version.split()[0],
+                 platform=platform.platform(), settings=settings or dict(),
+                 results=[result.to_dict() for result in results])
+    with open(path, 'wb') as fp:
+        json.dump(state, fp, indent=2, sort_keys=True)
+
+
+def load_results(path):
+    """
+    Reads a result file and returns the list of result dictionaries.
+
+    :raises ValueError: For unsupported file formats.
+    """
+    with open(path, 'rb') as fp:
+        state = json.load(fp)
+    if state.get('format') != RESULT_FORMAT_VERSION:
+        raise ValueError('Unsupported benchmark result format: %s.'
+                         % (state.get('format')))
+    return state['results']
+
+
+def compare_results(baseline_results, results):
+    """
+    Compares the mean latencies of results with equal configurations.
+
+    :param baseline_results: The result dictionaries of the earlier run.
+    :param results: The result dictionaries of the current run.
+    :return: A list of (key, baseline mean, current mean, relative change)
+        tuples (a change of -0.2 means 20 % faster).
+    """
+    baseline_map = dict([(get_result_key(result_map), result_map)
+                         for result_map in baseline_results])
+    comparisons = []
+    for result_map in results:
+        key = get_result_key(result_map)
+        baseline_map_entry = baseline_map.get(key)
+        if baseline_map_entry is None:
+            continue
+        baseline_mean = baseline_map_entry['mean_latency']
+        mean = result_map['mean_latency']
+        if baseline_mean > 0:
+            change = (mean - baseline_mean) / baseline_mean
+        else:
+            change = 0.0
+        comparisons.append((key, baseline_mean, mean, change))
+    return comparisons
+
+
+def format_results(results):
+    """
+    Returns a table of the given result dictionaries.
+    """
+    lines = ['%-27s %-6s %7s %9s %4s %10s %10s %10s'
+             % ('benchmark', 'api', 'tickets', 'bytes', 'thr', 'ops/s',
+                'mean ms', 'p95 ms')]
+    for result_map in results:
+        lines.append('%-27s %-6s %7i %9s %4i %10.1f %10.2f %10.2f'
+                     % (result_map['name'], result_map['backend'],
+                        result_map['ticket_count'],
+                        result_map['attachment_size'] or '-',
+                        result_map['concurrency'],
+                        result_map['operations_per_second'],
+                        result_map['mean_latency'] * 1000,
+                        result_map['p95_latency'] * 1000))
+    return '\n'.join(lines)
+
+
+def format_comparison(comparisons):
+    """
+    Returns a table of the given comparisons (see :func:`compare_results`).
+    """
+    lines = ['%-27s %-6s %7s %9s %4s %10s %10s %8s'
+             % ('benchmark', 'api', 'tickets', 'bytes', 'thr', 'before ms',
+                'after ms', 'change')]
+    for key, baseline_mean, mean, change in comparisons:
+        name, backend, ticket_count, attachment_size, concurrency = key
+        lines.append('%-27s %-6s %7i %9s %4i %10.2f %10.2f %+7.1f%%'
+                     % (name, backend, ticket_count, attachment_size or '-',
+                        concurrency, baseline_mean * 1000, mean * 1000,
+                        change * 100))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    """
+    Runs the benchmark suite from the command line::
+
+        python -m tractor.benchmark --output after.json --compare before.json
+    """
+    parser = argparse.ArgumentParser(description='Benchmarks the tractor '
+                                                 'API operations.')
+    parser.add_argument('--benchmark', action='append', choices=BENCHMARK_NAMES,
+                        help='benchmark to run (may be repeated; default: '
+                             'all)')
+    parser.add_argument('--backend', action='append', choices=BACKENDS,
+                        help='API to benchmark (may be repeated; default: '
+                             'all)')
+    parser.add_argument('--tickets', default='10,100',
+                        help='comma-separated ticket counts')
+    parser.add_argument('--attachment-sizes', default='1024,262144',
+                        help='comma-separated attachment sizes in bytes')
+    parser.add_argument('--concurrency', default='1,4',
+                        help='comma-separated numbers of threads')
+    parser.add_argument('--latency', type=float, default=0,
+                        help='latency of the local server in seconds')
+    parser.add_argument('--bandwidth', type=int, default=None,
+                        help='bandwidth of the local server in bytes per '
+                             'second')
+    parser.add_argument('--output', default='tractor-benchmark.json',
+                        help='result file')
+    parser.add_argument('--compare', default=None,
+                        help='result file of an earlier run')
+    args = parser.parse_args(argv)
+    parse_ints = lambda text: [int(value) for value in text.split(',')]
+    suite = BenchmarkSuite(names=args.benchmark or BENCHMARK_NAMES,
+                           backends=args.backend or BACKENDS,
+                           ticket_counts=parse_ints(args.tickets),
+                           attachment_sizes=parse_ints(args.attachment_sizes),
+                           concurrency_levels=parse_ints(args.concurrency),
+                           server_options=dict(latency=args.latency,
+                                               bandwidth=args.bandwidth))
+    results = suite.run()
+    write_results(results, args.output, settings=suite.settings)
+    result_maps = [result.to_dict() for result in results]
+    print format_results(result_maps)
+    if not args.compare is None:
+        print
+        print format_comparison(compare_results(load_results(args.compare),
+                                                result_maps))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from .feed import to_datetime
+from collections import OrderedDict
+from datetime import datetime
+from datetime import timedelta
+from threading import Lock
+import copy
+import time
+
+__docformat__ = 'reStructuredText en'
+__all__ = ['DEFAULT_CACHE_SIZE',
+           'DEFAULT_CACHE_TTL',
+           'TicketCache']
+
+
+#: The default maximum number of cached tickets.
+DEFAULT_CACHE_SIZE = 1000
+
+#: The default number of seconds after which cached tickets are revalidated.
+DEFAULT_CACHE_TTL = 300
+
+#: The default maximum difference (seconds) between the client and the trac
+#: clock assumed for revalidations.
+DEFAULT_CLOCK_SKEW = 60
+
+
+class TicketCache(object):
+    """
+    A thread-safe cache for :class:`TicketWrapper` objects with
+    least-recently-used eviction.
+
+    The cache is bounded by the number of tickets, not by their memory
+    footprint: measuring the size of nested Python objects is expensive
+    and imprecise, and tickets are small apart from long descriptions
+    (attachments are not cached). Choose the maximum size with the
+    typical ticket size in mind.
+
+    Entries expire after the time-to-live. Expired entries are not simply
+    dropped but revalidated: a single *ticket.getRecentChanges* request
+    reports which of them have changed in the trac since they were
+    validated (the trac change times are compared, which is much cheaper
+    than refetching the tickets). Unchanged entries are kept for another
+    time-to-live period, changed entries are evicted.
+
+    The cache hands out copies, so modifying a returned ticket does not
+    alter the cache.
+    """
+
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE, ttl=DEFAULT_CACHE_TTL,
+                 clock_skew=DEFAULT_CLOCK_SKEW):
+        """
+        Constructor.
+
+        :param max_size: The maximum number of cached tickets (the ticket
+            count is limited, not the memory).
+        :type max_size: :class:`int`
+        :param ttl: The number of seconds after which entries are
+            revalidated.
+        :type ttl: :class:`float`
+        :param clock_skew: The maximum difference (seconds) between the
+            client and the trac clock.
+        :type clock_skew: :class:`float`
+        """
+        if max_size < 1:
+            raise ValueError('The cache size must be a positive number!')
+
+        #: The maximum number of cached tickets.
+        self.max_size = max_size
+        #: The number of seconds after which entries are revalidated.
+        self.ttl = ttl
+        #: The maximum difference between the client and the trac clock.
+        self.clock_skew = clock_skew
+
+        self.__entries = OrderedDict()
+        self.__lock = Lock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__revalidations = 0
+
+    def __len__(self):
+        return len(self.__entries)
+
+    @property
+    def statistics(self):
+        """
+        A dictionary with the cache statistics (*hits*, *misses*,
+        *hit_ratio*, *evictions*, *revalidations* and *size*).
+        """
+        with self.__lock:
+            lookups = self.__hits + self.__misses
+            if lookups > 0:
+                hit_ratio = float(self.__hits) / lookups
+            else:
+                hit_ratio = 0.0
+            return dict(hits=self.__hits, misses=self.__misses,
+                        hit_ratio=hit_ratio, evictions=self.__evictions,
+                        revalidations=self.__revalidations,
+                        size=len(self.__entries))
+
+    def get(self, ticket_id, get_recent_changes=None):
+        """
+        Returns a copy of the cached ticket (or *None* if the ticket is not
+        cached or has changed).
+
+        :param get_recent_changes: Is invoked with a (UTC)
+            :class:`datetime.datetime` and must return the IDs of the
+            tickets changed since then. If the ticket has expired, all
+            expired entries are revalidated with it. Without function,
+            expired entries are treated as missing.
+        """
+        with self.__lock:
+            entry = self.__entries.get(ticket_id)
+            is_expired = not entry is None and entry.is_expired(self.ttl)
+        if is_expired:
+            if get_recent_changes is None:
+                self.invalidate(ticket_id)
+            else:
+                self.revalidate(get_recent_changes)
+        with self.__lock:
+            entry = self.__entries.get(ticket_id)
+            if entry is None:
+                self.__misses += 1
+                return None
+            self.__hits += 1
+            del self.__entries[ticket_id]
+            self.__entries[ticket_id] = entry
+            return copy.copy(entry.ticket)
+
+    def put(self, ticket):
+        """
+        Caches (a copy of) the ticket. Tickets with an older change time
+        than the cached version are ignored.
+        """
+        with self.__lock:
+            entry = self.__entries.pop(ticket.ticket_id, None)
+            if not entry is None and self.__is_older(ticket, entry.ticket):
+                self.__entries[ticket.ticket_id] = entry
+                return
+            self.__entries[ticket.ticket_id] = _CacheEntry(copy.copy(ticket))
+            while len(self.__entries) > self.max_size:
+                self.__entries.popitem(last=False)
+                self.__evictions += 1
+
+    @staticmethod
+    def __is_older(ticket, cached_ticket):
+        if ticket.changetime is None or cached_ticket.changetime is None:
+            return False
+        return to_datetime(ticket.changetime) < \
+               to_datetime(cached_ticket.changetime)
+
+    def invalidate(self, ticket_id):
+        """
+        Removes a ticket from the cache.
+        """
+        with self.__lock:
+            self.__entries.pop(ticket_id, None)
+
+    def clear(self):
+        """
+        Removes all tickets from the cache.
+        """
+        with self.__lock:
+            self.__entries.clear()
+
+    def revalidate(self, get_recent_changes):
+        """
+        Revalidates all expired entries with one *get_recent_changes*
+        invocation (see :func:`get`).
+        """
+        with self.__lock:
+            expired = [(ticket_id, entry) for ticket_id, entry
+                       in self.__entries.iteritems()
+                       if entry.is_expired(self.ttl)]
+        if not expired:
+            return
+        revalidation_time = datetime.utcnow()
+        since = min([entry.validation_time for _, entry in expired]) \
+                - timedelta(seconds=self.clock_skew)
+        changed_ids = set(get_recent_changes(since))
+        with self.__lock:
+            self.__revalidations += 1
+            for ticket_id, entry in expired:
+                if not self.__entries.get(ticket_id) is entry:
+                    continue # Replaced in the meantime.
+                if ticket_id in changed_ids:
+                    del self.__entries[ticket_id]
+                else:
+                    entry.renew(revalidation_time)
+
+
+class _CacheEntry(object):
+    """
+    A cached ticket along with its validation times.
+    """
+
+    def __init__(self, ticket):
+        self.ticket = ticket
+        self.validation_time = None
+        self.__validated_at = None
+        self.renew(datetime.utcnow())
+
+    def renew(self, validation_time):
+        # The UTC validation time is used for the revalidation queries, the
+        # local time stamp for the expiration.
+        self.validation_time = validation_time
+        self.__validated_at = time.time()
+
+    def is_expired(self, ttl):
+        return not ttl is None and time.time() - self.__validated_at > ttl
@@ -0,0 +1,94 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+import time
+
+__docformat__ = 'reStructuredText en'
+__all__ = ['Deadline',
+           'RequestTimeout']
+
+
+class RequestTimeout(Exception):
+    """
+    Is raised if a request is not completed within its deadline or within
+    the connect or read timeout of the transport.
+    """
+
+
+class Deadline(object):
+    """
+    A point in time by which a request (or a group of requests) must be
+    completed.
+
+    Deadlines are set with :func:`tractor.api.TractorApi.deadline`. Each
+    request only gets the time that remains until the deadline.
+    """
+
+    def __init__(self, timeout):
+        """
+        Constructor.
+
+        :param timeout: The number of seconds from now on.
+        :type timeout: :class:`float`
+        """
+        #: The time (as returned by :func:`time.time`) the deadline expires.
+        self.expires_at = time.time() + timeout
+
+    @classmethod
+    def get_earliest(cls, deadlines):
+        """
+        Returns the earliest of the given deadlines (*None* entries are
+        ignored, *None* is returned if there are no deadlines).
+        """
+        earliest = None
+        for deadline in deadlines:
+            if deadline is None:
+                continue
+            if earliest is None or deadline.expires_at < earliest.expires_at:
+                earliest = deadline
+        return earliest
+
+    @property
+    def remaining(self):
+        """
+        The number of seconds until the deadline (0 if it has expired).
+        """
+        return max(self.expires_at - time.time(), 0.0)
+
+    @property
+    def is_expired(self):
+        """
+        Indicates whether the deadline has expired.
+        """
+        return time.time() >= self.expires_at
+
+    def check(self):
+        """
+        :raises RequestTimeout: If the deadline has expired.
+        """
+        if self.is_expired:
+            raise RequestTimeout('The request deadline has expired.')
+
+    def get_timeout(self, timeout=None):
+        """
+        Returns the remaining number of seconds, limited by the given
+        timeout.
+
+        :param timeout: The upper limit (*None* for no limit).
+        :raises RequestTimeout: If the deadline has expired.
+        """
+        remaining = self.expires_at - time.time()
+        if remaining <= 0:
+            raise RequestTimeout('The request deadline has expired.')
+        if timeout is None:
+            return remaining
+        return min(remaining, timeout)
+
+    def __repr__(self):
+        str_format = '<%s, remaining: %.3f s>'
+        params = (self.__class__.__name__, self.remaining)
+        return str_format % params
@@ -7,7 +7,10 @@ Created on Jan 06, 2012.
 
 from .attachment import AttachmentWrapper
 from .attachment import Base64Converter
+from .feed import to_datetime
 from .ticket import ATTRIBUTE_NAMES
+from .ticket import ATTRIBUTE_OPTIONS
+from .ticket import DescriptionAttribute
 from .ticket import TicketWrapper
 from datetime import datetime
 from xmlrpclib import Fault
@@ -15,9 +18,11 @@ from xmlrpclib import ProtocolError
 
 __docformat__ = 'reStructuredText en'
 __all__ = ['DummyConnection',
+           'DummySystem',
            'DummyTrac',
            'DummyTicket',
            'DummyAttachment',
+           'DummyTicketEnum',
            'DUMMY_TRAC',
            'INVALID_USER',
            'GET_ONLY_USER',
@@ -25,6 +30,23 @@ __all__ = ['DummyConnection',
            'INVALID_REALM']
 
 
+#: The milestones of the dummy trac.
+DUMMY_MILESTONES = ['milestone1', 'milestone2', 'milestone3', 'milestone4']
+
+#: The components of the dummy trac (including the default component).
+DUMMY_COMPONENTS = ['Other', 'component1', 'component2']
+
+#: The versions of the dummy trac.
+DUMMY_VERSIONS = ['1.0', '2.0']
+
+#: The custom ticket field definitions of the dummy trac.
+DUMMY_CUSTOM_FIELDS = [dict(name='platform', type='select', label='Platform',
+                            options=['linux', 'windows'], value='',
+                            optional=True, custom=True, order=1),
+                       dict(name='estimate', type='text', label='Estimate',
+                            value='', custom=True, order=2)]
+
+
 class DummyConnection(object):
     """
     A dummy connection for testing purposes.
@@ -38,6 +60,41 @@ class DummyConnection(object):
         self.ticket.get_only = get_only
         self.ticket.is_valid_connection = is_valid_connection
         self.ticket.url = url
+        self.system = DummySystem(self)
+
+
+class DummySystem(object):
+    """
+    Fakes the XML-RPC introspection namespace (*system*) of a trac.
+    """
+
+    def __init__(self, connection):
+        """
+        Constructor.
+
+        :param connection: The connection the method names are resolved
+            against.
+        """
+        self.__connection = connection
+
+    def multicall(self, signatures):
+        """
+        Fakes a multicall. Each call result is either wrapped in a list or,
+        in case of failure, replaced by a fault map.
+        """
+        results = []
+        for signature in signatures:
+            meth = self.__connection
+            for item in signature['methodName'].split('.'):
+                meth = getattr(meth, item)
+            try:
+                result = meth(*signature['params'])
+            except Fault as fault:
+                results.append(dict(faultCode=fault.faultCode,
+                                    faultString=fault.faultString))
+            else:
+                results.append([result])
+        return results
 
 
 class DummyTrac(object):
@@ -52,6 +109,13 @@ class DummyTrac(object):
         self.ticket_counter = 0
         self.__ticket_map = dict()
 
+        #: The *ticket.milestone* namespace.
+        self.milestone = DummyTicketEnum(DUMMY_MILESTONES)
+        #: The *ticket.component* namespace.
+        self.component = DummyTicketEnum(DUMMY_COMPONENTS)
+        #: The *ticket.version* namespace.
+        self.version = DummyTicketEnum(DUMMY_VERSIONS)
+
         self.is_valid_connection = None # Is set by the connection
         self.get_only = None # Is set by the the connection
         self.url = None # Is set be the connection
@@ -154,7 +218,7 @@ class DummyTrac(object):
         ticket.comments.append(comment)
         for attr_name, attr_value in attributes.iteritems():
             setattr(ticket, attr_name, attr_value)
-        ticket.changetime = datetime.now()
+        ticket.changetime = datetime.utcnow()
 
         return ticket.get_trac_data_tuple()
 
@@ -174,6 +238,115 @@ class DummyTrac(object):
         del self.__ticket_map[ticket_id]
         return 0
 
+    def query(self, qstr='status!=closed'):
+        """
+        Fakes a ticket query. Supports (pipe-separated) \"=\" and \"!=\"
+        conditions as well as the \"max\" (default: 100, 0 for no limit)
+        and \"page\" parameters. The IDs are returned in ascending order.
+        """
+        self.__has_valid_connection(needs_extended_permissions=False)
+        meth_name = 'ticket.query()'
+
+        if qstr is None:
+            raise TypeError('cannot marshal None unless allow_none is enabled')
+
+        conditions = []
+        max_count = 100
+        page = 1
+        for constraint in qstr.split('&'):
+            if not constraint:
+                continue
+            if not '=' in constraint:
+                self.__raise_fault(meth_name,
+                                   'Invalid query constraint "%s"' \
+                                   % (constraint))
+            attr_name, value = constraint.split('=', 1)
+            if attr_name == 'max':
+                max_count = int(value)
+            elif attr_name == 'page':
+                page = int(value)
+            elif attr_name == 'order':
+                continue
+            elif attr_name.endswith('!'):
+                conditions.append((attr_name[:-1], value.split('|'), False))
+            else:
+                conditions.append((attr_name, value.split('|'), True))
+
+        ticket_ids = []
+        for ticket_id in sorted(self.__ticket_map.keys()):
+            ticket = self.__ticket_map[ticket_id]
+            is_match = True
+            for attr_name, values, is_positive in conditions:
+                if attr_name == 'id':
+                    ticket_value = str(ticket_id)
+                else:
+                    ticket_value = getattr(ticket, attr_name, None)
+                    if ticket_value is None:
+                        ticket_value = ''
+                if (ticket_value in values) != is_positive:
+                    is_match = False
+                    break
+            if is_match:
+                ticket_ids.append(ticket_id)
+
+        if max_count > 0:
+            start = (page - 1) * max_count
+            if page > 1 and start >= len(ticket_ids):
+                self.__raise_fault(meth_name, 'Page %i is beyond the number '
+                                   'of pages in the query' % (page))
+            ticket_ids = ticket_ids[start:start + max_count]
+        return ticket_ids
+
+    def getRecentChanges(self, since):
+        """
+        Fakes the retrieval of the IDs of the tickets changed since the
+        given (UTC) time.
+        """
+        self.__has_valid_connection(needs_extended_permissions=False)
+
+        if since is None:
+            raise TypeError('cannot marshal None unless allow_none is enabled')
+
+        since = to_datetime(since)
+        return [ticket_id for ticket_id in sorted(self.__ticket_map.keys())
+                if self.__ticket_map[ticket_id].changetime >= since]
+
+    def getTicketFields(self):
+        """
+        Fakes the retrieval of the ticket field definitions (derived from
+        the default attribute lookups plus the dummy custom fields).
+        """
+        self.__has_valid_connection(needs_extended_permissions=False)
+
+        enums = dict(milestone=DUMMY_MILESTONES, component=DUMMY_COMPONENTS,
+                     version=DUMMY_VERSIONS)
+        fields = []
+        for attr_name in sorted(ATTRIBUTE_NAMES.keys()):
+            attr_cls = ATTRIBUTE_NAMES[attr_name]
+            field = dict(name=attr_name, label=attr_name.capitalize(),
+                         value=getattr(attr_cls, 'DEFAULT_VALUE', None) or '')
+            options_cls = ATTRIBUTE_OPTIONS[attr_name]
+            if attr_name in enums:
+                options = enums[attr_name]
+            elif not options_cls is None:
+                options = [value for value in options_cls.ALL
+                           if not value is None]
+            else:
+                options = None
+            if not options is None:
+                field.update(type='select', options=options,
+                             optional=attr_cls.IS_OPTIONAL)
+            elif attr_name == DescriptionAttribute.NAME:
+                field['type'] = 'textarea'
+            else:
+                field['type'] = 'text'
+            fields.append(field)
+        fields.extend([dict(name='time', type='time', label='Created'),
+                       dict(name='changetime', type='time',
+                            label='Modified')])
+        fields.extend([dict(field) for field in DUMMY_CUSTOM_FIELDS])
+        return fields
+
     def putAttachment(self, ticket_id, file_name, description, base64_data,
                       replace_existing):
         """
@@ -274,13 +447,14 @@ class DummyTicket(TicketWrapper):
     """
 
     def __init__(self, ticket_id, **kw):
-        TicketWrapper.__init__(self, ticket_id=ticket_id, **kw)
+        # The keywords may contain custom fields.
+        TicketWrapper.__init__(self, ticket_id=ticket_id)
 
         for attr_name, attr_value in kw.iteritems():
             attr_value = attr_value.strip()
             setattr(self, attr_name, attr_value)
 
-        self.time = datetime.now()
+        self.time = datetime.utcnow()
         self.changetime = self.time
 
         self.comments = []
@@ -299,7 +473,7 @@ class DummyTicket(TicketWrapper):
                 self.__file_name_map[fn] += 1
                 new_fn = fn + '.%i' % (self.__file_name_map[fn])
                 attachment.file_name = new_fn
-                attachment.time = datetime.now()
+                attachment.time = datetime.utcnow()
 
         self.__attachment_map[attachment.file_name] = attachment
         self.comments.append(attachment.description)
@@ -345,10 +519,35 @@ class DummyTicket(TicketWrapper):
             if value is None:
                 value = ''
             attributes[attr_name] = value
+        # Unlike a real trac, only custom fields with a value are returned.
+        for field in DUMMY_CUSTOM_FIELDS:
+            value = getattr(self, field['name'], None)
+            if not value is None:
+                attributes[field['name']] = value
         return (self.ticket_id, self.time, self.changetime,
                 attributes)
 
 
+class DummyTicketEnum(object):
+    """
+    Fakes a trac ticket enum namespace (e.g. *ticket.milestone*).
+    """
+
+    def __init__(self, names):
+        """
+        Constructor.
+
+        :param names: The names of the enum values.
+        """
+        self.__names = names
+
+    def getAll(self):
+        """
+        Returns the names of all enum values.
+        """
+        return list(self.__names)
+
+
 class DummyAttachment(AttachmentWrapper):
 
     def __init__(self, **kw):
@@ -356,7 +555,7 @@ class DummyAttachment(AttachmentWrapper):
 
         for attr_name, attr_value in kw.iteritems():
             setattr(self, attr_name, attr_value)
-        self.time = datetime.now()
+        self.time = datetime.utcnow()
         if not self.content is None:
             self.size = len(self.content)
 
@@ -17,6 +17,11 @@ __all__ = ['TractorConfig'
            'make_api']
 
 
+#: Transport settings of the :class:`Tractor` that do not apply to the
+#: :class:`DummyTractor` (they are ignored when the dummy is loaded).
+TRANSPORT_KEYS = ['max_idle_time', 'connect_timeout', 'read_timeout']
+
+
 class TractorConfig(object):
     """
     Custom config parser for tractor configurations.
@@ -24,7 +29,18 @@ class TractorConfig(object):
 
     BASE_KEYS = ['realm', 'username', 'password']
     REQUIRED_KEYS = set(BASE_KEYS)
-    KEYS = set(BASE_KEYS + ['load_dummy'])
+    KEYS = set(BASE_KEYS + ['load_dummy', 'pool_size', 'pool_timeout',
+                            'max_idle_time', 'cache_size', 'cache_ttl',
+                            'schema_file', 'schema_ttl', 'connect_timeout',
+                            'read_timeout', 'rate_limit', 'rate_burst',
+                            'max_in_flight', 'target_latency'])
+    #: Converters for settings that are not strings.
+    CONVERTERS = dict(pool_size=int, pool_timeout=float,
+                      max_idle_time=float, cache_size=int,
+                      cache_ttl=float, schema_ttl=float,
+                      connect_timeout=float, read_timeout=float,
+                      rate_limit=float, rate_burst=int, max_in_flight=int,
+                      target_latency=float)
 
     def __init__(self):
         self.settings = {}
@@ -50,6 +66,8 @@ class TractorConfig(object):
                     continue
                 if key in self.REQUIRED_KEYS:
                     found_req_keys.append(key)
+                if key in self.CONVERTERS:
+                    value = self.CONVERTERS[key](value)
                 self.settings[key] = value
             #
             if invalid_keys:
@@ -88,6 +106,8 @@ def make_api(**settings):
         load_dummy = False
 
     if load_dummy:
+        for key in TRANSPORT_KEYS:
+            settings.pop(key, None)
         return DummyTractor(**settings)
     else:
         return Tractor(**settings)
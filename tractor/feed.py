@@ -0,0 +1,233 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from .batch import DEFAULT_CHUNK_SIZE
+from .fileutils import replace_file
+from datetime import datetime
+from xmlrpclib import DateTime
+from xmlrpclib import Fault
+import json
+import os
+import time
+
+__docformat__ = 'reStructuredText en'
+__all__ = ['ChangeFeed',
+           'is_not_found_fault',
+           'to_datetime']
+
+
+#: The format of the persisted high-water mark.
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+
+#: The fault code trac reports for missing resources.
+NOT_FOUND_FAULT_CODE = 404
+
+
+def to_datetime(value):
+    """
+    Converts an XML-RPC :class:`xmlrpclib.DateTime` into a
+    :class:`datetime.datetime` (other values are returned unchanged).
+    """
+    if isinstance(value, DateTime):
+        return datetime.strptime(value.value, '%Y%m%dT%H:%M:%S')
+    return value
+
+
+def is_not_found_fault(exc):
+    """
+    Checks whether the given exception is a fault reporting a resource
+    (e.g. a ticket) that does not exist.
+    """
+    return isinstance(exc, Fault) and \
+           (exc.faultCode == NOT_FOUND_FAULT_CODE or
+            'does not exist' in str(exc.faultString))
+
+
+class ChangeFeed(object):
+    """
+    Delivers the tickets changed in the trac, based on polling
+    *ticket.getRecentChanges*.
+
+    The changed tickets are fetched in *system.multicall* batches and
+    passed to the registered callbacks (see :func:`add_callback`) or
+    yielded by :func:`iter_changes`. The polling interval adapts to the
+    change rate: it is reset to the minimum interval whenever changes are
+    found and doubled (up to the maximum interval) otherwise.
+
+    The feed keeps a high-water mark (the latest change time it has seen).
+    If you pass a state file, the mark is persisted after each poll, so a
+    restarted feed resumes where the previous one stopped. Tickets changed
+    several times between two polls are delivered once (in their latest
+    state); tickets deleted in the meantime are skipped.
+    """
+
+    def __init__(self, api, since=None, state_file=None, min_interval=5,
+                 max_interval=300, batch_size=DEFAULT_CHUNK_SIZE):
+        """
+        Constructor.
+
+        :param api: The (synchronous) API to poll.
+        :type api: :class:`tractor.api.TractorApi`
+        :param since: The (UTC) time to start from, if there is no
+            persisted high-water mark.
+        :type since: :class:`datetime.datetime`
+        :default since: *None* (the current time)
+        :param state_file: The path of the file the high-water mark is
+            persisted in.
+        :param min_interval: The minimum polling interval in seconds.
+        :type min_interval: :class:`float`
+        :param max_interval: The maximum polling interval in seconds.
+        :type max_interval: :class:`float`
+        :param batch_size: The maximum number of tickets fetched per
+            request.
+        :type batch_size: :class:`int`
+        """
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError('Invalid polling intervals!')
+
+        self.__api = api
+        self.__state_file = state_file
+        #: The minimum polling interval in seconds.
+        self.min_interval = min_interval
+        #: The maximum polling interval in seconds.
+        self.max_interval = max_interval
+        #: The maximum number of tickets fetched per request.
+        self.batch_size = batch_size
+        self.__interval = min_interval
+        self.__callbacks = []
+        # The IDs of the tickets delivered with a change time equal to the
+        # high-water mark (trac also reports them for the next poll).
+        self.__seen_ticket_ids = set()
+
+        self.__high_water_mark = None
+        if not state_file is None:
+            self.__load_state()
+        if self.__high_water_mark is None:
+            if since is None:
+                since = datetime.utcnow()
+            self.__high_water_mark = since
+
+    @property
+    def high_water_mark(self):
+        """
+        The change time up to which all changes have been delivered.
+        """
+        return self.__high_water_mark
+
+    @property
+    def interval(self):
+        """
+        The current polling interval in seconds.
+        """
+        return self.__interval
+
+    def add_callback(self, callback):
+        """
+        Registers a callback that is invoked with the
+        :class:`tractor.ticket.TicketWrapper` of each changed ticket.
+        """
+        self.__callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        """
+        Unregisters a callback.
+        """
+        self.__callbacks.remove(callback)
+
+    def poll(self):
+        """
+        Fetches the tickets changed since the high-water mark, invokes the
+        callbacks and advances (and persists) the mark.
+
+        :return: The changed tickets, ordered by change time.
+        :raises xmlrpclib.Fault: If a changed ticket cannot be fetched for
+            another reason than its deletion (the mark is not advanced).
+        """
+        ticket_ids = self.__api.get_recent_changes(self.__high_water_mark)
+        tickets = []
+        for offset in xrange(0, len(ticket_ids), self.batch_size):
+            with self.__api.batch(chunk_size=self.batch_size):
+                calls = [self.__api.get_ticket(ticket_id) for ticket_id
+                         in ticket_ids[offset:offset + self.batch_size]]
+            for call in calls:
+                # Deleted tickets are skipped, other faults must not move
+                # the high-water mark past the ticket.
+                if not is_not_found_fault(call.fault):
+                    tickets.append(call.result())
+
+        high_water_mark = self.__high_water_mark
+        seen_ticket_ids = self.__seen_ticket_ids
+        changes = []
+        for ticket in tickets:
+            changetime = to_datetime(ticket.changetime)
+            if changetime < self.__high_water_mark or \
+                            (changetime == self.__high_water_mark and
+                             ticket.ticket_id in self.__seen_ticket_ids):
+                continue
+            changes.append((changetime, ticket))
+            if changetime > high_water_mark:
+                high_water_mark = changetime
+                seen_ticket_ids = set()
+            if changetime == high_water_mark:
+                seen_ticket_ids.add(ticket.ticket_id)
+        changes.sort(key=lambda change: change[0])
+        tickets = [ticket for _, ticket in changes]
+
+        for ticket in tickets:
+            for callback in self.__callbacks:
+                callback(ticket)
+
+        self.__high_water_mark = high_water_mark
+        self.__seen_ticket_ids = seen_ticket_ids
+        if not self.__state_file is None:
+            self.__save_state()
+        if tickets:
+            self.__interval = self.min_interval
+        else:
+            self.__interval = min(self.__interval * 2, self.max_interval)
+        return tickets
+
+    def iter_changes(self, stop_event=None):
+        """
+        Polls the trac repeatedly (waiting for the current interval between
+        two polls) and yields the changed tickets.
+
+        :param stop_event: Polling stops as soon as this event is set.
+        :type stop_event: :class:`threading.Event`
+        :default stop_event: *None* (poll forever)
+        """
+        while stop_event is None or not stop_event.is_set():
+            for ticket in self.poll():
+                yield ticket
+            if stop_event is None:
+                time.sleep(self.__interval)
+            else:
+                stop_event.wait(self.__interval)
+
+    def run(self, stop_event=None):
+        """
+        Polls the trac repeatedly, delivering the changes to the callbacks
+        (until the stop event is set).
+        """
+        for _ in self.iter_changes(stop_event=stop_event):
+            pass
+
+    def __load_state(self):
+        if not os.path.exists(self.__state_file):
+            return
+        with open(self.__state_file, 'rb') as state_file:
+            state = json.load(state_file)
+        self.__high_water_mark = datetime.strptime(state['high_water_mark'],
+                                                   TIMESTAMP_FORMAT)
+        self.__seen_ticket_ids = set(state['seen_ticket_ids'])
+
+    def __save_state(self):
+        state = dict(high_water_mark=self.__high_water_mark.strftime(
+                                                        TIMESTAMP_FORMAT),
+                     seen_ticket_ids=sorted(self.__seen_ticket_ids))
+        # Replace the file atomically, so a crash cannot corrupt the state.
+        replace_file(self.__state_file, json.dumps(state))
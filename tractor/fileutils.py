@@ -0,0 +1,40 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+import os
+import tempfile
+
+__docformat__ = 'reStructuredText en'
+__all__ = ['replace_file']
+
+
+#: The permissions of replaced files (:func:`tempfile.mkstemp` creates
+#: files only the owner can read).
+REPLACED_FILE_MODE = 0o644
+
+
+def replace_file(path, data):
+    """
+    Replaces the content of the given file atomically: the data is written
+    to a uniquely named temporary file in the same directory that is then
+    renamed. Concurrent readers never see a partially written file and
+    concurrent writers do not interfere (the last rename wins).
+
+    :param data: The new file content.
+    :type data: :class:`str`
+    """
+    directory, file_name = os.path.split(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=file_name + '.', suffix='.tmp',
+                                    dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as fp:
+            fp.write(data)
+        os.chmod(tmp_path, REPLACED_FILE_MODE)
+        os.rename(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
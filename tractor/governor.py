@@ -0,0 +1,283 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from contextlib import contextmanager
+from threading import Condition
+from threading import Lock
+import time
+
+__docformat__ = 'reStructuredText en'
+__all__ = ['RequestGovernor',
+           'configure_governor',
+           'get_governor',
+           'remove_governor']
+
+
+#: The factor the concurrency limit is multiplied with if the response
+#: latency exceeds the target latency.
+DECREASE_FACTOR = 0.5
+
+
+def configure_governor(realm, rate=None, burst=None, max_in_flight=None,
+                       target_latency=None):
+    """
+    Returns the :class:`RequestGovernor` shared by all APIs for the given
+    realm. The governor is created on first use; passing settings for an
+    existing governor reconfigures it.
+    """
+    with _GOVERNORS_LOCK:
+        governor = _GOVERNORS.get(realm)
+        if governor is None:
+            governor = RequestGovernor(rate=rate, burst=burst,
+                                       max_in_flight=max_in_flight,
+                                       target_latency=target_latency)
+            _GOVERNORS[realm] = governor
+        else:
+            governor.configure(rate=rate, burst=burst,
+                               max_in_flight=max_in_flight,
+                               target_latency=target_latency)
+        return governor
+
+
+def get_governor(realm):
+    """
+    Returns the governor for the given realm (*None* if there is none).
+    """
+    return _GOVERNORS.get(realm)
+
+
+def remove_governor(realm):
+    """
+    Removes the governor for the given realm (requests to this realm are
+    no longer limited).
+    """
+    with _GOVERNORS_LOCK:
+        _GOVERNORS.pop(realm, None)
+
+
+class RequestGovernor(object):
+    """
+    Limits the rate and the concurrency of the requests to a trac.
+
+    The rate is limited by a token bucket: each request takes a token,
+    tokens are refilled at the given rate up to the burst size. The
+    number of requests in flight is limited as well. If a target latency is
+    set, the concurrency limit adapts to the response latency (additive
+    increase, multiplicative decrease): it grows by one per round of fast
+    responses up to the maximum and is halved (at most once per round
+    trip) whenever a response takes longer than the target latency. This
+    approaches the highest concurrency the trac sustains without
+    degrading.
+
+    Governors are thread-safe. Use :func:`configure_governor` to share
+    one governor between all APIs for a realm.
+    """
+
+    def __init__(self, rate=None, burst=None, max_in_flight=None,
+                 target_latency=None, min_in_flight=1):
+        """
+        Constructor.
+
+        :param rate: The maximum number of requests per second (*None* for
+            no limit).
+        :type rate: :class:`float`
+        :param burst: The maximum number of requests that may be sent at
+            once after an idle period.
+        :type burst: :class:`int`
+        :default burst: the rate (at least 1)
+        :param max_in_flight: The maximum number of concurrent requests
+            (*None* for no limit).
+        :type max_in_flight: :class:`int`
+        :param target_latency: If you pass a target latency (in seconds),
+            the concurrency limit adapts to the response latency: it moves
+            between *min_in_flight* and *max_in_flight* (so a maximum
+            number of requests in flight is required). The rate is not
+            adapted.
+        :type target_latency: :class:`float`
+        :param min_in_flight: The lower bound for the adaptive concurrency
+            limit.
+        :type min_in_flight: :class:`int`
+        """
+        self.__condition = Condition(Lock())
+        #: The maximum number of requests per second.
+        self.rate = None
+        #: The capacity of the token bucket.
+        self.burst = None
+        #: The upper bound for the (adaptive) concurrency limit.
+        self.max_in_flight = None
+        #: The response latency (seconds) the concurrency limit aims at.
+        self.target_latency = None
+        #: The lower bound for the adaptive concurrency limit.
+        self.min_in_flight = min_in_flight
+        self.__tokens = 0.0
+        self.__refilled_at = time.time()
+        self.__in_flight = 0
+        self.__limit = None
+        self.__last_decrease = 0.0
+        self.__request_count = 0
+        self.__throttled_count = 0
+        self.__decrease_count = 0
+        self.configure(rate=rate, burst=burst, max_in_flight=max_in_flight,
+                       target_latency=target_latency)
+
+    def configure(self, rate=None, burst=None, max_in_flight=None,
+                  target_latency=None):
+        """
+        Changes the limits (see the constructor). Settings passed as *None*
+        are left unchanged.
+
+        :raises ValueError: For non-positive limits and for a target
+            latency without a maximum number of requests in flight.
+        """
+        for value in (rate, burst, max_in_flight, target_latency):
+            if not value is None and value <= 0:
+                raise ValueError('Governor limits must be positive numbers!')
+        if not target_latency is None and max_in_flight is None and \
+                self.max_in_flight is None:
+            raise ValueError('A target latency requires a maximum number ' \
+                             'of requests in flight!')
+        with self.__condition:
+            if not rate is None:
+                self.rate = float(rate)
+            if not burst is None:
+                self.burst = burst
+            elif self.burst is None and not self.rate is None:
+                self.burst = max(1, int(self.rate))
+            if not self.burst is None:
+                if self.__request_count == 0:
+                    self.__tokens = float(self.burst)
+                else:
+                    self.__tokens = min(self.__tokens, self.burst)
+            if not max_in_flight is None:
+                self.max_in_flight = max_in_flight
+                self.__limit = float(max_in_flight)
+            if not target_latency is None:
+                self.target_latency = target_latency
+            self.__condition.notify_all()
+
+    @property
+    def concurrency_limit(self):
+        """
+        The current (adaptive) maximum number of requests in flight (*None*
+        if the concurrency is not limited).
+        """
+        if self.__limit is None:
+            return None
+        return max(self.min_in_flight, int(self.__limit))
+
+    @property
+    def in_flight(self):
+        """
+        The number of requests currently in flight.
+        """
+        return self.__in_flight
+
+    @property
+    def statistics(self):
+        """
+        A dictionary with the number of *requests*, the number of requests
+        that had to wait (*throttled*), the number of limit *decreases*, the
+        current *concurrency_limit* and the requests *in_flight*.
+        """
+        with self.__condition:
+            return dict(requests=self.__request_count,
+                        throttled=self.__throttled_count,
+                        decreases=self.__decrease_count,
+                        concurrency_limit=self.concurrency_limit,
+                        in_flight=self.__in_flight)
+
+    def acquire(self, deadline=None):
+        """
+        Waits until a request may be sent (there is a token and a free slot)
+        and reserves a slot for it.
+
+        :param deadline: The deadline of the request.
+        :type deadline: :class:`tractor.deadline.Deadline`
+        :raises tractor.deadline.RequestTimeout: If the deadline expires
+            while waiting.
+        """
+        with self.__condition:
+            is_throttled = False
+            while True:
+                wait_time = self.__get_wait_time()
+                if wait_time == 0:
+                    break
+                is_throttled = True
+                if not deadline is None:
+                    wait_time = deadline.get_timeout(wait_time)
+                self.__condition.wait(wait_time)
+            if not self.rate is None:
+                self.__tokens -= 1
+            self.__in_flight += 1
+            self.__request_count += 1
+            if is_throttled:
+                self.__throttled_count += 1
+
+    def release(self, latency):
+        """
+        Releases the slot of a completed (or failed) request and adapts
+        the concurrency limit to its latency (in seconds).
+        """
+        with self.__condition:
+            self.__in_flight -= 1
+            if not self.target_latency is None and \
+                    not self.__limit is None:
+                self.__adapt(latency)
+            self.__condition.notify_all()
+
+    @contextmanager
+    def request(self, deadline=None):
+        """
+        Context manager reserving a slot for the duration of one request
+        (see :func:`acquire`).
+        """
+        self.acquire(deadline=deadline)
+        start_time = time.time()
+        try:
+            yield
+        finally:
+            self.release(time.time() - start_time)
+
+    def __get_wait_time(self):
+        # Returns 0 if a request may be sent, otherwise the number of
+        # seconds until the next token is available (None if the request
+        # has to wait for a free slot).
+        if not self.__limit is None and \
+                self.__in_flight >= self.concurrency_limit:
+            return None
+        if self.rate is None:
+            return 0
+        now = time.time()
+        self.__tokens = min(self.burst, self.__tokens +
+                            (now - self.__refilled_at) * self.rate)
+        self.__refilled_at = now
+        if self.__tokens >= 1:
+            return 0
+        return (1 - self.__tokens) / self.rate
+
+    def __adapt(self, latency):
+        if latency > self.target_latency:
+            now = time.time()
+            if now - self.__last_decrease >= latency:
+                self.__limit = max(self.min_in_flight,
+                                   self.__limit * DECREASE_FACTOR)
+                self.__last_decrease = now
+                self.__decrease_count += 1
+        else:
+            self.__limit = min(self.max_in_flight,
+                               self.__limit + 1.0 / self.__limit)
+
+    def __repr__(self):
+        str_format = '<%s, rate: %s, concurrency limit: %s>'
+        params = (self.__class__.__name__, self.rate,
+                  self.concurrency_limit)
+        return str_format % params
+
+
+#: The governors shared by the APIs (mapped onto realms).
+_GOVERNORS = dict()
+_GOVERNORS_LOCK = Lock()
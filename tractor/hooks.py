@@ -0,0 +1,211 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from xmlrpclib import Binary
+
+__docformat__ = 'reStructuredText en'
+__all__ = ['AFTER_RESPONSE',
+           'BEFORE_REQUEST',
+           'EVENT_NAMES',
+           'ON_ERROR',
+           'RequestEvent',
+           'RequestHooks',
+           'summarize_args']
+
+
+#: Is fired before a request is sent.
+BEFORE_REQUEST = 'before_request'
+#: Is fired after a response has been received (and parsed).
+AFTER_RESPONSE = 'after_response'
+#: Is fired if a request has failed (including XML-RPC faults).
+ON_ERROR = 'on_error'
+
+#: All hook event names.
+EVENT_NAMES = (BEFORE_REQUEST, AFTER_RESPONSE, ON_ERROR)
+
+#: The maximum length of the summary of a request argument.
+MAX_ARG_SUMMARY_LENGTH = 80
+
+
+def summarize_args(args, max_length=MAX_ARG_SUMMARY_LENGTH):
+    """
+    Returns a short, single-line summary of the given request arguments
+    (binary data is replaced by its size, long values are truncated).
+    """
+    return '(%s)' % (', '.join([_summarize_arg(arg, max_length)
+                                for arg in args]))
+
+
+def _summarize_arg(arg, max_length):
+    if isinstance(arg, Binary):
+        return '<binary: %i bytes>' % (len(arg.data))
+    if hasattr(arg, 'encoded_size'): # Base64 streams
+        return '<stream: %i bytes>' % (arg.encoded_size)
+    if isinstance(arg, (list, tuple)) and len(arg) > 3:
+        return '<%s: %i items>' % (type(arg).__name__, len(arg))
+    text = repr(arg)
+    if len(text) > max_length:
+        text = text[:max_length - 3] + '...'
+    return text
+
+
+class RequestEvent(object):
+    """
+    Describes one request for the hook callbacks. The same event object is
+    passed to all callbacks of a request, so callbacks can store data (e.g.
+    a tracing span) in the :attr:`context` dictionary when the request is
+    sent and pick it up when the response arrives.
+    """
+
+    __slots__ = ('method_name', 'args', 'started_at', 'latency',
+                 'request_bytes', 'response_bytes', 'error', 'context',
+                 '_args_summary')
+
+    def __init__(self, method_name, args, started_at):
+        #: The XML-RPC method name.
+        self.method_name = method_name
+        #: The request arguments.
+        self.args = args
+        #: The time (as returned by :func:`time.time`) the request has been
+        #: started.
+        self.started_at = started_at
+        #: The duration of the request in seconds (*None* before the
+        #: request is completed).
+        self.latency = None
+        #: The size of the request body (*None* if unknown).
+        self.request_bytes = None
+        #: The size of the response body (*None* if unknown).
+        self.response_bytes = None
+        #: The exception the request has failed with.
+        self.error = None
+        #: Free storage for the callbacks.
+        self.context = dict()
+        self._args_summary = None
+
+    @property
+    def args_summary(self):
+        """
+        A short summary of the request arguments (see
+        :func:`summarize_args`; computed on first access).
+        """
+        if self._args_summary is None:
+            self._args_summary = summarize_args(self.args)
+        return self._args_summary
+
+    def __repr__(self):
+        str_format = '<%s %s%s>'
+        params = (self.__class__.__name__, self.method_name,
+                  self.args_summary)
+        return str_format % params
+
+
+class RequestHooks(object):
+    """
+    Registry for request hook callbacks of an API (see
+    :attr:`tractor.api.TractorApi.hooks`)::
+
+        def log_slow_request(event):
+            if event.latency > 1:
+                print 'slow: %s%s' % (event.method_name, event.args_summary)
+
+        api.hooks.register(AFTER_RESPONSE, log_slow_request)
+
+    Callbacks are invoked with a :class:`RequestEvent` in the thread
+    sending the request. *before_request* callbacks are invoked right
+    before the request is sent (after waiting for the governor and a
+    connection), *after_response* and *on_error* callbacks get the latency
+    and payload sizes as well. Exceptions raised by callbacks are passed on
+    to the caller of the request.
+
+    Without callbacks the hooks cost one attribute check per request.
+    """
+
+    def __init__(self):
+        self.__callbacks = dict([(event_name, ())
+                                 for event_name in EVENT_NAMES])
+        #: Indicates whether there are callbacks.
+        self.is_active = False
+
+    def register(self, event_name, callback):
+        """
+        Registers a callback for the given event (see :const:`EVENT_NAMES`).
+
+        :raises ValueError: For unknown event names.
+        """
+        self.__check_event_name(event_name)
+        # Callback tuples are replaced (instead of changed), so requests
+        # in other threads can iterate them without locking.
+        self.__callbacks[event_name] = \
+                        self.__callbacks[event_name] + (callback,)
+        self.is_active = True
+        return callback
+
+    def unregister(self, event_name, callback):
+        """
+        Removes a callback.
+
+        :raises ValueError: For unknown event names and callbacks.
+        """
+        self.__check_event_name(event_name)
+        callbacks = list(self.__callbacks[event_name])
+        callbacks.remove(callback)
+        self.__callbacks[event_name] = tuple(callbacks)
+        self.is_active = any(self.__callbacks.values())
+
+    def before_request(self, callback):
+        """
+        Registers a *before_request* callback (can be used as decorator).
+        """
+        return self.register(BEFORE_REQUEST, callback)
+
+    def after_response(self, callback):
+        """
+        Registers an *after_response* callback (can be used as decorator).
+        """
+        return self.register(AFTER_RESPONSE, callback)
+
+    def on_error(self, callback):
+        """
+        Registers an *on_error* callback (can be used as decorator).
+        """
+        return self.register(ON_ERROR, callback)
+
+    def get_callbacks(self, event_name):
+        """
+        Returns the callbacks registered for the given event.
+        """
+        self.__check_event_name(event_name)
+        return self.__callbacks[event_name]
+
+    def fire(self, event_name, event):
+        """
+        Invokes the callbacks of the given event with the given
+        :class:`RequestEvent`.
+        """
+        for callback in self.__callbacks[event_name]:
+            callback(event)
+
+    def clear(self):
+        """
+        Removes all callbacks.
+        """
+        for event_name in EVENT_NAMES:
+            self.__callbacks[event_name] = ()
+        self.is_active = False
+
+    def __check_event_name(self, event_name):
+        if not event_name in self.__callbacks:
+            raise ValueError('Unknown hook event "%s" (valid events: %s).'
+                             % (event_name, ', '.join(EVENT_NAMES)))
+
+    def __repr__(self):
+        str_format = '<%s, %s>'
+        params = (self.__class__.__name__,
+                  ', '.join(['%s: %i' % (event_name,
+                                         len(self.__callbacks[event_name]))
+                             for event_name in EVENT_NAMES]))
+        return str_format % params
@@ -0,0 +1,293 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from .fileutils import replace_file
+from bisect import bisect_left
+from threading import Lock
+
+__docformat__ = 'reStructuredText en'
+__all__ = ['DEFAULT_LATENCY_BUCKETS',
+           'ERROR_KINDS',
+           'MethodMetrics',
+           'MetricsSink',
+           'PrometheusExporter',
+           'RequestMetrics']
+
+
+#: The default upper bounds (seconds) of the latency histogram buckets.
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                           2.5, 5.0, 10.0)
+
+#: The kinds of errors reported to metrics sinks: XML-RPC faults, HTTP
+#: errors (:class:`xmlrpclib.ProtocolError`), timeouts
+#: (:class:`tractor.deadline.RequestTimeout`) and other errors (e.g.
+#: socket errors).
+ERROR_KINDS = ('fault', 'protocol_error', 'timeout', 'error')
+
+
+class MetricsSink(object):
+    """
+    Receives a record for each request sent by an API (see the *metrics*
+    parameter of :class:`tractor.api.TractorApi`). Subclasses forward the
+    records to a metrics system; this base class ignores them.
+
+    Sinks may be shared by several APIs and threads.
+    """
+
+    def record_request(self, method_name, latency, request_bytes,
+                       response_bytes, error_kind):
+        """
+        Records one request.
+
+        :param method_name: The XML-RPC method name (batches are recorded
+            as *system.multicall*).
+        :param latency: The duration of the request in seconds.
+        :type latency: :class:`float`
+        :param request_bytes: The size of the request body (*None* if the
+            connection does not report sizes).
+        :param response_bytes: The size of the response body as received
+            (*None* if the connection does not report sizes).
+        :param error_kind: One of the :const:`ERROR_KINDS` (*None* for
+            successful requests).
+        """
+        pass
+
+
+class MethodMetrics(object):
+    """
+    The aggregated metrics of one XML-RPC method.
+    """
+
+    __slots__ = ('method_name', 'request_count', 'error_counts',
+                 'latency_sum', 'bucket_counts', 'request_bytes',
+                 'response_bytes')
+
+    def __init__(self, method_name, bucket_count):
+        #: The XML-RPC method name.
+        self.method_name = method_name
+        #: The number of requests (including failed requests).
+        self.request_count = 0
+        #: Maps error kinds onto the number of failed requests.
+        self.error_counts = dict()
+        #: The total duration of all requests in seconds.
+        self.latency_sum = 0.0
+        #: The number of requests per latency bucket (not cumulative, the
+        #: last entry counts the requests exceeding all bucket bounds).
+        self.bucket_counts = [0] * (bucket_count + 1)
+        #: The total size of all request bodies.
+        self.request_bytes = 0
+        #: The total size of all response bodies.
+        self.response_bytes = 0
+
+    def __copy__(self):
+        metrics = MethodMetrics(self.method_name, 0)
+        metrics.request_count = self.request_count
+        metrics.error_counts = self.error_counts.copy()
+        metrics.latency_sum = self.latency_sum
+        metrics.bucket_counts = list(self.bucket_counts)
+        metrics.request_bytes = self.request_bytes
+        metrics.response_bytes = self.response_bytes
+        return metrics
+
+    def __repr__(self):
+        str_format = '<%s %s, requests: %i, errors: %i>'
+        params = (self.__class__.__name__, self.method_name,
+                  self.request_count, sum(self.error_counts.values()))
+        return str_format % params
+
+
+class RequestMetrics(MetricsSink):
+    """
+    Metrics sink aggregating request counts, error counts, latency
+    histograms and transferred bytes per XML-RPC method in memory (use the
+    :class:`PrometheusExporter` to publish them).
+    """
+
+    def __init__(self, latency_buckets=DEFAULT_LATENCY_BUCKETS):
+        """
+        Constructor.
+
+        :param latency_buckets: The ascending upper bounds (seconds) of the
+            latency histogram buckets.
+        """
+        #: The upper bounds of the latency histogram buckets.
+        self.latency_buckets = tuple(latency_buckets)
+        self.__method_metrics = dict()
+        self.__lock = Lock()
+
+    def record_request(self, method_name, latency, request_bytes,
+                       response_bytes, error_kind):
+        """
+        Adds the request to the metrics of its method.
+        """
+        bucket_index = bisect_left(self.latency_buckets, latency)
+        with self.__lock:
+            metrics = self.__method_metrics.get(method_name)
+            if metrics is None:
+                metrics = MethodMetrics(method_name,
+                                        len(self.latency_buckets))
+                self.__method_metrics[method_name] = metrics
+            metrics.request_count += 1
+            metrics.latency_sum += latency
+            metrics.bucket_counts[bucket_index] += 1
+            if not request_bytes is None:
+                metrics.request_bytes += request_bytes
+            if not response_bytes is None:
+                metrics.response_bytes += response_bytes
+            if not error_kind is None:
+                metrics.error_counts[error_kind] = \
+                            metrics.error_counts.get(error_kind, 0) + 1
+
+    def get_method_metrics(self, method_name):
+        """
+        Returns a copy of the :class:`MethodMetrics` for the given method
+        (*None* if no request has been recorded for it).
+        """
+        with self.__lock:
+            metrics = self.__method_metrics.get(method_name)
+            if metrics is None:
+                return None
+            return metrics.__copy__()
+
+    def get_snapshot(self):
+        """
+        Returns copies of the metrics of all methods (sorted by method
+        name).
+        """
+        with self.__lock:
+            return [self.__method_metrics[method_name].__copy__()
+                    for method_name in sorted(self.__method_metrics)]
+
+    def reset(self):
+        """
+        Discards all recorded metrics.
+        """
+        with self.__lock:
+            self.__method_metrics.clear()
+
+    def __repr__(self):
+        str_format = '<%s, methods: %i>'
+        params = (self.__class__.__name__, len(self.__method_metrics))
+        return str_format % params
+
+
+class PrometheusExporter(object):
+    """
+    Renders :class:`RequestMetrics` in the Prometheus text exposition
+    format (or as OpenMetrics) and writes them to a file for the textfile
+    collector of the node exporter::
+
+        metrics = RequestMetrics()
+        api = make_api(realm=realm, username=username, password=password,
+                       metrics=metrics)
+        exporter = PrometheusExporter(metrics, labels=dict(realm='main'))
+        ...
+        exporter.write('/var/lib/node_exporter/tractor.prom')
+    """
+
+    def __init__(self, metrics, prefix='tractor', labels=None,
+                 openmetrics=False):
+        """
+        Constructor.
+
+        :param metrics: The metrics to export.
+        :type metrics: :class:`RequestMetrics`
+        :param prefix: The prefix of the metric names.
+        :param labels: Constant labels added to all samples (e.g. the
+            realm).
+        :type labels: :class:`dict`
+        :param openmetrics: If *True*, the OpenMetrics format is rendered.
+        :type openmetrics: :class:`bool`
+        """
+        #: The exported metrics.
+        self.metrics = metrics
+        #: The prefix of the metric names.
+        self.prefix = prefix
+        #: Constant labels added to all samples.
+        self.labels = labels or dict()
+        #: Render OpenMetrics instead of the Prometheus text format?
+        self.openmetrics = openmetrics
+
+    def render(self):
+        """
+        Returns the current metrics as text.
+        """
+        snapshot = self.metrics.get_snapshot()
+        lines = []
+        self.__add_counter(lines, 'requests', 'Number of XML-RPC requests.',
+                           [(dict(method=metrics.method_name),
+                             metrics.request_count)
+                            for metrics in snapshot])
+        self.__add_counter(lines, 'request_errors',
+                           'Number of failed XML-RPC requests.',
+                           [(dict(method=metrics.method_name, kind=kind),
+                             metrics.error_counts[kind])
+                            for metrics in snapshot
+                            for kind in sorted(metrics.error_counts)])
+        self.__add_counter(lines, 'request_bytes',
+                           'Size of the XML-RPC request bodies.',
+                           [(dict(method=metrics.method_name),
+                             metrics.request_bytes)
+                            for metrics in snapshot])
+        self.__add_counter(lines, 'response_bytes',
+                           'Size of the XML-RPC response bodies.',
+                           [(dict(method=metrics.method_name),
+                             metrics.response_bytes)
+                            for metrics in snapshot])
+        self.__add_histogram(lines, snapshot)
+        if self.openmetrics:
+            lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """
+        Writes the current metrics to the given file. The file is replaced
+        atomically, so the collector never reads a partially written file.
+        """
+        replace_file(path, self.render())
+
+    def __add_counter(self, lines, name, help_text, samples):
+        name = '%s_%s' % (self.prefix, name)
+        if self.openmetrics:
+            lines.append('# HELP %s %s' % (name, help_text))
+            lines.append('# TYPE %s counter' % (name))
+        else:
+            lines.append('# HELP %s_total %s' % (name, help_text))
+            lines.append('# TYPE %s_total counter' % (name))
+        for labels, value in samples:
+            lines.append('%s_total%s %s' % (name, self.__format_labels(labels),
+                                            value))
+
+    def __add_histogram(self, lines, snapshot):
+        name = '%s_request_duration_seconds' % (self.prefix)
+        lines.append('# HELP %s Duration of the XML-RPC requests.' % (name))
+        lines.append('# TYPE %s histogram' % (name))
+        bounds = [repr(float(bound))
+                  for bound in self.metrics.latency_buckets] + ['+Inf']
+        for metrics in snapshot:
+            count = 0
+            for bound, bucket_count in zip(bounds, metrics.bucket_counts):
+                count += bucket_count
+                labels = dict(method=metrics.method_name, le=bound)
+                lines.append('%s_bucket%s %i'
+                             % (name, self.__format_labels(labels), count))
+            labels = self.__format_labels(dict(method=metrics.method_name))
+            lines.append('%s_sum%s %r' % (name, labels, metrics.latency_sum))
+            lines.append('%s_count%s %i' % (name, labels,
+                                            metrics.request_count))
+
+    def __format_labels(self, labels):
+        all_labels = dict(self.labels)
+        all_labels.update(labels)
+        items = ['%s="%s"' % (key, self.__escape(all_labels[key]))
+                 for key in sorted(all_labels)]
+        return '{%s}' % (','.join(items))
+
+    @staticmethod
+    def __escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"') \
+                         .replace('\n', '\\n')
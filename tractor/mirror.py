@@ -0,0 +1,280 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from .batch import DEFAULT_CHUNK_SIZE
+from .cache import DEFAULT_CLOCK_SKEW
+from .feed import ChangeFeed
+from .feed import to_datetime
+from .ticket import ATTRIBUTE_NAMES
+from .ticket import TicketWrapper
+from datetime import datetime
+from datetime import timedelta
+from threading import Lock
+import sqlite3
+
+__docformat__ = 'reStructuredText en'
+__all__ = ['TicketMirror']
+
+
+#: The names of the mirrored ticket attributes (column order).
+MIRRORED_ATTRIBUTES = sorted(ATTRIBUTE_NAMES.keys())
+
+#: Attributes with a database index (frequently used in queries).
+INDEXED_ATTRIBUTES = ['component', 'milestone', 'owner', 'status']
+
+#: The format of the stored time stamps.
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+
+#: The state table key of the high-water mark.
+HIGH_WATER_MARK_KEY = 'high_water_mark'
+
+
+class TicketMirror(object):
+    """
+    A local SQLite copy of the trac tickets for fast and offline reads.
+
+    :func:`load` bulk-loads the tickets (page by page, see
+    :func:`tractor.api.TractorApi.iter_query`), :func:`sync` applies the
+    changes reported by *ticket.getRecentChanges* since the last load or
+    sync (see :class:`tractor.feed.ChangeFeed`). The high-water mark is
+    stored in the database, so a mirror reopened from a database file
+    resumes incrementally.
+
+    Lookups and queries are served from the database. :func:`get_ticket`
+    falls back to the trac for tickets that are not mirrored (yet).
+    Since trac does not report deleted tickets as changes, deletions are
+    only picked up by the next :func:`load`.
+    """
+
+    def __init__(self, api, database=':memory:',
+                 batch_size=DEFAULT_CHUNK_SIZE, clock_skew=DEFAULT_CLOCK_SKEW):
+        """
+        Constructor.
+
+        :param api: The (synchronous) API to mirror.
+        :type api: :class:`tractor.api.TractorApi`
+        :param database: The path of the SQLite database file.
+        :default database: *:memory:* (an in-memory database)
+        :param batch_size: The number of tickets fetched per request.
+        :type batch_size: :class:`int`
+        :param clock_skew: The maximum difference (seconds) between the
+            client and the trac clock (used for the first sync after a
+            load).
+        :type clock_skew: :class:`float`
+        """
+        self.__api = api
+        #: The number of tickets fetched per request.
+        self.batch_size = batch_size
+        #: The maximum difference between the client and the trac clock.
+        self.clock_skew = clock_skew
+        self.__lock = Lock()
+        self.__connection = sqlite3.connect(database,
+                                            check_same_thread=False)
+        self.__create_tables()
+
+    def __len__(self):
+        with self.__lock:
+            return self.__connection.execute(
+                            'SELECT COUNT(*) FROM tickets').fetchone()[0]
+
+    @property
+    def high_water_mark(self):
+        """
+        The (UTC) change time up to which the mirror is current (*None* if
+        the mirror has not been loaded yet).
+        """
+        with self.__lock:
+            row = self.__connection.execute('SELECT value FROM '
+                            'mirror_state WHERE key = ?',
+                            (HIGH_WATER_MARK_KEY,)).fetchone()
+        if row is None:
+            return None
+        return self.__parse_time(row[0])
+
+    def load(self, query='order=id'):
+        """
+        Replaces the mirrored tickets with the tickets matching the given
+        trac query.
+
+        :param query: A trac query string.
+        :default query: *order=id* (all tickets)
+        :return: The number of loaded tickets.
+        """
+        high_water_mark = datetime.utcnow() - \
+                          timedelta(seconds=self.clock_skew)
+        # The tickets are staged and swapped in within one transaction, so
+        # a failed load leaves the mirror (and its high-water mark) intact.
+        with self.__lock:
+            self.__connection.execute('DROP TABLE IF EXISTS '
+                                      'temp.staged_tickets')
+            self.__connection.execute(self.__get_table_definition(
+                                                'temp.staged_tickets'))
+        try:
+            count = 0
+            page = []
+            for ticket in self.__api.iter_query(query,
+                                                page_size=self.batch_size):
+                page.append(ticket)
+                if len(page) == self.batch_size:
+                    self.__store(page, table='temp.staged_tickets')
+                    count += len(page)
+                    page = []
+            self.__store(page, table='temp.staged_tickets')
+            with self.__lock:
+                with self.__connection:
+                    self.__connection.execute('DELETE FROM tickets')
+                    self.__connection.execute('INSERT INTO tickets SELECT * '
+                                              'FROM temp.staged_tickets')
+                    self.__store_high_water_mark(high_water_mark)
+        finally:
+            with self.__lock:
+                self.__connection.execute('DROP TABLE IF EXISTS '
+                                          'temp.staged_tickets')
+        return count + len(page)
+
+    def sync(self):
+        """
+        Fetches and stores the tickets changed since the last load or sync.
+
+        :return: The changed tickets.
+        :raises ValueError: If the mirror has not been loaded yet.
+        """
+        since = self.high_water_mark
+        if since is None:
+            raise ValueError('The mirror must be loaded before it can be '
+                             'synchronized!')
+        feed = ChangeFeed(self.__api, since=since,
+                          batch_size=self.batch_size)
+        tickets = feed.poll()
+        self.__store(tickets, high_water_mark=feed.high_water_mark)
+        return tickets
+
+    def get_ticket(self, ticket_id):
+        """
+        Returns the mirrored ticket with the given ID. Tickets that are not
+        mirrored are fetched from the trac (and stored).
+        """
+        tickets = self.__select('WHERE id = ?', (ticket_id,))
+        if tickets:
+            return tickets[0]
+        ticket = self.__api.get_ticket(ticket_id)
+        self.__store([ticket])
+        return ticket
+
+    def query(self, **conditions):
+        """
+        Returns the mirrored tickets (ordered by ID) whose attributes match
+        all given conditions. A condition value may be a single value or a
+        list of values (any of which must match); *None* matches empty
+        attributes::
+
+            mirror.query(status=['new', 'assigned'], milestone='m1')
+
+        :raises ValueError: For unknown attribute names.
+        """
+        clauses = []
+        params = []
+        for attr_name, value in sorted(conditions.iteritems()):
+            if not attr_name in ATTRIBUTE_NAMES:
+                raise ValueError('Unknown attribute "%s".' % (attr_name))
+            if isinstance(value, (list, tuple, set)):
+                values = list(value)
+            else:
+                values = [value]
+            alternatives = []
+            for item in values:
+                if item is None:
+                    alternatives.append('"%s" IS NULL' % (attr_name))
+                else:
+                    alternatives.append('"%s" = ?' % (attr_name))
+                    params.append(item)
+            clauses.append('(%s)' % (' OR '.join(alternatives or ['0'])))
+        if clauses:
+            where_clause = 'WHERE %s' % (' AND '.join(clauses))
+        else:
+            where_clause = ''
+        return self.__select(where_clause, params)
+
+    def close(self):
+        """
+        Closes the database.
+        """
+        with self.__lock:
+            self.__connection.close()
+
+    def __create_tables(self):
+        with self.__lock:
+            with self.__connection:
+                self.__connection.execute(
+                            self.__get_table_definition('tickets'))
+                self.__connection.execute('CREATE TABLE IF NOT EXISTS '
+                                'mirror_state (key TEXT PRIMARY KEY, '
+                                'value TEXT)')
+                for attr_name in INDEXED_ATTRIBUTES:
+                    self.__connection.execute('CREATE INDEX IF NOT EXISTS '
+                                'tickets_%s ON tickets ("%s")'
+                                % (attr_name, attr_name))
+
+    @staticmethod
+    def __get_table_definition(table):
+        columns = ', '.join(['"%s" TEXT' % (attr_name)
+                             for attr_name in MIRRORED_ATTRIBUTES])
+        return 'CREATE TABLE IF NOT EXISTS %s (id INTEGER PRIMARY KEY, ' \
+               'time TEXT, changetime TEXT, %s)' % (table, columns)
+
+    def __store(self, tickets, high_water_mark=None, table='tickets'):
+        columns = ['id', 'time', 'changetime'] + MIRRORED_ATTRIBUTES
+        statement = 'INSERT OR REPLACE INTO %s (%s) VALUES (%s)' \
+                    % (table,
+                       ', '.join(['"%s"' % (column) for column in columns]),
+                       ', '.join(['?'] * len(columns)))
+        rows = []
+        for ticket in tickets:
+            row = [ticket.ticket_id, self.__format_time(ticket.time),
+                   self.__format_time(ticket.changetime)]
+            row.extend([getattr(ticket, attr_name)
+                        for attr_name in MIRRORED_ATTRIBUTES])
+            rows.append(row)
+        with self.__lock:
+            with self.__connection:
+                self.__connection.executemany(statement, rows)
+                if not high_water_mark is None:
+                    self.__store_high_water_mark(high_water_mark)
+
+    def __store_high_water_mark(self, high_water_mark):
+        self.__connection.execute('INSERT OR REPLACE INTO mirror_state '
+                                  '(key, value) VALUES (?, ?)',
+                                  (HIGH_WATER_MARK_KEY,
+                                   self.__format_time(high_water_mark)))
+
+    def __select(self, where_clause, params):
+        columns = ['id', 'time', 'changetime'] + MIRRORED_ATTRIBUTES
+        statement = 'SELECT %s FROM tickets %s ORDER BY id' \
+                    % (', '.join(['"%s"' % (column) for column in columns]),
+                       where_clause)
+        with self.__lock:
+            rows = self.__connection.execute(statement, params).fetchall()
+        tickets = []
+        for row in rows:
+            attributes = dict([(attr_name, value or '') for attr_name, value
+                               in zip(MIRRORED_ATTRIBUTES, row[3:])])
+            trac_data = (row[0], self.__parse_time(row[1]),
+                         self.__parse_time(row[2]), attributes)
+            tickets.append(TicketWrapper.create_from_trac_data(trac_data))
+        return tickets
+
+    @staticmethod
+    def __format_time(value):
+        if value is None:
+            return None
+        return to_datetime(value).strftime(TIMESTAMP_FORMAT)
+
+    @staticmethod
+    def __parse_time(value):
+        if value is None:
+            return None
+        return datetime.strptime(value, TIMESTAMP_FORMAT)
@@ -0,0 +1,125 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from Queue import Empty
+from Queue import LifoQueue
+from contextlib import contextmanager
+from threading import Lock
+
+__docformat__ = 'reStructuredText en'
+__all__ = ['ConnectionPool',
+           'PoolTimeout']
+
+
+class PoolTimeout(Exception):
+    """
+    Is raised if no connection becomes available within the pool timeout.
+    """
+
+
+class ConnectionPool(object):
+    """
+    A thread-safe pool of a bounded number of connections.
+
+    Connections are created lazily (up to the pool size) and handed out
+    in last-in-first-out order, so recently used (and thus still kept-alive)
+    connections are preferred.
+    """
+
+    def __init__(self, connection_factory, size, timeout=None):
+        """
+        Constructor.
+
+        :param connection_factory: Is invoked without arguments to create
+            a new connection.
+        :param size: The maximum number of connections.
+        :type size: :class:`int`
+        :param timeout: The maximum number of seconds a checkout waits for
+            a connection if all connections are in use. If the timeout is
+            *None*, the checkout blocks until a connection is returned.
+        :type timeout: :class:`float`
+        """
+        if size < 1:
+            raise ValueError('The pool size must be a positive number!')
+
+        #: The maximum number of connections.
+        self.size = size
+        #: The default checkout timeout in seconds (*None* for no timeout).
+        self.timeout = timeout
+
+        self.__connection_factory = connection_factory
+        self.__idle_connections = LifoQueue()
+        self.__lock = Lock()
+        self.__created_count = 0
+
+    @property
+    def created_count(self):
+        """
+        The number of connections created so far.
+        """
+        return self.__created_count
+
+    @property
+    def idle_count(self):
+        """
+        The number of connections that are currently not checked out.
+        """
+        return self.__idle_connections.qsize()
+
+    def checkout(self, timeout=None):
+        """
+        Returns an idle connection or creates a new one if the pool is not
+        full yet. Otherwise, the method waits for a connection to be
+        returned.
+
+        :param timeout: Replaces the timeout of the pool for this checkout.
+        :type timeout: :class:`float`
+        :raises PoolTimeout: If no connection is returned within the
+            timeout.
+        """
+        if timeout is None:
+            timeout = self.timeout
+        try:
+            return self.__idle_connections.get_nowait()
+        except Empty:
+            pass
+
+        with self.__lock:
+            may_create = self.__created_count < self.size
+            if may_create:
+                self.__created_count += 1
+        if may_create:
+            try:
+                return self.__connection_factory()
+            except:
+                with self.__lock:
+                    self.__created_count -= 1
+                raise
+
+        try:
+            return self.__idle_connections.get(timeout=timeout)
+        except Empty:
+            raise PoolTimeout('No connection became available within %s '
+                              'seconds (pool size: %i).'
+                              % (timeout, self.size))
+
+    def checkin(self, connection):
+        """
+        Returns a connection to the pool.
+        """
+        self.__idle_connections.put(connection)
+
+    @contextmanager
+    def connection(self):
+        """
+        Context manager checking a connection out and in again.
+        """
+        conn = self.checkout()
+        try:
+            yield conn
+        finally:
+            self.checkin(conn)
@@ -0,0 +1,245 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from contextlib import contextmanager
+from threading import Lock
+import time
+
+__docformat__ = 'reStructuredText en'
+__all__ = ['PHASES',
+           'PhaseStatistics',
+           'RequestProfile',
+           'RequestProfiler']
+
+
+#: The request phases in chronological order: waiting for the governor and
+#: a pool connection, marshalling the request, sending it and receiving the
+#: response, parsing the response and converting the result (e.g. into
+#: ticket wrappers). Connections that cannot tell the marshal, network and
+#: unmarshal times apart (like the dummy) report a *call* phase instead.
+PHASES = ('wait', 'marshal', 'network', 'unmarshal', 'call', 'wrap')
+
+
+class RequestProfile(object):
+    """
+    The phase times of one request.
+    """
+
+    def __init__(self, method_name, args=None):
+        """
+        Constructor.
+
+        :param method_name: The XML-RPC method name.
+        :param args: The request arguments.
+        """
+        #: The XML-RPC method name.
+        self.method_name = method_name
+        #: The request arguments.
+        self.args = args
+        #: The time (as returned by :func:`time.time`) the request has been
+        #: started.
+        self.started_at = time.time()
+        #: The size of the request body (*None* if unknown).
+        self.request_bytes = None
+        #: The size of the response body (*None* if unknown).
+        self.response_bytes = None
+        #: Maps phase names onto durations in seconds.
+        self.phase_times = dict()
+        #: The exception the request has failed with (*None* for successful
+        #: requests).
+        self.error = None
+
+    @property
+    def total_time(self):
+        """
+        The sum of all phase times in seconds.
+        """
+        return sum(self.phase_times.values())
+
+    def add(self, phase, seconds):
+        """
+        Adds the given number of seconds to the time of the given phase.
+        """
+        self.phase_times[phase] = self.phase_times.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def measure(self, phase):
+        """
+        Context manager adding the time spent within the context to the
+        given phase.
+        """
+        start_time = time.time()
+        try:
+            yield
+        finally:
+            self.add(phase, time.time() - start_time)
+
+    def __repr__(self):
+        phases = ', '.join(['%s: %.2f ms' % (phase,
+                                             self.phase_times[phase] * 1000)
+                            for phase in PHASES
+                            if phase in self.phase_times])
+        str_format = '<%s %s, %s>'
+        params = (self.__class__.__name__, self.method_name, phases)
+        return str_format % params
+
+
+class PhaseStatistics(object):
+    """
+    The aggregated time of one phase of one XML-RPC method.
+    """
+
+    __slots__ = ('count', 'total_time', 'max_time')
+
+    def __init__(self):
+        #: The number of requests the phase has been recorded for.
+        self.count = 0
+        #: The sum of the phase times in seconds.
+        self.total_time = 0.0
+        #: The longest phase time in seconds.
+        self.max_time = 0.0
+
+    @property
+    def mean_time(self):
+        """
+        The average phase time in seconds.
+        """
+        if self.count == 0:
+            return 0.0
+        return self.total_time / self.count
+
+    def add(self, seconds):
+        """
+        Adds one phase time.
+        """
+        self.count += 1
+        self.total_time += seconds
+        if seconds > self.max_time:
+            self.max_time = seconds
+
+    def __repr__(self):
+        str_format = '<%s, count: %i, mean: %.2f ms, max: %.2f ms>'
+        params = (self.__class__.__name__, self.count,
+                  self.mean_time * 1000, self.max_time * 1000)
+        return str_format % params
+
+
+class RequestProfiler(object):
+    """
+    Aggregates the phase times of the requests of an API per XML-RPC
+    method (see the *profiler* parameter of
+    :class:`tractor.api.TractorApi`)::
+
+        profiler = RequestProfiler()
+        api = make_api(realm=realm, username=username, password=password,
+                       profiler=profiler)
+        api.get_ticket(ticket_id)
+        print profiler.get_report()
+
+    Profilers may be shared by several APIs and threads.
+    """
+
+    def __init__(self, callback=None):
+        """
+        Constructor.
+
+        :param callback: Is invoked with each :class:`RequestProfile`
+            (e.g. to log slow requests).
+        """
+        #: Is invoked with each recorded :class:`RequestProfile`.
+        self.callback = callback
+        self.__request_counts = dict()
+        self.__phase_statistics = dict()
+        self.__lock = Lock()
+
+    def record(self, profile):
+        """
+        Adds the phase times of the given :class:`RequestProfile`.
+        """
+        with self.__lock:
+            method_name = profile.method_name
+            self.__request_counts[method_name] = \
+                            self.__request_counts.get(method_name, 0) + 1
+            method_statistics = self.__phase_statistics.setdefault(
+                                                        method_name, dict())
+            for phase, seconds in profile.phase_times.iteritems():
+                statistics = method_statistics.get(phase)
+                if statistics is None:
+                    statistics = PhaseStatistics()
+                    method_statistics[phase] = statistics
+                statistics.add(seconds)
+        if not self.callback is None:
+            self.callback(profile)
+
+    @property
+    def method_names(self):
+        """
+        The (sorted) names of the profiled methods.
+        """
+        with self.__lock:
+            return sorted(self.__request_counts)
+
+    def get_request_count(self, method_name):
+        """
+        Returns the number of recorded requests for the given method.
+        """
+        return self.__request_counts.get(method_name, 0)
+
+    def get_phase_statistics(self, method_name):
+        """
+        Returns a dictionary mapping phase names onto
+        :class:`PhaseStatistics` for the given method.
+        """
+        with self.__lock:
+            return dict(self.__phase_statistics.get(method_name, dict()))
+
+    def get_report(self):
+        """
+        Returns a table with the mean phase times (in milliseconds) per
+        method.
+        """
+        with self.__lock:
+            method_names = sorted(self.__request_counts)
+            phases = [phase for phase in PHASES
+                      if any([phase in self.__phase_statistics[method_name]
+                              for method_name in method_names])]
+            name_width = max([len('method')] +
+                             [len(method_name)
+                              for method_name in method_names])
+            header = ['method'.ljust(name_width), 'requests'.rjust(8)] + \
+                     [phase.rjust(9) for phase in phases + ['total']]
+            lines = ['  '.join(header)]
+            for method_name in method_names:
+                count = self.__request_counts[method_name]
+                method_statistics = self.__phase_statistics[method_name]
+                row = [method_name.ljust(name_width), str(count).rjust(8)]
+                total_time = 0.0
+                for phase in phases:
+                    statistics = method_statistics.get(phase)
+                    if statistics is None:
+                        row.append('-'.rjust(9))
+                        continue
+                    # The mean over all requests of the method.
+                    phase_time = statistics.total_time / count
+                    total_time += phase_time
+                    row.append(('%.2f' % (phase_time * 1000)).rjust(9))
+                row.append(('%.2f' % (total_time * 1000)).rjust(9))
+                lines.append('  '.join(row))
+        return '\n'.join(lines)
+
+    def reset(self):
+        """
+        Discards all recorded phase times.
+        """
+        with self.__lock:
+            self.__request_counts.clear()
+            self.__phase_statistics.clear()
+
+    def __repr__(self):
+        str_format = '<%s, methods: %i>'
+        params = (self.__class__.__name__, len(self.__request_counts))
+        return str_format % params
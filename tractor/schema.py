@@ -0,0 +1,241 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from .batch import PendingCall
+from .fileutils import replace_file
+from .ticket import ATTRIBUTE_NAMES
+from .ticket import ATTRIBUTE_OPTIONS
+from .ticket import AttributeLookup
+from .ticket import AttributeValidator
+from .ticket import TicketAttribute
+from .ticket import TicketAttributeValues
+from .ticket import TicketWrapper
+import json
+import os
+import time
+
+__docformat__ = 'reStructuredText en'
+__all__ = ['DEFAULT_SCHEMA_TTL',
+           'TicketSchema',
+           'load_schema']
+
+
+#: The default number of seconds a cached schema is used before it is
+#: fetched again.
+DEFAULT_SCHEMA_TTL = 24 * 60 * 60
+
+#: Maps the names of the fields whose options are fetched separately (they
+#: contain all values, e.g. also completed milestones) onto the names of the
+#: XML-RPC methods returning these options.
+ENUM_METHOD_NAMES = {'component' : 'ticket.component.getAll',
+                     'milestone' : 'ticket.milestone.getAll',
+                     'version' : 'ticket.version.getAll'}
+
+#: Field types without ticket attribute (maintained by the trac).
+IGNORED_FIELD_TYPES = frozenset(['time'])
+
+#: Field types with a limited value range.
+OPTION_FIELD_TYPES = frozenset(['select', 'radio'])
+
+
+def load_schema(api, cache_file=None, ttl=DEFAULT_SCHEMA_TTL, refresh=False):
+    """
+    Returns the :class:`TicketSchema` of the trac of the given API.
+
+    If you pass a cache file, the schema is read from this file as long as
+    it is younger than the time-to-live (and has been stored for the realm
+    of the API). Otherwise it is fetched with one *system.multicall*
+    request and stored in the cache file.
+
+    :param api: The API to fetch the schema with.
+    :type api: :class:`tractor.api.TractorApi`
+    :param cache_file: The path of the cache file.
+    :param ttl: The number of seconds a cached schema is used.
+    :type ttl: :class:`float`
+    :param refresh: If *True*, the schema is fetched in any case.
+    :type refresh: :class:`bool`
+    """
+    realm = api.realm
+    if not cache_file is None and not refresh:
+        schema = _read_cache_file(cache_file, realm, ttl)
+        if not schema is None:
+            return schema
+    schema = TicketSchema.fetch(api)
+    if not cache_file is None:
+        _write_cache_file(cache_file, realm, schema)
+    return schema
+
+
+def _read_cache_file(cache_file, realm, ttl):
+    if not os.path.exists(cache_file):
+        return None
+    # Unreadable, corrupted and malformed files are replaced.
+    try:
+        with open(cache_file, 'rb') as fp:
+            state = json.load(fp)
+        if state.get('realm') != realm or \
+                time.time() - state.get('loaded_at', 0) > ttl:
+            return None
+        return TicketSchema(state['fields'], state['enum_values'])
+    except (IOError, ValueError, KeyError, AttributeError, TypeError):
+        return None
+
+
+def _write_cache_file(cache_file, realm, schema):
+    state = dict(realm=realm, loaded_at=time.time(), fields=schema.fields,
+                 enum_values=schema.enum_values)
+    # Replace the file atomically, so concurrent readers never see a
+    # partially written schema.
+    replace_file(cache_file, json.dumps(state))
+
+
+class TicketSchema(object):
+    """
+    The ticket fields of a trac, as reported by *ticket.getTicketFields*
+    (plus the complete component, milestone and version lists).
+
+    The schema is converted into attribute names and attribute options
+    lookups (see :class:`tractor.ticket.TicketWrapper`) which replace the
+    hardcoded default lookups: the options of select fields are taken from
+    the trac, custom fields are included. Standard attributes the trac does
+    not know (e.g. the severity, if no severities are defined) do not accept
+    any value.
+    """
+
+    def __init__(self, fields, enum_values=None):
+        """
+        Constructor.
+
+        :param fields: The field definitions (as returned by
+            *ticket.getTicketFields*).
+        :type fields: :class:`list` of :class:`dict`
+        :param enum_values: Maps field names onto their complete list of
+            options (overriding the options of the field definition).
+        :type enum_values: :class:`dict`
+        """
+        #: The field definitions.
+        self.fields = fields
+        if enum_values is None:
+            enum_values = dict()
+        #: Maps field names onto their complete list of options.
+        self.enum_values = enum_values
+        #: The names of the custom fields.
+        self.custom_field_names = [field['name'] for field in fields
+                                   if field.get('custom', False) and
+                                   not field.get('type') in
+                                                IGNORED_FIELD_TYPES]
+        #: Maps attribute names onto attribute classes.
+        self.attribute_names_lookup = AttributeLookup()
+        #: Maps attribute names onto attribute value classes.
+        self.attribute_options_lookup = AttributeLookup()
+        self.__build_lookups()
+        self.__attribute_validator = None
+
+    @classmethod
+    def fetch(cls, api):
+        """
+        Fetches the schema from the trac of the given API (with one
+        *system.multicall* request).
+        """
+        fields_call = PendingCall('ticket.getTicketFields', ())
+        enum_calls = dict([(field_name, PendingCall(method_name, ()))
+                           for field_name, method_name
+                           in ENUM_METHOD_NAMES.iteritems()])
+        calls = [fields_call] + enum_calls.values()
+        api._send_multicall(calls) #pylint: disable=W0212
+        enum_values = dict()
+        for field_name, call in enum_calls.iteritems():
+            # Tracs without the component, milestone or version modules
+            # only provide the options of the field definitions.
+            if call.fault is None:
+                enum_values[field_name] = call.result()
+        return cls(fields_call.result(), enum_values)
+
+    @property
+    def attribute_validator(self):
+        """
+        The :class:`tractor.ticket.AttributeValidator` for the schema
+        lookups (compiled on first use).
+        """
+        validator = self.__attribute_validator
+        if validator is None or \
+                not validator.is_current(self.attribute_names_lookup,
+                                         self.attribute_options_lookup):
+            validator = AttributeValidator(self.attribute_names_lookup,
+                                           self.attribute_options_lookup)
+            self.__attribute_validator = validator
+        return validator
+
+    def create_wrapper(self, **kw):
+        """
+        Creates a :class:`tractor.ticket.TicketWrapper` using the schema
+        lookups. Custom field values can be passed as keywords as well.
+
+        :raises TypeError: For unknown attribute names.
+        """
+        custom_values = dict()
+        for attr_name in self.custom_field_names:
+            if attr_name in kw:
+                custom_values[attr_name] = kw.pop(attr_name)
+        ticket = TicketWrapper(
+                    attribute_names_lookup=self.attribute_names_lookup,
+                    attribute_options_lookup=self.attribute_options_lookup,
+                    **kw)
+        for attr_name, value in custom_values.iteritems():
+            setattr(ticket, attr_name, value)
+        return ticket
+
+    def __build_lookups(self):
+        field_map = dict([(field['name'], field) for field in self.fields
+                          if not field.get('type') in IGNORED_FIELD_TYPES])
+        for attr_name in ATTRIBUTE_NAMES.keys():
+            if not attr_name in field_map:
+                self.__add_attribute(attr_name, True, None, [])
+        for attr_name, field in field_map.iteritems():
+            options = self.enum_values.get(attr_name)
+            if options is None and field.get('type') in OPTION_FIELD_TYPES:
+                options = field.get('options', [])
+            default_value = field.get('value') or None
+            if attr_name in ATTRIBUTE_NAMES:
+                attr_cls = ATTRIBUTE_NAMES[attr_name]
+                is_optional = attr_cls.IS_OPTIONAL
+                if default_value is None:
+                    default_value = getattr(attr_cls, 'DEFAULT_VALUE', None)
+                default_options = ATTRIBUTE_OPTIONS[attr_name]
+                if not options is None and not default_options is None \
+                        and None in default_options.ALL:
+                    options = list(options) + [None]
+            else:
+                is_optional = True
+            if not options is None and not default_value in options:
+                # The trac applies its own default to attributes that are
+                # not passed.
+                default_value = None
+                is_optional = True
+            self.__add_attribute(attr_name, is_optional, default_value,
+                                 options)
+
+    def __add_attribute(self, attr_name, is_optional, default_value,
+                        options):
+        class_name = str(''.join([part.capitalize() for part
+                                  in attr_name.split('_')]))
+        self.attribute_names_lookup[attr_name] = \
+                    type(class_name + 'Attribute', (TicketAttribute,),
+                         dict(NAME=attr_name, IS_OPTIONAL=is_optional,
+                              DEFAULT_VALUE=default_value))
+        if options is None:
+            self.attribute_options_lookup[attr_name] = None
+        else:
+            self.attribute_options_lookup[attr_name] = \
+                    type(class_name + 'AttributeValues',
+                         (TicketAttributeValues,), dict(ALL=list(options)))
+
+    def __repr__(self):
+        str_format = '<%s, fields: %i, custom fields: %s>'
+        params = (self.__class__.__name__, len(self.attribute_names_lookup),
+                  self.custom_field_names)
+        return str_format % params
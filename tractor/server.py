@@ -0,0 +1,369 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from .dummy import DummyConnection
+from .dummy import GET_ONLY_USER
+from .dummy import INVALID_USER
+from SimpleXMLRPCServer import SimpleXMLRPCRequestHandler
+from SimpleXMLRPCServer import SimpleXMLRPCServer
+from SimpleXMLRPCServer import resolve_dotted_attribute
+from SocketServer import ThreadingMixIn
+from threading import Lock
+from threading import Thread
+from xmlrpclib import ProtocolError
+import argparse
+import base64
+import random
+import socket
+import time
+
+__docformat__ = 'reStructuredText en'
+__all__ = ['DummyTracServer',
+           'KeepAliveRequestHandler',
+           'XmlRpcServer',
+           'main']
+
+
+class KeepAliveRequestHandler(SimpleXMLRPCRequestHandler):
+    """
+    Request handler supporting HTTP/1.1 persistent connections. Applies the
+    authentication and the latency, bandwidth and error injection settings
+    of the :class:`XmlRpcServer`.
+    """
+    protocol_version = 'HTTP/1.1'
+    rpc_paths = ()
+
+    #: The name of the authenticated user (*None* for anonymous requests).
+    username = None
+    #: The HTTP status code and message of a :class:`xmlrpclib.ProtocolError`
+    #: raised by the served method (*None* if there is none).
+    http_error = None
+
+    def setup(self):
+        SimpleXMLRPCRequestHandler.setup(self)
+        bandwidth = self.server.bandwidth
+        if not bandwidth is None:
+            self.rfile = _ThrottledFile(self.rfile, bandwidth)
+            self.wfile = _ThrottledFile(self.wfile, bandwidth)
+
+    def do_POST(self):
+        server = self.server
+        self.http_error = None
+        self.username = self.__get_username()
+        if not server.is_authorized(self.username, self.__get_password()):
+            self.__send_error(401, 'Authorization Required',
+                              [('WWW-Authenticate', 'Basic realm="trac"')])
+        elif server.is_error_injected():
+            self.__send_error(503, 'Service Unavailable (injected error)')
+        else:
+            if server.latency > 0:
+                time.sleep(server.latency)
+            SimpleXMLRPCRequestHandler.do_POST(self)
+
+    def _dispatch(self, method, params):
+        # Is used instead of the dispatch method of the server.
+        try:
+            return self.server.dispatch_request(method, params,
+                                                self.username)
+        except ProtocolError as exc:
+            # Protocol errors are sent as HTTP errors (instead of faults).
+            self.http_error = (exc.errcode, exc.errmsg)
+            raise
+
+    def send_response(self, code, message=None):
+        if code == 200 and not self.http_error is None:
+            code, message = self.http_error
+        SimpleXMLRPCRequestHandler.send_response(self, code, message)
+
+    def __get_credentials(self):
+        header = self.headers.get('Authorization', '')
+        if not header.startswith('Basic '):
+            return None, None
+        try:
+            credentials = base64.b64decode(header[len('Basic '):].strip())
+        except TypeError:
+            return None, None
+        if not ':' in credentials:
+            return credentials, None
+        return tuple(credentials.split(':', 1))
+
+    def __get_username(self):
+        return self.__get_credentials()[0]
+
+    def __get_password(self):
+        return self.__get_credentials()[1]
+
+    def __send_error(self, code, message, headers=()):
+        # The request body is discarded, so the connection can be kept
+        # alive.
+        content_length = int(self.headers.get('Content-Length', 0))
+        if content_length > 0:
+            self.rfile.read(content_length)
+        self.send_response(code, message)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+
+class XmlRpcServer(ThreadingMixIn, SimpleXMLRPCServer):
+    """
+    Multithreaded XML-RPC server (with *system.multicall* support) for
+    local benchmarks and load tests. Latency, bandwidth limits, errors and
+    basic authentication can be simulated.
+    """
+    daemon_threads = True
+
+    def __init__(self, instance=None, address=('127.0.0.1', 0),
+                 handler_class=KeepAliveRequestHandler, latency=0,
+                 bandwidth=None, error_rate=0, credentials=None,
+                 random_seed=None):
+        """
+        Constructor.
+
+        :param instance: The object whose (dotted) methods are served.
+        :param address: The host and port to listen on (port 0 picks a free
+            port).
+        :type address: :class:`tuple`
+        :param handler_class: Should be a subclass of
+            :class:`KeepAliveRequestHandler`.
+        :param latency: The number of seconds each request is delayed.
+        :type latency: :class:`float`
+        :param bandwidth: The maximum number of bytes per second transferred
+            in each direction of a connection (*None* for no limit).
+        :type bandwidth: :class:`int`
+        :param error_rate: The share (0 to 1) of the requests that fail with
+            HTTP status 503.
+        :type error_rate: :class:`float`
+        :param credentials: Maps user names onto passwords. If you pass
+            credentials, requests without valid basic authentication fail
+            with HTTP status 401.
+        :type credentials: :class:`dict`
+        :param random_seed: Seed for the error injection (for reproducible
+            runs).
+        """
+        SimpleXMLRPCServer.__init__(self, address,
+                                    requestHandler=handler_class,
+                                    logRequests=False, allow_none=True)
+        if not instance is None:
+            self.register_instance(instance, allow_dotted_names=True)
+        self.register_multicall_functions()
+        #: The number of seconds each request is delayed.
+        self.latency = latency
+        #: The maximum number of bytes per second and direction.
+        self.bandwidth = bandwidth
+        #: The share of the requests that fail.
+        self.error_rate = error_rate
+        #: Maps user names onto passwords (*None* for no authentication).
+        self.credentials = credentials
+        self.__random = random.Random(random_seed)
+        self.__random_lock = Lock()
+        self.__thread = None
+        # The open client connections (closed by :func:`stop`).
+        self.__client_sockets = set()
+        self.__client_sockets_lock = Lock()
+        self.__is_stopping = False
+
+    @property
+    def address(self):
+        """
+        The host and port of the server (without scheme).
+        """
+        return '%s:%s' % self.server_address
+
+    @property
+    def connection_count(self):
+        """
+        The number of open client connections.
+        """
+        with self.__client_sockets_lock:
+            return len(self.__client_sockets)
+
+    def get_request(self):
+        request, client_address = SimpleXMLRPCServer.get_request(self)
+        with self.__client_sockets_lock:
+            self.__client_sockets.add(request)
+        return request, client_address
+
+    def close_request(self, request):
+        with self.__client_sockets_lock:
+            self.__client_sockets.discard(request)
+        SimpleXMLRPCServer.close_request(self, request)
+
+    def handle_error(self, request, client_address):
+        # The connections closed by :func:`stop` make their handler threads
+        # fail - this is expected and not reported.
+        if not self.__is_stopping:
+            SimpleXMLRPCServer.handle_error(self, request, client_address)
+
+    def is_authorized(self, username, password):
+        """
+        Checks the basic authentication credentials of a request.
+        """
+        if self.credentials is None:
+            return True
+        return not username is None and \
+               self.credentials.get(username) == password
+
+    def is_error_injected(self):
+        """
+        Decides whether the current request fails (see *error_rate*).
+        """
+        if self.error_rate <= 0:
+            return False
+        with self.__random_lock:
+            return self.__random.random() < self.error_rate
+
+    def dispatch_request(self, method, params, username): # pylint: disable=W0613
+        """
+        Invokes the given method for the given (authenticated) user.
+        """
+        return self._dispatch(method, params)
+
+    def start(self):
+        """
+        Serves requests in a background thread.
+        """
+        self.__thread = Thread(target=self.serve_forever,
+                               kwargs=dict(poll_interval=0.01))
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def stop(self):
+        """
+        Stops the background thread and closes all connections.
+        """
+        self.__is_stopping = True
+        self.shutdown()
+        self.server_close()
+        self.__thread.join()
+        # Kept-alive connections would otherwise block their handler threads.
+        with self.__client_sockets_lock:
+            client_sockets = list(self.__client_sockets)
+        for client_socket in client_sockets:
+            try:
+                client_socket.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+
+
+class DummyTracServer(XmlRpcServer):
+    """
+    Serves the dummy trac (see :mod:`tractor.dummy`) over HTTP, so the
+    :class:`tractor.api.Tractor` can be benchmarked with its real transport
+    without network::
+
+        server = DummyTracServer(latency=0.02)
+        server.start()
+        api = Tractor(server.address, 'test_user', 'pw')
+
+    The ticket methods are served under their trac names (*ticket.get*,
+    *ticket.milestone.getAll*, ...), as well as *system.multicall*. The
+    authenticated user name is passed to the dummy trac: the invalid and
+    get-only dummy users behave like in the :class:`tractor.api.DummyTractor`.
+    Since the dummy trac is not thread-safe, the requests are executed one
+    after the other (the injected latency is applied in parallel).
+
+    The server can also be run from the command line (see :func:`main`).
+    """
+
+    def __init__(self, address=('127.0.0.1', 0), **kw):
+        """
+        Constructor. See :class:`XmlRpcServer` for the keyword arguments.
+        """
+        XmlRpcServer.__init__(self, address=address, **kw)
+        self.__trac_lock = Lock()
+
+    def dispatch_request(self, method, params, username):
+        """
+        Invokes the dummy trac method for the given user.
+        """
+        if username is None:
+            username = 'anonymous'
+        with self.__trac_lock:
+            conn = DummyConnection(
+                        is_valid_connection=username != INVALID_USER,
+                        get_only=username == GET_ONLY_USER,
+                        url='http://%s:pw@%s' % (username, self.address))
+            meth = resolve_dotted_attribute(conn, method,
+                                            allow_dotted_names=True)
+            return meth(*params)
+
+
+class _ThrottledFile(object):
+    """
+    Wraps a socket file and limits the transfer rate of reads and writes.
+    """
+
+    def __init__(self, fp, bandwidth):
+        self.__fp = fp
+        self.__bandwidth = float(bandwidth)
+
+    def read(self, size=-1):
+        data = self.__fp.read(size)
+        self.__throttle(len(data))
+        return data
+
+    def readline(self, size=-1):
+        data = self.__fp.readline(size)
+        self.__throttle(len(data))
+        return data
+
+    def write(self, data):
+        # Write in chunks of 1/10 second.
+        chunk_size = max(1, int(self.__bandwidth / 10))
+        for offset in xrange(0, len(data), chunk_size):
+            chunk = data[offset:offset + chunk_size]
+            self.__fp.write(chunk)
+            self.__throttle(len(chunk))
+
+    def __throttle(self, byte_count):
+        if byte_count > 0:
+            time.sleep(byte_count / self.__bandwidth)
+
+    def __getattr__(self, name):
+        return getattr(self.__fp, name)
+
+
+def main(argv=None):
+    """
+    Runs a :class:`DummyTracServer` until it is interrupted::
+
+        python -m tractor.server --port 8080 --latency 0.05 --user me:secret
+    """
+    parser = argparse.ArgumentParser(description='Serves the dummy trac '
+                                                 'via XML-RPC.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0,
+                        help='seconds each request is delayed')
+    parser.add_argument('--bandwidth', type=int, default=None,
+                        help='bytes per second and direction')
+    parser.add_argument('--error-rate', type=float, default=0,
+                        help='share of the requests failing with HTTP 503')
+    parser.add_argument('--user', action='append', default=[],
+                        help='"name:password" (enables basic '
+                             'authentication; may be repeated)')
+    args = parser.parse_args(argv)
+    credentials = None
+    if args.user:
+        credentials = dict([user.split(':', 1) for user in args.user])
+    server = DummyTracServer(address=(args.host, args.port),
+                             latency=args.latency, bandwidth=args.bandwidth,
+                             error_rate=args.error_rate,
+                             credentials=credentials)
+    print 'Serving the dummy trac on http://%s' % (server.address)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from .hooks import summarize_args
+from .profiler import PHASES
+from itertools import count
+from threading import Lock
+import heapq
+import logging
+import random
+import time
+
+__docformat__ = 'reStructuredText en'
+__all__ = ['SlowRequestLog',
+           'SlowRequestRecord',
+           'get_ticket_ids']
+
+
+#: The default latency (seconds) from which on requests are logged.
+DEFAULT_SLOW_REQUEST_THRESHOLD = 1.0
+
+#: The default number of slowest requests kept in memory.
+DEFAULT_SLOW_REQUEST_CAPACITY = 50
+
+
+def get_ticket_ids(method_name, args):
+    """
+    Returns the IDs of the tickets a request refers to (also for the calls
+    of a *system.multicall* request).
+    """
+    if method_name == 'system.multicall':
+        ticket_ids = []
+        for signature in args[0]:
+            ticket_ids.extend(get_ticket_ids(signature['methodName'],
+                                             signature['params']))
+        return ticket_ids
+    # The ticket ID is the first argument of all ticket methods that refer
+    # to one ticket.
+    if method_name.startswith('ticket.') and len(args) > 0 and \
+            isinstance(args[0], int) and not isinstance(args[0], bool):
+        return [args[0]]
+    return []
+
+
+class SlowRequestRecord(object):
+    """
+    Describes one slow request.
+    """
+
+    __slots__ = ('method_name', 'args_summary', 'ticket_ids', 'started_at',
+                 'latency', 'request_bytes', 'response_bytes',
+                 'phase_times', 'error')
+
+    def __init__(self, profile):
+        """
+        Constructor.
+
+        :param profile: The profile of the request.
+        :type profile: :class:`tractor.profiler.RequestProfile`
+        """
+        args = profile.args or ()
+        #: The XML-RPC method name.
+        self.method_name = profile.method_name
+        #: A short summary of the request arguments.
+        self.args_summary = summarize_args(args)
+        #: The IDs of the tickets the request refers to.
+        self.ticket_ids = get_ticket_ids(profile.method_name, args)
+        #: The time the request has been started.
+        self.started_at = profile.started_at
+        #: The duration of the request in seconds.
+        self.latency = profile.total_time
+        #: The size of the request body (*None* if unknown).
+        self.request_bytes = profile.request_bytes
+        #: The size of the response body (*None* if unknown).
+        self.response_bytes = profile.response_bytes
+        #: Maps phase names onto durations in seconds.
+        self.phase_times = dict(profile.phase_times)
+        #: The exception the request has failed with (*None* for successful
+        #: requests).
+        self.error = profile.error
+
+    def __str__(self):
+        phases = ', '.join(['%s %.1f ms' % (phase,
+                                            self.phase_times[phase] * 1000)
+                            for phase in PHASES
+                            if phase in self.phase_times])
+        parts = ['%s %s: %.3f s' % (time.strftime('%Y-%m-%d %H:%M:%S',
+                                                  time.localtime(
+                                                        self.started_at)),
+                                    self.method_name, self.latency),
+                 'args %s' % (self.args_summary)]
+        if self.ticket_ids:
+            parts.append('tickets %s' % (', '.join(['#%i' % (ticket_id)
+                                                    for ticket_id
+                                                    in self.ticket_ids])))
+        parts.append('bytes %s/%s' % (self.request_bytes,
+                                      self.response_bytes))
+        if phases:
+            parts.append('phases (%s)' % (phases))
+        if not self.error is None:
+            parts.append('error %r' % (self.error))
+        return ' - '.join(parts)
+
+    def __repr__(self):
+        str_format = '<%s %s, latency: %.3f s>'
+        params = (self.__class__.__name__, self.method_name, self.latency)
+        return str_format % params
+
+
+class SlowRequestLog(object):
+    """
+    Logs requests exceeding a latency threshold and keeps the slowest
+    recent requests in memory (see the *slow_log* parameter of
+    :class:`tractor.api.TractorApi`)::
+
+        slow_log = SlowRequestLog(threshold=2, sample_rate=0.1)
+        api = make_api(realm=realm, username=username, password=password,
+                       slow_log=slow_log)
+        ...
+        print slow_log.dump()
+
+    Each slow request is kept as a :class:`SlowRequestRecord` with its
+    method name, ticket IDs, payload sizes and phase breakdown. Only the
+    sampled share of the slow requests is passed on to the callback (by
+    default, a warning of the *tractor.slowlog* logger), the in-memory
+    buffer considers all of them. The buffer keeps the slowest requests
+    of the last *max_age* seconds up to its capacity.
+
+    Slow request logs may be shared by several APIs and threads.
+    """
+
+    def __init__(self, threshold=DEFAULT_SLOW_REQUEST_THRESHOLD,
+                 sample_rate=1.0, capacity=DEFAULT_SLOW_REQUEST_CAPACITY,
+                 max_age=None, callback=None):
+        """
+        Constructor.
+
+        :param threshold: The latency (seconds) from which on requests are
+            logged.
+        :type threshold: :class:`float`
+        :param sample_rate: The share (0 to 1) of the slow requests passed
+            on to the callback.
+        :type sample_rate: :class:`float`
+        :param capacity: The maximum number of slowest requests kept in
+            memory.
+        :type capacity: :class:`int`
+        :param max_age: Requests older than this number of seconds are
+            dropped from the buffer (*None* for no limit).
+        :type max_age: :class:`float`
+        :param callback: Is invoked with the :class:`SlowRequestRecord` of
+            each sampled slow request.
+        :default callback: logs a warning
+        :raises ValueError: For invalid sample rates or capacities.
+        """
+        if not 0 <= sample_rate <= 1:
+            raise ValueError('The sample rate must be between 0 and 1!')
+        if capacity < 1:
+            raise ValueError('The capacity must be a positive number!')
+        #: The latency (seconds) from which on requests are logged.
+        self.threshold = threshold
+        #: The share of the slow requests passed on to the callback.
+        self.sample_rate = sample_rate
+        #: The maximum number of slowest requests kept in memory.
+        self.capacity = capacity
+        #: The maximum age (seconds) of the buffered requests.
+        self.max_age = max_age
+        if callback is None:
+            callback = self.__log_record
+        #: Is invoked with the sampled slow request records.
+        self.callback = callback
+        #: The number of slow requests (including requests that have not
+        #: been sampled).
+        self.slow_count = 0
+        # Min-heap of (latency, sequence number, record) tuples, so the
+        # fastest buffered request is replaced first.
+        self.__heap = []
+        self.__counter = count()
+        self.__lock = Lock()
+
+    def observe(self, profile):
+        """
+        Records the request of the given profile if it exceeds the latency
+        threshold.
+
+        :param profile: The profile of a completed (or failed) request.
+        :type profile: :class:`tractor.profiler.RequestProfile`
+        """
+        if profile.total_time < self.threshold:
+            return
+        record = SlowRequestRecord(profile)
+        entry = (record.latency, next(self.__counter), record)
+        with self.__lock:
+            self.slow_count += 1
+            self.__drop_expired()
+            if len(self.__heap) < self.capacity:
+                heapq.heappush(self.__heap, entry)
+            elif entry > self.__heap[0]:
+                heapq.heapreplace(self.__heap, entry)
+        if self.sample_rate >= 1 or random.random() < self.sample_rate:
+            self.callback(record)
+
+    def get_slowest(self):
+        """
+        Returns the buffered :class:`SlowRequestRecord` objects, slowest
+        first.
+        """
+        with self.__lock:
+            self.__drop_expired()
+            entries = sorted(self.__heap, reverse=True)
+        return [record for _, _, record in entries]
+
+    def dump(self):
+        """
+        Returns a text with one line per buffered request (slowest first).
+        """
+        return '\n'.join([str(record) for record in self.get_slowest()])
+
+    def clear(self):
+        """
+        Discards the buffered requests.
+        """
+        with self.__lock:
+            del self.__heap[:]
+
+    def __drop_expired(self):
+        if self.max_age is None or len(self.__heap) == 0:
+            return
+        min_started_at = time.time() - self.max_age
+        entries = [entry for entry in self.__heap
+                   if entry[2].started_at >= min_started_at]
+        if len(entries) < len(self.__heap):
+            heapq.heapify(entries)
+            self.__heap = entries
+
+    @staticmethod
+    def __log_record(record):
+        logging.getLogger(__name__).warning('Slow request: %s', record)
+
+    def __repr__(self):
+        str_format = '<%s, threshold: %.3f s, slow requests: %i>'
+        params = (self.__class__.__name__, self.threshold, self.slow_count)
+        return str_format % params
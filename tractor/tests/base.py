@@ -5,10 +5,17 @@ See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
 Created on Jan 06, 2012.
 """
 
+from tractor.server import KeepAliveRequestHandler
+from tractor.server import XmlRpcServer
 from unittest import TestCase
 
 __docformat__ = 'reStructuredText en'
-__all__ = ['BaseTestCase']
+__all__ = ['BaseTestCase',
+           'CountingRequestHandler',
+           'DroppingRequestHandler',
+           'EchoService',
+           'KeepAliveRequestHandler',
+           'LocalXmlRpcServer']
 
 
 class BaseTestCase(TestCase):
@@ -48,3 +55,41 @@ class BaseTestCase(TestCase):
     def tearDown(self):
         self.tear_down()
 
+
+class EchoService(object):
+    """
+    Test service for the :class:`LocalXmlRpcServer`.
+    """
+
+    def echo(self, value):
+        return value
+
+    def fail(self):
+        raise ValueError('Failure.')
+
+
+class CountingRequestHandler(KeepAliveRequestHandler):
+    """
+    Counts the connections opened to the server.
+    """
+
+    connection_count = 0
+
+    def setup(self):
+        KeepAliveRequestHandler.setup(self)
+        CountingRequestHandler.connection_count += 1
+
+
+class DroppingRequestHandler(CountingRequestHandler):
+    """
+    Silently closes the connection after each request (like a server
+    dropping idle keep-alive connections).
+    """
+
+    def handle_one_request(self):
+        CountingRequestHandler.handle_one_request(self)
+        self.close_connection = 1
+
+
+#: The local test server (see :class:`tractor.server.XmlRpcServer`).
+LocalXmlRpcServer = XmlRpcServer
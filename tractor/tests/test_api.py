@@ -5,6 +5,7 @@ See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
 Created on Jan 06, 2012.
 """
 
+from StringIO import StringIO
 from pkg_resources import resource_filename # pylint: disable=E0611
 from tractor import AttachmentWrapper
 from tractor import Base64Converter
@@ -13,6 +14,7 @@ from tractor import create_wrapper_for_ticket_update
 from tractor import make_api
 from tractor import make_api_from_config
 from tractor.api import TractorApi
+from tractor.batch import PendingCall
 from tractor.tests.base import BaseTestCase
 from tractor.ticket import ATTRIBUTE_NAMES
 from tractor.ticket import OwnerAttribute
@@ -20,6 +22,9 @@ from tractor.ticket import RESOLUTION_ATTRIBUTE_VALUES
 from tractor.ticket import ReporterAttribute
 from tractor.ticket import STATUS_ATTRIBUTE_VALUES
 from xmlrpclib import Fault
+import os
+import shutil
+import tempfile
 
 
 class TractorApiTestCase(BaseTestCase):
@@ -73,6 +78,33 @@ class TractorApiTestCase(BaseTestCase):
         self.assert_is_not_none(updated_ticket.time)
         self.assert_is_not_none(updated_ticket.changetime)
 
+    def test_update_changed_attributes(self):
+        api = self.__create_api()
+        ticket_id = api.create_ticket(self.__create_ticket_wrapper())
+        requests = []
+        send_request = api.send_request
+        def record_request(method_name, args):
+            requests.append((method_name, args))
+            return send_request(method_name=method_name, args=args)
+        api.send_request = record_request
+        ticket = api.get_ticket(ticket_id)
+        unchanged_ticket = api.update_ticket(ticket)
+        self.assert_equal(len(requests), 1)
+        self.assert_equal(unchanged_ticket.summary, ticket.summary)
+        with api.batch():
+            call = api.update_ticket(ticket)
+        self.assert_equal(call.result().ticket_id, ticket_id)
+        self.assert_equal(len(requests), 1)
+        ticket.milestone = 'changed milestone'
+        updated_ticket = api.update_ticket(ticket)
+        self.assert_equal(requests[-1][1][2],
+                          dict(milestone='changed milestone'))
+        self.assert_equal(updated_ticket.milestone, 'changed milestone')
+        self.assert_equal(updated_ticket.changed_attributes, set())
+        # A comment is sent even if nothing has changed.
+        api.update_ticket(updated_ticket, comment='Just a comment.')
+        self.assert_equal(requests[-1][1][1:3], ('Just a comment.', dict()))
+
     def test_assign_ticket(self):
         api = self.__create_api()
         t_wrapper = self.__create_ticket_wrapper()
@@ -125,6 +157,28 @@ class TractorApiTestCase(BaseTestCase):
         content = Base64Converter.decode_to_string(binary_content)
         self.assert_equal(content, att.content)
 
+    def test_download_attachment(self):
+        api = self.__create_api()
+        ticket_id = api.create_ticket(self.__create_ticket_wrapper())
+        att = self.__create_attachment_wrapper()
+        file_name = api.add_attachment(ticket_id, att)
+        stream = StringIO()
+        self.assert_equal(api.download_attachment(ticket_id, file_name,
+                                                  stream), len(att.content))
+        self.assert_equal(stream.getvalue(), att.content)
+        target_dir = tempfile.mkdtemp()
+        try:
+            target = os.path.join(target_dir, file_name)
+            api.download_attachment(ticket_id, file_name, target)
+            with open(target, 'rb') as target_file:
+                self.assert_equal(target_file.read(), att.content)
+            missing = os.path.join(target_dir, 'missing.txt')
+            self.assert_raises(Fault, api.download_attachment,
+                               *(ticket_id, 'missing.txt', missing))
+            self.assert_false(os.path.exists(missing))
+        finally:
+            shutil.rmtree(target_dir)
+
     def test_get_all_attachments(self):
         api = self.__create_api()
         t_wrapper = self.__create_ticket_wrapper()
@@ -161,6 +215,39 @@ class TractorApiTestCase(BaseTestCase):
                 self.assert_equal(att.file_name, 'test_file.txt')
                 self.assert_equal(att.description, 'An arbitrary test file.')
 
+    def test_get_all_attachments_chunked_fetch(self):
+        api = self.__create_api()
+        ticket_id = api.create_ticket(self.__create_ticket_wrapper())
+        for i in range(5):
+            att = self.__create_attachment_wrapper(file_name='file%i.txt' % i,
+                                                   content='content %i' % i)
+            api.add_attachment(ticket_id, att)
+        sent_methods = []
+        send_request = api.send_request
+        def record_request(method_name, args):
+            sent_methods.append(method_name)
+            return send_request(method_name, args)
+        api.send_request = record_request
+        att_info = api.get_all_ticket_attachments(ticket_id)
+        attachments = api.get_all_ticket_attachments(ticket_id,
+                                                     fetch_content=True,
+                                                     max_fetch_bytes=20)
+        self.assert_equal([att.file_name for att in attachments],
+                          [att.file_name for att in att_info])
+        for att in attachments:
+            content = Base64Converter.decode_to_string(att.content)
+            self.assert_equal(content, 'content %s' % att.file_name[4])
+        # 2 list requests + 3 multicalls (9 bytes per attachment)
+        self.assert_equal(sent_methods.count('system.multicall'), 3)
+        self.assert_equal(len(sent_methods), 5)
+
+    def test_group_by_size(self):
+        atts = [self.__create_attachment_wrapper(size=size)
+                for size in (5, 5, 30, None, 2, 2)]
+        groups = list(TractorApi._group_by_size(atts, 10)) # pylint: disable=W0212
+        self.assert_equal([[att.size for att in group] for group in groups],
+                          [[5, 5], [30], [None], [2, 2]])
+
     def delete_attachment(self):
         api = self.__create_api()
         t_wrapper = self.__create_ticket_wrapper()
@@ -171,6 +258,93 @@ class TractorApiTestCase(BaseTestCase):
         self.assert_raises(Fault, api.get_attachment,
                            *(ticket_id, file_name))
 
+    def test_batch(self):
+        api = self.__create_api()
+        t_wrapper = self.__create_ticket_wrapper()
+        ticket_id = api.create_ticket(t_wrapper)
+        with api.batch(chunk_size=2) as batch:
+            get_call = api.get_ticket(ticket_id)
+            missing_call = api.get_ticket(ticket_id + 1000)
+            close_call = api.close_ticket(ticket_id,
+                                          RESOLUTION_ATTRIBUTE_VALUES.FIXED)
+            self.assert_true(get_call.done)
+            self.assert_false(close_call.done)
+        self.assert_true(close_call.done)
+        get_ticket = get_call.result()
+        self.assert_true(isinstance(get_ticket, TicketWrapper))
+        self.assert_equal(get_ticket.ticket_id, ticket_id)
+        self.assert_raises(Fault, missing_call.result)
+        self.assert_equal(batch.failed_calls, [missing_call])
+        closed_ticket = close_call.result()
+        self.assert_equal(closed_ticket.status, STATUS_ATTRIBUTE_VALUES.CLOSED)
+        with api.batch():
+            delete_call = api.delete_ticket(ticket_id)
+        self.assert_true(delete_call.result())
+        self.assert_raises(Fault, api.get_ticket, ticket_id)
+
+    def test_batch_error(self):
+        api = self.__create_api()
+        ticket_id = api.create_ticket(self.__create_ticket_wrapper())
+        resolution = RESOLUTION_ATTRIBUTE_VALUES.FIXED
+        error = RuntimeError('Aborted')
+        try:
+            with api.batch():
+                close_call = api.close_ticket(ticket_id, resolution)
+                raise error
+        except RuntimeError as exc:
+            self.assert_true(exc is error)
+        self.assert_true(close_call.done)
+        self.assert_true(close_call.fault is error)
+        self.assert_raises(RuntimeError, close_call.result)
+        self.assert_not_equal(api.get_ticket(ticket_id).status,
+                              STATUS_ATTRIBUTE_VALUES.CLOSED)
+
+    def test_iter_query(self):
+        api = self.__create_api()
+        ticket_ids = [api.create_ticket(self.__create_ticket_wrapper(
+                            summary='Ticket %i' % i,
+                            milestone='qm%i' % (i % 2))) for i in range(9)]
+        tickets = api.iter_query('milestone=qm0', page_size=2)
+        self.assert_false(isinstance(tickets, list))
+        self.assert_equal([ticket.ticket_id for ticket in tickets],
+                          ticket_ids[::2])
+        # The last page is full.
+        tickets = list(api.iter_query('milestone=qm1', page_size=2))
+        self.assert_equal([ticket.ticket_id for ticket in tickets],
+                          ticket_ids[1::2])
+        self.assert_equal(tickets[0].summary, 'Ticket 1')
+        self.assert_equal(list(api.iter_query('milestone=qm2')), [])
+        self.assert_equal(len(list(api.iter_query('milestone=qm0|qm1',
+                                                  page_size=4))), 9)
+        self.assert_raises(ValueError, list, api.iter_query(page_size=0))
+        with api.batch():
+            self.assert_raises(ValueError, list, api.iter_query())
+        # Faults of the read-ahead query are not taken for the end of the
+        # results.
+        submit = api._submit # pylint: disable=W0212
+        def failing_submit(method_name, args, converter=None):
+            if method_name == 'ticket.query' and 'page=2' in args[0]:
+                call = PendingCall(method_name, args)
+                call.set_fault(Fault(500, 'Internal error.'))
+                return call
+            return submit(method_name, args, converter=converter)
+        api._submit = failing_submit # pylint: disable=W0212
+        tickets = api.iter_query('milestone=qm0', page_size=2)
+        self.assert_equal(len([tickets.next() for _ in range(2)]), 2)
+        self.assert_raises(Fault, tickets.next)
+
+    def test_batch_restrictions(self):
+        api = self.__create_api()
+        ticket_id = api.create_ticket(self.__create_ticket_wrapper())
+        with api.batch():
+            self.assert_raises(ValueError, api.batch().__enter__)
+            self.assert_raises(ValueError, api.get_all_ticket_attachments,
+                               *(ticket_id, True))
+            self.assert_raises(ValueError, api.download_attachment,
+                               *(ticket_id, 'file.txt', StringIO()))
+            att_call = api.get_all_ticket_attachments(ticket_id)
+        self.assert_equal(att_call.result(), [])
+
     def test_ticket_id_and_att_file_name_not_none(self):
         api = self.__create_api()
         t_wrapper = self.__create_ticket_wrapper()
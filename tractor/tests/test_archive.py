@@ -0,0 +1,126 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from StringIO import StringIO
+from tractor.archive import CompressionPolicy
+from tractor.archive import ZipArchiveBuilder
+from tractor.tests.base import BaseTestCase
+import gzip
+import os
+import tempfile
+import zipfile
+
+
+class CompressionPolicyTestCase(BaseTestCase):
+
+    def test_get_compress_type(self):
+        policy = CompressionPolicy()
+        self.assert_equal(policy.get_compress_type('log.txt', 'text'),
+                          zipfile.ZIP_DEFLATED)
+        self.assert_equal(policy.get_compress_type('image.PNG', 'text'),
+                          zipfile.ZIP_STORED)
+        self.assert_equal(policy.get_compress_type('data', '\x1f\x8bdata'),
+                          zipfile.ZIP_STORED)
+        self.assert_equal(policy.get_compress_type('lib.jar', ''),
+                          zipfile.ZIP_STORED)
+        policy = CompressionPolicy(overrides={'lib.jar' : zipfile.ZIP_DEFLATED,
+                                              'log.txt' : zipfile.ZIP_STORED})
+        self.assert_equal(policy.get_compress_type('lib.jar', ''),
+                          zipfile.ZIP_DEFLATED)
+        self.assert_equal(policy.get_compress_type('log.txt', 'text'),
+                          zipfile.ZIP_STORED)
+        policy = CompressionPolicy(detect_compressed=False)
+        self.assert_equal(policy.get_compress_type('image.png', '\x89PNG'),
+                          zipfile.ZIP_DEFLATED)
+
+
+class ZipArchiveBuilderTestCase(BaseTestCase):
+
+    def set_up(self):
+        BaseTestCase.set_up(self)
+        self.file_map = dict([('file%i.txt' % i, 'content %i ' % i * 1000)
+                              for i in range(20)])
+
+    def __read_archive(self, archive_file):
+        archive = zipfile.ZipFile(archive_file)
+        self.assert_is_none(archive.testzip())
+        return dict([(zinfo.filename, archive.read(zinfo))
+                     for zinfo in archive.infolist()])
+
+    def test_writestr_compatibility(self):
+        file_map = dict(file1='test stream 1', file2='test stream 2')
+        exp_stream = StringIO()
+        archive = zipfile.ZipFile(exp_stream, 'a', zipfile.ZIP_DEFLATED,
+                                  False)
+        for fn, content in file_map.iteritems():
+            archive.writestr(fn, content)
+        for zfile in archive.filelist:
+            zfile.create_system = 0
+        archive.close()
+        archive_file = ZipArchiveBuilder().build(file_map)
+        self.assert_equal(archive_file.read(), exp_stream.getvalue())
+
+    def test_concurrent_build(self):
+        builder = ZipArchiveBuilder(worker_count=4)
+        archive_file = builder.build(self.file_map)
+        archive = zipfile.ZipFile(archive_file)
+        self.assert_equal([zinfo.filename for zinfo in archive.infolist()],
+                          self.file_map.keys())
+        self.assert_equal(self.__read_archive(archive_file), self.file_map)
+
+    def test_streams_and_files(self):
+        fd, file_path = tempfile.mkstemp()
+        try:
+            os.write(fd, 'file content')
+            os.close(fd)
+            with open(file_path, 'rb') as file_obj:
+                file_map = dict(stream=StringIO('stream content'),
+                                file=file_obj, string='string content')
+                archive_file = ZipArchiveBuilder(worker_count=2).build(
+                                                                    file_map)
+        finally:
+            os.remove(file_path)
+        self.assert_equal(self.__read_archive(archive_file),
+                          dict(stream='stream content', file='file content',
+                               string='string content'))
+        self.assert_raises(TypeError, ZipArchiveBuilder().build, dict(a=1))
+
+    def test_spilling(self):
+        archive_file = ZipArchiveBuilder(spool_threshold=1024).build(
+                                                                self.file_map)
+        self.assert_true(archive_file._rolled) # pylint: disable=W0212
+        self.assert_equal(self.__read_archive(archive_file), self.file_map)
+        archive_file = ZipArchiveBuilder().build(self.file_map)
+        self.assert_false(archive_file._rolled) # pylint: disable=W0212
+
+    def test_compression_level(self):
+        stored_size = len(ZipArchiveBuilder(compression_level=0).build(
+                                                    self.file_map).read())
+        deflated_size = len(ZipArchiveBuilder(compression_level=9).build(
+                                                    self.file_map).read())
+        self.assert_true(deflated_size < stored_size)
+
+    def test_invalid_worker_count(self):
+        self.assert_raises(ValueError, ZipArchiveBuilder, worker_count=0)
+
+    def test_compression_policy(self):
+        gzip_stream = StringIO()
+        gzip_file = gzip.GzipFile(fileobj=gzip_stream, mode='wb')
+        gzip_file.write('content ' * 1000)
+        gzip_file.close()
+        self.file_map['results.gz'] = gzip_stream.getvalue()
+        self.file_map['results.bin'] = gzip_stream.getvalue()
+        self.file_map['empty.txt'] = ''
+        policy = CompressionPolicy(overrides={'file0.txt' : zipfile.ZIP_STORED})
+        archive_file = ZipArchiveBuilder(compression_policy=policy,
+                                         worker_count=2).build(self.file_map)
+        archive = zipfile.ZipFile(archive_file)
+        stored_names = set([zinfo.filename for zinfo in archive.infolist()
+                            if zinfo.compress_type == zipfile.ZIP_STORED])
+        self.assert_equal(stored_names,
+                          set(['results.gz', 'results.bin', 'file0.txt']))
+        self.assert_equal(self.__read_archive(archive_file), self.file_map)
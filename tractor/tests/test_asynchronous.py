@@ -0,0 +1,153 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from tractor.asynchronous import AsyncTractor
+from tractor.attachment import AttachmentWrapper
+from tractor.attachment import Base64Converter
+from tractor.attachment import Base64Stream
+from tractor.batch import PendingCall
+from tractor.server import DummyTracServer
+from tractor.tests.base import BaseTestCase
+from tractor.tests.base import CountingRequestHandler
+from tractor.ticket import RESOLUTION_ATTRIBUTE_VALUES
+from tractor.ticket import STATUS_ATTRIBUTE_VALUES
+from tractor.ticket import TicketWrapper
+from xmlrpclib import Fault
+import os
+import socket
+import tempfile
+
+
+class AsyncTractorTestCase(BaseTestCase):
+
+    def set_up(self):
+        BaseTestCase.set_up(self)
+        CountingRequestHandler.connection_count = 0
+        self.server = DummyTracServer(handler_class=CountingRequestHandler)
+        self.server.start()
+
+    def tear_down(self):
+        self.server.stop()
+        BaseTestCase.tear_down(self)
+
+    def __create_api(self, **kw):
+        return AsyncTractor(self.server.address, 'test_user', 'pw', **kw)
+
+    def __create_ticket_wrapper(self, summary='Async Ticket'):
+        return TicketWrapper(summary=summary,
+                             description='A ticket created asynchronously.')
+
+    def test_ticket_operations(self):
+        api = self.__create_api(max_concurrency=4)
+        create_calls = [api.create_ticket(self.__create_ticket_wrapper(
+                        'Async Ticket %i' % i)) for i in range(12)]
+        self.assert_true(isinstance(create_calls[0], PendingCall))
+        self.assert_true(api.wait(create_calls, timeout=10))
+        ticket_ids = [call.result() for call in create_calls]
+        self.assert_equal(len(set(ticket_ids)), 12)
+        get_calls = [api.get_ticket(ticket_id) for ticket_id in ticket_ids]
+        for i, call in enumerate(get_calls):
+            ticket = call.result()
+            self.assert_true(isinstance(ticket, TicketWrapper))
+            self.assert_equal(ticket.summary, 'Async Ticket %i' % i)
+        self.assert_true(CountingRequestHandler.connection_count <= 4)
+        update_wrapper = TicketWrapper(ticket_id=ticket_ids[0],
+                                       milestone='milestone1')
+        update_call = api.update_ticket(update_wrapper)
+        assign_call = api.assign_ticket(ticket_ids[1], 'another user')
+        close_call = api.close_ticket(ticket_ids[2],
+                                      RESOLUTION_ATTRIBUTE_VALUES.FIXED)
+        delete_call = api.delete_ticket(ticket_ids[3])
+        self.assert_true(api.wait(timeout=10))
+        self.assert_equal(update_call.result().milestone, 'milestone1')
+        self.assert_equal(assign_call.result().owner, 'another user')
+        self.assert_equal(close_call.result().status,
+                          STATUS_ATTRIBUTE_VALUES.CLOSED)
+        self.assert_true(delete_call.result())
+        self.assert_raises(Fault, api.get_ticket(ticket_ids[3]).result)
+        self.assert_equal(api.pending_count, 0)
+
+    def test_attachments(self):
+        api = self.__create_api()
+        ticket_id = api.create_ticket(self.__create_ticket_wrapper()).result()
+        put_calls = [api.add_attachment(ticket_id, AttachmentWrapper(
+                            content='content %i' % i,
+                            file_name='file%i.txt' % i,
+                            description='Attachment %i' % i))
+                     for i in range(3)]
+        self.assert_equal([call.result() for call in put_calls],
+                          ['file0.txt', 'file1.txt', 'file2.txt'])
+        binary = api.get_attachment(ticket_id, 'file1.txt').result()
+        self.assert_equal(Base64Converter.decode_to_string(binary),
+                          'content 1')
+        attachments = api.get_all_ticket_attachments(ticket_id,
+                                                     fetch_content=True).result()
+        self.assert_equal(len(attachments), 3)
+        for att in attachments:
+            content = Base64Converter.decode_to_string(att.content)
+            self.assert_equal(content, 'content %s' % att.file_name[4])
+        empty_id = api.create_ticket(self.__create_ticket_wrapper()).result()
+        self.assert_equal(api.get_all_ticket_attachments(empty_id,
+                                            fetch_content=True).result(), [])
+        self.assert_true(api.delete_attachment(ticket_id, 'file0.txt').result())
+
+    def test_streamed_attachment(self):
+        api = self.__create_api()
+        ticket_id = api.create_ticket(self.__create_ticket_wrapper()).result()
+        content = os.urandom(Base64Stream.CHUNK_SIZE + 10)
+        fd, file_path = tempfile.mkstemp()
+        try:
+            os.write(fd, content)
+            os.close(fd)
+            att = AttachmentWrapper.create_from_file(file_path, 'A file.',
+                                                     file_name='large.bin')
+            self.assert_equal(api.add_attachment(ticket_id, att).result(),
+                              'large.bin')
+        finally:
+            os.remove(file_path)
+        binary = api.get_attachment(ticket_id, 'large.bin').result()
+        self.assert_equal(binary.data, content)
+
+    def test_bounded_attachment_fetch(self):
+        api = self.__create_api(max_concurrency=8)
+        ticket_id = api.create_ticket(self.__create_ticket_wrapper()).result()
+        put_calls = [api.add_attachment(ticket_id, AttachmentWrapper(
+                                content='x' * (i + 1), file_name='f%i' % i,
+                                description='Attachment %i' % i))
+                     for i in range(6)]
+        self.assert_true(api.wait(put_calls, timeout=10))
+        att_info = api.get_all_ticket_attachments(ticket_id).result()
+        call = api.get_all_ticket_attachments(ticket_id, fetch_content=True,
+                                              max_fetch_bytes=4)
+        attachments = call.result()
+        self.assert_equal([att.file_name for att in attachments],
+                          [att.file_name for att in att_info])
+        for att in attachments:
+            self.assert_equal(len(att.content.data), att.size)
+
+    def test_batch(self):
+        api = self.__create_api()
+        ticket_id = api.create_ticket(self.__create_ticket_wrapper()).result()
+        with api.batch() as batch:
+            get_call = api.get_ticket(ticket_id)
+            missing_call = api.get_ticket(ticket_id + 1000)
+        self.assert_equal(get_call.result().ticket_id, ticket_id)
+        self.assert_equal(batch.failed_calls, [missing_call])
+
+    def test_connection_failure(self):
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        address = '%s:%s' % sock.getsockname()
+        sock.close()
+        api = AsyncTractor(address, 'test_user', 'pw')
+        call = api.get_ticket(1)
+        self.assert_true(api.wait([call], timeout=10))
+        self.assert_true(isinstance(call.fault, socket.error))
+
+    def test_invalid_concurrency(self):
+        self.assert_raises(ValueError, AsyncTractor,
+                           *('localhost', 'user', 'pw', 0))
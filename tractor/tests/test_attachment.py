@@ -9,8 +9,12 @@ from StringIO import StringIO
 from datetime import datetime
 from tractor.attachment import AttachmentWrapper
 from tractor.attachment import Base64Converter
+from tractor.attachment import Base64Stream
 from tractor.tests.base import BaseTestCase
 from xmlrpclib import Binary
+import base64
+import os
+import tempfile
 import zipfile
 
 
@@ -137,3 +141,60 @@ class AttachmentTestCase(BaseTestCase):
         self.init_data['content'] = 1
         att = AttachmentWrapper(**self.init_data)
         self.assert_raises(TypeError, att.get_base64_data_for_upload)
+
+    def test_create_from_file(self):
+        fd, file_path = tempfile.mkstemp(suffix='.txt')
+        try:
+            os.write(fd, 'file content')
+            os.close(fd)
+            att = AttachmentWrapper.create_from_file(file_path, 'A file.')
+            self.assert_equal(att.file_name, os.path.basename(file_path))
+            self.assert_equal(att.size, 12)
+            self.assert_is_none(att.content)
+            base64_data = att.get_base64_data_for_upload()
+            self.assert_true(isinstance(base64_data, Base64Stream))
+            self.assert_equal(base64_data.data, 'file content')
+            with open(file_path, 'rb') as file_obj:
+                att = AttachmentWrapper(content=file_obj, file_name='f.txt',
+                                        description='A file object.')
+                base64_data = att.get_base64_data_for_upload()
+                self.assert_equal(base64_data.data, 'file content')
+        finally:
+            os.remove(file_path)
+
+
+class Base64StreamTestCase(BaseTestCase):
+
+    def set_up(self):
+        BaseTestCase.set_up(self)
+        self.content = os.urandom(Base64Stream.CHUNK_SIZE * 2 + 10)
+        fd, self.file_path = tempfile.mkstemp()
+        os.write(fd, self.content)
+        os.close(fd)
+
+    def tear_down(self):
+        os.remove(self.file_path)
+        BaseTestCase.tear_down(self)
+
+    def test_file_path(self):
+        stream = Base64Stream(self.file_path)
+        exp_encoded = base64.b64encode(self.content)
+        self.assert_equal(stream.size, len(self.content))
+        self.assert_equal(stream.encoded_size, len(exp_encoded))
+        chunks = list(stream)
+        self.assert_equal(len(chunks), 3)
+        self.assert_equal(''.join(chunks), exp_encoded)
+        # Streams can be iterated repeatedly.
+        self.assert_equal(''.join(stream), exp_encoded)
+        self.assert_equal(stream.data, self.content)
+
+    def test_file_object(self):
+        with open(self.file_path, 'rb') as file_obj:
+            file_obj.seek(100)
+            stream = Base64Stream(file_obj)
+            self.assert_equal(stream.size, len(self.content) - 100)
+            self.assert_equal(''.join(stream),
+                              base64.b64encode(self.content[100:]))
+            self.assert_equal(''.join(stream),
+                              base64.b64encode(self.content[100:]))
+            self.assert_false(file_obj.closed)
@@ -0,0 +1,105 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from tractor.batch import Batch
+from tractor.batch import PendingCall
+from tractor.tests.base import BaseTestCase
+from xmlrpclib import Fault
+
+
+class PendingCallTestCase(BaseTestCase):
+
+    def test_set_result(self):
+        call = PendingCall('ticket.get', (1,), converter=lambda value: value * 2)
+        self.assert_false(call.done)
+        self.assert_raises(ValueError, call.result)
+        call.set_result(21)
+        self.assert_true(call.done)
+        self.assert_is_none(call.fault)
+        self.assert_equal(call.result(), 42)
+
+    def test_set_fault(self):
+        call = PendingCall('ticket.get', (1,))
+        fault = Fault(faultCode=2, faultString='Ticket 1 does not exist.')
+        call.set_fault(fault)
+        self.assert_true(call.done)
+        self.assert_equal(call.fault, fault)
+        self.assert_raises(Fault, call.result)
+
+    def test_converter_error(self):
+        call = PendingCall('ticket.get', (1,), converter=lambda value: 1 / 0)
+        call.set_result(1)
+        self.assert_true(isinstance(call.fault, ZeroDivisionError))
+        self.assert_raises(ZeroDivisionError, call.result)
+
+    def test_done_callbacks(self):
+        completed = []
+        call = PendingCall('ticket.get', (1,))
+        call.add_done_callback(completed.append)
+        self.assert_equal(completed, [])
+        call.set_result(1)
+        self.assert_equal(completed, [call])
+        call.add_done_callback(completed.append)
+        self.assert_equal(completed, [call, call])
+
+    def test_resolver(self):
+        call = PendingCall('ticket.get', (1,),
+                           resolver=lambda: call.set_result(3))
+        self.assert_equal(call.result(), 3)
+
+
+class BatchTestCase(BaseTestCase):
+
+    def set_up(self):
+        BaseTestCase.set_up(self)
+        self.chunks = []
+
+    def __multicall(self, calls):
+        self.chunks.append(list(calls))
+        for call in calls:
+            if call.args[0] < 0:
+                call.set_fault(Fault(faultCode=2, faultString='Invalid'))
+            else:
+                call.set_result(call.args[0])
+
+    def test_chunking(self):
+        batch = Batch(self.__multicall, chunk_size=2)
+        calls = [batch.add('ticket.get', (i,)) for i in range(5)]
+        self.assert_equal(len(self.chunks), 2)
+        self.assert_equal(batch.pending_count, 1)
+        self.assert_false(calls[-1].done)
+        batch.flush()
+        self.assert_equal([len(chunk) for chunk in self.chunks], [2, 2, 1])
+        self.assert_equal([call.result() for call in calls], range(5))
+
+    def test_result_flushes(self):
+        batch = Batch(self.__multicall, chunk_size=10)
+        call = batch.add('ticket.get', (7,))
+        self.assert_equal(self.chunks, [])
+        self.assert_equal(call.result(), 7)
+        self.assert_equal(batch.pending_count, 0)
+
+    def test_failed_calls(self):
+        batch = Batch(self.__multicall)
+        batch.add('ticket.get', (1,))
+        failed_call = batch.add('ticket.get', (-1,))
+        batch.flush()
+        self.assert_equal(batch.failed_calls, [failed_call])
+
+    def test_abort(self):
+        batch = Batch(self.__multicall, chunk_size=2)
+        calls = [batch.add('ticket.get', (i,)) for i in range(3)]
+        error = RuntimeError('Aborted')
+        batch.abort(error)
+        self.assert_equal(len(self.chunks), 1)
+        self.assert_equal(batch.pending_count, 0)
+        self.assert_equal(calls[0].result(), 0)
+        self.assert_true(calls[2].fault is error)
+        self.assert_equal(batch.failed_calls, [calls[2]])
+
+    def test_invalid_chunk_size(self):
+        self.assert_raises(ValueError, Batch, self.__multicall, 0)
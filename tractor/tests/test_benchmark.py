@@ -0,0 +1,81 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from tractor.benchmark import BENCHMARK_NAMES
+from tractor.benchmark import BenchmarkResult
+from tractor.benchmark import BenchmarkSuite
+from tractor.benchmark import compare_results
+from tractor.benchmark import load_results
+from tractor.benchmark import write_results
+from tractor.tests.base import BaseTestCase
+import os
+import shutil
+import tempfile
+
+
+class BenchmarkTestCase(BaseTestCase):
+
+    def set_up(self):
+        BaseTestCase.set_up(self)
+        self.directory = tempfile.mkdtemp()
+
+    def tear_down(self):
+        shutil.rmtree(self.directory)
+        BaseTestCase.tear_down(self)
+
+    def test_result(self):
+        result = BenchmarkResult('get_ticket', 'dummy', 4, None, 1,
+                                 [0.4, 0.1, 0.3, 0.2], 2)
+        self.assert_equal(result.operations_per_second, 2)
+        self.assert_almost_equal(result.mean_latency, 0.25)
+        self.assert_equal(result.get_percentile(0.5), 0.2)
+        self.assert_equal(result.get_percentile(0.95), 0.4)
+        result_map = result.to_dict()
+        self.assert_equal(result_map['operations'], 4)
+        self.assert_equal(result_map['max_latency'], 0.4)
+        self.assert_equal(result.key, ('get_ticket', 'dummy', 4, None, 1))
+
+    def test_run(self):
+        suite = BenchmarkSuite(ticket_counts=(3,), attachment_sizes=(100,),
+                               concurrency_levels=(1, 2))
+        reported = []
+        results = suite.run(callback=reported.append)
+        self.assert_equal(reported, results)
+        keys = set([result.key for result in results])
+        for name in BENCHMARK_NAMES:
+            if 'attachment' in name:
+                attachment_size = 100
+            else:
+                attachment_size = None
+            # The dummy trac is not thread-safe.
+            self.assert_true((name, 'dummy', 3, attachment_size, 1) in keys)
+            self.assert_false((name, 'dummy', 3, attachment_size, 2) in keys)
+            for concurrency in (1, 2):
+                self.assert_true((name, 'http', 3, attachment_size,
+                                  concurrency) in keys)
+        for result in results:
+            self.assert_equal(len(result.latencies), 3)
+
+    def test_results_file(self):
+        suite = BenchmarkSuite(names=('get_ticket',), backends=('dummy',),
+                               ticket_counts=(2,))
+        results = suite.run()
+        path = os.path.join(self.directory, 'results.json')
+        write_results(results, path, settings=suite.settings)
+        result_maps = load_results(path)
+        self.assert_equal(result_maps, [result.to_dict()
+                                        for result in results])
+        baseline_map = dict(result_maps[0], mean_latency=0.002)
+        current_map = dict(result_maps[0], mean_latency=0.001)
+        comparisons = compare_results([baseline_map], [current_map])
+        self.assert_equal(comparisons, [(('get_ticket', 'dummy', 2, None, 1),
+                                         0.002, 0.001, -0.5)])
+        self.assert_equal(compare_results([], [current_map]), [])
+
+    def test_invalid_names(self):
+        self.assert_raises(ValueError, BenchmarkSuite, names=('unknown',))
+        self.assert_raises(ValueError, BenchmarkSuite, backends=('unknown',))
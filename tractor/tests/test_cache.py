@@ -0,0 +1,136 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from datetime import datetime
+from datetime import timedelta
+from tractor import make_api
+from tractor.cache import TicketCache
+from tractor.factory import TractorConfig
+from tractor.tests.base import BaseTestCase
+from tractor.ticket import TicketWrapper
+from xmlrpclib import Fault
+import time
+
+
+class TicketCacheTestCase(BaseTestCase):
+
+    def set_up(self):
+        BaseTestCase.set_up(self)
+        self.changetime = datetime(2026, 10, 17, 12, 0, 0)
+        self.since_values = []
+
+    def __create_ticket(self, ticket_id, summary='Cached ticket',
+                        changetime=None):
+        if changetime is None:
+            changetime = self.changetime
+        return TicketWrapper(ticket_id=ticket_id, summary=summary,
+                             changetime=changetime)
+
+    def __get_recent_changes(self, changed_ids):
+        def get_recent_changes(since):
+            self.since_values.append(since)
+            return changed_ids
+        return get_recent_changes
+
+    def test_get_and_put(self):
+        cache = TicketCache(max_size=10)
+        self.assert_is_none(cache.get(1))
+        cache.put(self.__create_ticket(1))
+        ticket = cache.get(1)
+        self.assert_equal(ticket.summary, 'Cached ticket')
+        ticket.summary = 'Modified'
+        self.assert_equal(cache.get(1).summary, 'Cached ticket')
+        # Older versions do not replace newer ones.
+        cache.put(self.__create_ticket(1, summary='Old',
+                    changetime=self.changetime - timedelta(0, 10)))
+        self.assert_equal(cache.get(1).summary, 'Cached ticket')
+        cache.put(self.__create_ticket(1, summary='New',
+                    changetime=self.changetime + timedelta(0, 10)))
+        self.assert_equal(cache.get(1).summary, 'New')
+        cache.invalidate(1)
+        self.assert_is_none(cache.get(1))
+        stats = cache.statistics
+        self.assert_equal(stats['hits'], 4)
+        self.assert_equal(stats['misses'], 2)
+        self.assert_equal(stats['hit_ratio'], 4 / 6.0)
+        self.assert_equal(stats['size'], 0)
+
+    def test_lru_eviction(self):
+        cache = TicketCache(max_size=2)
+        cache.put(self.__create_ticket(1))
+        cache.put(self.__create_ticket(2))
+        cache.get(1)
+        cache.put(self.__create_ticket(3))
+        self.assert_is_none(cache.get(2))
+        self.assert_is_not_none(cache.get(1))
+        self.assert_is_not_none(cache.get(3))
+        self.assert_equal(len(cache), 2)
+        self.assert_equal(cache.statistics['evictions'], 1)
+        cache.clear()
+        self.assert_equal(len(cache), 0)
+
+    def test_revalidation(self):
+        cache = TicketCache(ttl=0, clock_skew=30)
+        before = datetime.utcnow()
+        for ticket_id in (1, 2, 3):
+            cache.put(self.__create_ticket(ticket_id))
+        time.sleep(0.01)
+        self.assert_is_not_none(cache.get(1, self.__get_recent_changes([2])))
+        self.assert_equal(len(self.since_values), 1)
+        self.assert_true(self.since_values[0] <= before - timedelta(0, 29))
+        self.assert_equal(cache.statistics['revalidations'], 1)
+        # Ticket 2 has changed, ticket 3 has been revalidated as well.
+        self.assert_equal(len(cache), 2)
+        time.sleep(0.01)
+        self.assert_is_none(cache.get(3, self.__get_recent_changes([3])))
+        time.sleep(0.01)
+        self.assert_is_none(cache.get(1))
+        self.assert_equal(len(cache), 0)
+
+    def test_invalid_size(self):
+        self.assert_raises(ValueError, TicketCache, max_size=0)
+
+
+class CachingTractorTestCase(BaseTestCase):
+
+    def __create_api(self, **kw):
+        return make_api(realm='http://mycompany.com/mytrac/login/xmlrpc',
+                        username='test_user', password='password',
+                        load_dummy=True, **kw)
+
+    def test_cached_ticket_operations(self):
+        api = self.__create_api(cache_size=10)
+        ticket_id = api.create_ticket(TicketWrapper(summary='Cached',
+                                                    description='Test.'))
+        ticket = api.get_ticket(ticket_id)
+        self.assert_equal(api.ticket_cache.statistics['misses'], 1)
+        self.assert_equal(api.get_ticket(ticket_id).summary, ticket.summary)
+        self.assert_equal(api.ticket_cache.statistics['hits'], 1)
+        api.update_ticket(TicketWrapper(ticket_id=ticket_id,
+                                        milestone='cached milestone'))
+        self.assert_equal(api.get_ticket(ticket_id).milestone,
+                          'cached milestone')
+        self.assert_equal(api.ticket_cache.statistics['hits'], 2)
+        api.assign_ticket(ticket_id, 'another user')
+        self.assert_equal(api.get_ticket(ticket_id).owner, 'another user')
+        with api.batch():
+            call = api.get_ticket(ticket_id)
+        self.assert_equal(call.result().owner, 'another user')
+        api.delete_ticket(ticket_id)
+        self.assert_raises(Fault, api.get_ticket, ticket_id)
+
+    def test_disabled_cache(self):
+        self.assert_is_none(self.__create_api().ticket_cache)
+
+    def test_config(self):
+        cnf = TractorConfig()
+        cnf.parse('[tractor]\nrealm = mytrac\nusername = user\n'
+                  'password = pw\nload_dummy = True\ncache_size = 50\n'
+                  'cache_ttl = 30\n')
+        api = make_api(**cnf.settings)
+        self.assert_equal(api.ticket_cache.max_size, 50)
+        self.assert_equal(api.ticket_cache.ttl, 30.0)
@@ -0,0 +1,135 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from tractor import make_api
+from tractor.api import Tractor
+from tractor.asynchronous import AsyncTractor
+from tractor.deadline import Deadline
+from tractor.deadline import RequestTimeout
+from tractor.tests.base import BaseTestCase
+from tractor.tests.base import LocalXmlRpcServer
+from tractor.ticket import TicketWrapper
+import time
+
+
+class SlowService(object):
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+        return seconds
+
+
+class QuietXmlRpcServer(LocalXmlRpcServer):
+
+    def handle_error(self, request, client_address):
+        # Timed out clients close their connection before the response has
+        # been sent.
+        pass
+
+
+class DeadlineTestCase(BaseTestCase):
+
+    def test_deadline(self):
+        deadline = Deadline(10)
+        self.assert_false(deadline.is_expired)
+        self.assert_true(9 < deadline.remaining <= 10)
+        self.assert_equal(deadline.get_timeout(1), 1)
+        self.assert_true(deadline.get_timeout() > 9)
+        deadline.check()
+        expired = Deadline(-1)
+        self.assert_true(expired.is_expired)
+        self.assert_equal(expired.remaining, 0)
+        self.assert_raises(RequestTimeout, expired.check)
+        self.assert_raises(RequestTimeout, expired.get_timeout, 1)
+        self.assert_true(Deadline.get_earliest([None, deadline, expired])
+                         is expired)
+        self.assert_is_none(Deadline.get_earliest([None]))
+
+
+class ApiDeadlineTestCase(BaseTestCase):
+
+    def set_up(self):
+        BaseTestCase.set_up(self)
+        self.api = make_api(realm='http://mycompany.com/mytrac/login/xmlrpc',
+                            username='test_user', password='password',
+                            load_dummy=True)
+        self.ticket_id = self.api.create_ticket(
+                TicketWrapper(summary='Deadline', description='Test.'))
+
+    def test_expired_deadline(self):
+        with self.api.deadline(10) as deadline:
+            self.assert_equal(self.api.get_ticket(self.ticket_id).summary,
+                              'Deadline')
+            # Nested deadlines cannot extend the outer one.
+            with self.api.deadline(20) as inner_deadline:
+                self.assert_true(inner_deadline is deadline)
+        with self.api.deadline(0):
+            self.assert_raises(RequestTimeout, self.api.get_ticket,
+                               self.ticket_id)
+        self.assert_is_none(self.api._get_deadline())
+        self.assert_equal(self.api.get_ticket(self.ticket_id).summary,
+                          'Deadline')
+
+    def test_batch_deadline(self):
+        def submit_late_batch():
+            with self.api.batch():
+                with self.api.deadline(0.01):
+                    call = self.api.get_ticket(self.ticket_id)
+                self.assert_is_not_none(call.deadline)
+                other_call = self.api.get_ticket(self.ticket_id)
+                self.assert_is_none(other_call.deadline)
+                time.sleep(0.02)
+            return call
+        self.assert_raises(RequestTimeout, submit_late_batch)
+        with self.api.deadline(10):
+            with self.api.batch():
+                call = self.api.get_ticket(self.ticket_id)
+        self.assert_equal(call.result().summary, 'Deadline')
+
+
+class RemoteDeadlineTestCase(BaseTestCase):
+
+    def set_up(self):
+        BaseTestCase.set_up(self)
+        self.server = QuietXmlRpcServer(SlowService())
+        self.server.start()
+
+    def tear_down(self):
+        self.server.stop()
+        BaseTestCase.tear_down(self)
+
+    def test_read_timeout(self):
+        api = Tractor(self.server.address, 'test_user', 'pw',
+                      read_timeout=0.1)
+        start_time = time.time()
+        self.assert_raises(RequestTimeout, api.send_request, 'sleep', (0.5,))
+        self.assert_true(time.time() - start_time < 0.4)
+        # The connection is replaced.
+        self.assert_equal(api.send_request('sleep', (0,)), 0)
+
+    def test_deadline(self):
+        api = Tractor(self.server.address, 'test_user', 'pw',
+                      read_timeout=10, pool_size=1)
+        with api.deadline(0.1):
+            self.assert_raises(RequestTimeout, api.send_request, 'sleep',
+                               (0.5,))
+        self.assert_equal(api.send_request('sleep', (0.01,)), 0.01)
+
+    def test_async_deadline(self):
+        api = AsyncTractor(self.server.address, 'test_user', 'pw',
+                           max_concurrency=1)
+        with api.deadline(0.1):
+            self.assert_raises(RequestTimeout, api.send_request, 'sleep',
+                               (0.5,))
+            # Queued calls expire as well.
+            calls = [api._submit('sleep', (0.5,)) for _ in range(2)]
+        api.wait(calls)
+        for call in calls:
+            self.assert_true(isinstance(call.fault, RequestTimeout))
+        self.assert_equal(api.pending_count, 0)
+        self.assert_equal(api.send_request('sleep', (0,)), 0)
+        api.close()
@@ -8,6 +8,7 @@ Created on Jan 06, 2012.
 from StringIO import StringIO
 from tractor.attachment import AttachmentWrapper
 from tractor.dummy import DummyAttachment
+from tractor.dummy import DummyConnection
 from tractor.dummy import DummyTicket
 from tractor.dummy import DummyTrac
 from tractor.dummy import GET_ONLY_USER
@@ -357,6 +358,26 @@ class DummyTracTestCase(BaseTestCase):
         self.assert_raises(Fault, trac.delete, ticket_id)
         self.assert_raises(TypeError, trac.delete, None)
 
+    def test_query(self):
+        trac = self.__alter_to_trac_with_all_permissions()
+        ticket_ids = []
+        for i in range(5):
+            ticket = self.__create_ticket_wrapper(milestone='m%i' % (i % 2))
+            create_attrs = ticket.get_value_map_for_ticket_creation()
+            ticket_ids.append(trac.create(ticket.summary, ticket.description,
+                                          create_attrs, True))
+        self.assert_equal(trac.query(), ticket_ids)
+        self.assert_equal(trac.query('milestone=m1'), ticket_ids[1::2])
+        self.assert_equal(trac.query('milestone!=m1'), ticket_ids[::2])
+        self.assert_equal(trac.query('milestone=m0|m1&id!=1'), ticket_ids[1:])
+        self.assert_equal(trac.query('max=2&page=3'), ticket_ids[4:])
+        self.assert_equal(trac.query('status=closed'), [])
+        self.assert_raises(Fault, trac.query, 'max=2&page=4')
+        self.assert_raises(Fault, trac.query, 'invalid')
+        self.assert_raises(TypeError, trac.query, None)
+        trac = self.__alter_to_trac_with_invalid_connection(trac)
+        self.assert_raises(ProtocolError, trac.query)
+
     def test_putAttachment(self):
         ticket = self.__create_ticket_wrapper()
         create_attrs = ticket.get_value_map_for_ticket_creation()
@@ -507,3 +528,22 @@ class DummyTracTestCase(BaseTestCase):
         self.assert_raises(Fault, trac.deleteAttachment, *(2, file_name))
         self.assert_raises(Fault, trac.deleteAttachment, *(1, 'fn'))
 
+
+class DummySystemTestCase(BaseTestCase):
+
+    def test_multicall(self):
+        url = 'http://%s:%s@%s' % ('user1', INVALID_PASSWORD, 'mytrac')
+        conn = DummyConnection(is_valid_connection=True, get_only=False,
+                               url=url)
+        ticket = TicketWrapper(summary='dummy test ticket',
+                               description='This is a dummy test ticket.')
+        create_attrs = ticket.get_value_map_for_ticket_creation()
+        ticket_id = conn.ticket.create(ticket.summary, ticket.description,
+                                       create_attrs, True)
+        signatures = [dict(methodName='ticket.get', params=[ticket_id]),
+                      dict(methodName='ticket.get', params=[ticket_id + 1])]
+        results = conn.system.multicall(signatures)
+        self.assert_equal(len(results), 2)
+        self.assert_equal(results[0], [conn.ticket.get(ticket_id)])
+        self.assert_equal(results[1]['faultCode'], 2)
+        self.assert_true(results[1].has_key('faultString'))
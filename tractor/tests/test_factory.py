@@ -0,0 +1,39 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from tractor.api import DummyTractor
+from tractor.api import Tractor
+from tractor.factory import TractorConfig
+from tractor.factory import make_api
+from tractor.tests.base import BaseTestCase
+from tractor.ticket import TicketWrapper
+
+
+class MakeApiTestCase(BaseTestCase):
+
+    def set_up(self):
+        BaseTestCase.set_up(self)
+        self.settings = dict(realm='http://mycompany.com/mytrac/login/xmlrpc',
+                             username='test_user', password='password')
+
+    def test_transport_keys(self):
+        config = TractorConfig()
+        config.parse('[tractor]\nrealm = %(realm)s\nusername = %(username)s\n'
+                     'password = %(password)s\nconnect_timeout = 2\n'
+                     'read_timeout = 5\nmax_idle_time = 30\npool_size = 2\n'
+                     % self.settings)
+        settings = config.settings
+        self.assert_equal(settings['read_timeout'], 5.0)
+        self.assert_equal(settings['max_idle_time'], 30.0)
+        api = make_api(**dict(settings))
+        self.assert_true(isinstance(api, Tractor))
+        # The dummy ignores the transport settings.
+        api = make_api(load_dummy=True, **dict(settings))
+        self.assert_true(isinstance(api, DummyTractor))
+        ticket_id = api.create_ticket(TicketWrapper(summary='Factory',
+                                                    description='Test.'))
+        self.assert_equal(api.get_ticket(ticket_id).summary, 'Factory')
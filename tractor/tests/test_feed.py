@@ -0,0 +1,149 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from datetime import datetime
+from datetime import timedelta
+from threading import Event
+from tractor import make_api
+from tractor.api import Tractor
+from tractor.batch import PendingCall
+from tractor.feed import ChangeFeed
+from tractor.feed import is_not_found_fault
+from tractor.feed import to_datetime
+from tractor.server import DummyTracServer
+from tractor.tests.base import BaseTestCase
+from tractor.ticket import TicketWrapper
+from xmlrpclib import DateTime
+from xmlrpclib import Fault
+import os
+import shutil
+import tempfile
+
+
+class ChangeFeedTestCase(BaseTestCase):
+
+    def set_up(self):
+        BaseTestCase.set_up(self)
+        self.api = make_api(realm='http://mycompany.com/mytrac/login/xmlrpc',
+                            username='test_user', password='password',
+                            load_dummy=True)
+        self.start_time = datetime.utcnow()
+        self.state_dir = tempfile.mkdtemp()
+
+    def tear_down(self):
+        shutil.rmtree(self.state_dir)
+        BaseTestCase.tear_down(self)
+
+    def __create_ticket(self, summary):
+        return self.api.create_ticket(TicketWrapper(summary=summary,
+                                                    description='Test.'))
+
+    def test_to_datetime(self):
+        self.assert_equal(to_datetime(DateTime('20261017T12:30:05')),
+                          datetime(2026, 10, 17, 12, 30, 5))
+        self.assert_equal(to_datetime(self.start_time), self.start_time)
+
+    def test_poll(self):
+        feed = ChangeFeed(self.api, since=self.start_time, min_interval=1,
+                          max_interval=4, batch_size=2)
+        delivered = []
+        feed.add_callback(delivered.append)
+        ticket_ids = [self.__create_ticket('Feed %i' % i) for i in range(3)]
+        tickets = feed.poll()
+        self.assert_equal([ticket.ticket_id for ticket in tickets], ticket_ids)
+        self.assert_equal(delivered, tickets)
+        self.assert_equal(feed.interval, 1)
+        self.assert_equal(feed.high_water_mark, tickets[-1].changetime)
+        # Tickets at the high-water mark are not delivered twice.
+        self.assert_equal(feed.poll(), [])
+        self.assert_equal(feed.interval, 2)
+        feed.poll()
+        feed.poll()
+        self.assert_equal(feed.interval, 4)
+        self.api.update_ticket(TicketWrapper(ticket_id=ticket_ids[1],
+                                             milestone='feed milestone'))
+        self.api.delete_ticket(ticket_ids[2])
+        tickets = feed.poll()
+        self.assert_equal([ticket.ticket_id for ticket in tickets],
+                          [ticket_ids[1]])
+        self.assert_equal(tickets[0].milestone, 'feed milestone')
+        self.assert_equal(feed.interval, 1)
+
+    def test_failed_ticket(self):
+        feed = ChangeFeed(self.api, since=self.start_time)
+        ticket_id = self.__create_ticket('Forbidden')
+        get_ticket = self.api.get_ticket
+        def failing_get_ticket(ticket_id):
+            call = PendingCall('ticket.get', (ticket_id,))
+            call.set_fault(Fault(403, 'TICKET_VIEW privileges are required.'))
+            return call
+        self.api.get_ticket = failing_get_ticket
+        self.assert_raises(Fault, feed.poll)
+        # The ticket is delivered by the next successful poll.
+        self.assert_equal(feed.high_water_mark, self.start_time)
+        self.api.get_ticket = get_ticket
+        self.assert_true(ticket_id in [ticket.ticket_id
+                                       for ticket in feed.poll()])
+
+    def test_is_not_found_fault(self):
+        self.assert_true(is_not_found_fault(Fault(404, 'Not found.')))
+        self.assert_true(is_not_found_fault(
+                            Fault(2, "'Ticket 3 does not exist.' while "
+                                     "executing ticket.get()")))
+        self.assert_false(is_not_found_fault(Fault(403, 'Forbidden.')))
+        self.assert_false(is_not_found_fault(None))
+
+    def test_persisted_high_water_mark(self):
+        state_file = os.path.join(self.state_dir, 'feed.json')
+        feed = ChangeFeed(self.api, since=self.start_time,
+                          state_file=state_file)
+        ticket_id = self.__create_ticket('Persisted feed')
+        self.assert_equal(len(feed.poll()), 1)
+        self.assert_true(os.path.exists(state_file))
+        restarted_feed = ChangeFeed(self.api, state_file=state_file)
+        self.assert_equal(restarted_feed.high_water_mark,
+                          feed.high_water_mark)
+        self.assert_equal(restarted_feed.poll(), [])
+        self.api.assign_ticket(ticket_id, 'another user')
+        self.assert_equal([ticket.owner for ticket in restarted_feed.poll()],
+                          ['another user'])
+
+    def test_iter_changes(self):
+        feed = ChangeFeed(self.api, since=self.start_time, min_interval=0.01,
+                          max_interval=0.02)
+        ticket_ids = [self.__create_ticket('Iter %i' % i) for i in range(2)]
+        stop_event = Event()
+        received = []
+        for ticket in feed.iter_changes(stop_event=stop_event):
+            received.append(ticket.ticket_id)
+            if len(received) == 2:
+                stop_event.set()
+        self.assert_equal(received, ticket_ids)
+        stop_event = Event()
+        stop_event.set()
+        feed.run(stop_event=stop_event)
+
+    def test_invalid_intervals(self):
+        self.assert_raises(ValueError, ChangeFeed,
+                           *(self.api, None, None, 0))
+        self.assert_raises(ValueError, ChangeFeed,
+                           *(self.api, None, None, 5, 1))
+
+    def test_remote_feed(self):
+        server = DummyTracServer()
+        server.start()
+        try:
+            api = Tractor(server.address, 'test_user', 'pw')
+            feed = ChangeFeed(api, since=self.start_time - timedelta(0, 1))
+            ticket_id = api.create_ticket(TicketWrapper(summary='Remote',
+                                                        description='Test.'))
+            # The dummy trac is shared with other tests.
+            self.assert_true(ticket_id in [ticket.ticket_id
+                                           for ticket in feed.poll()])
+            self.assert_equal(feed.poll(), [])
+        finally:
+            server.stop()
@@ -0,0 +1,56 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from threading import Thread
+from tractor.fileutils import REPLACED_FILE_MODE
+from tractor.fileutils import replace_file
+from tractor.tests.base import BaseTestCase
+import os
+import shutil
+import stat
+import tempfile
+
+
+class ReplaceFileTestCase(BaseTestCase):
+
+    def set_up(self):
+        BaseTestCase.set_up(self)
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'state.json')
+
+    def tear_down(self):
+        shutil.rmtree(self.directory)
+        BaseTestCase.tear_down(self)
+
+    def __read(self):
+        with open(self.path, 'rb') as fp:
+            return fp.read()
+
+    def test_replace_file(self):
+        replace_file(self.path, 'first')
+        replace_file(self.path, 'second')
+        self.assert_equal(self.__read(), 'second')
+        self.assert_equal(stat.S_IMODE(os.stat(self.path).st_mode),
+                          REPLACED_FILE_MODE)
+        self.assert_equal(os.listdir(self.directory), ['state.json'])
+
+    def test_failed_write(self):
+        replace_file(self.path, 'first')
+        self.assert_raises(TypeError, replace_file, self.path, None)
+        self.assert_equal(self.__read(), 'first')
+        self.assert_equal(os.listdir(self.directory), ['state.json'])
+
+    def test_concurrent_writers(self):
+        contents = ['%i' % (i) * 10000 for i in range(10)]
+        threads = [Thread(target=replace_file, args=(self.path, content))
+                   for content in contents]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assert_true(self.__read() in contents)
+        self.assert_equal(os.listdir(self.directory), ['state.json'])
@@ -0,0 +1,148 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from threading import Lock
+from threading import Thread
+from tractor import make_api
+from tractor.deadline import Deadline
+from tractor.deadline import RequestTimeout
+from tractor.factory import TractorConfig
+from tractor.governor import RequestGovernor
+from tractor.governor import configure_governor
+from tractor.governor import get_governor
+from tractor.governor import remove_governor
+from tractor.tests.base import BaseTestCase
+from tractor.ticket import TicketWrapper
+import time
+
+
+class RequestGovernorTestCase(BaseTestCase):
+
+    def test_rate_limit(self):
+        governor = RequestGovernor(rate=20, burst=2)
+        start_time = time.time()
+        for _ in range(4):
+            with governor.request():
+                pass
+        # The burst is sent at once, the other requests wait for tokens.
+        self.assert_true(time.time() - start_time >= 0.08)
+        self.assert_equal(governor.statistics['requests'], 4)
+        self.assert_equal(governor.statistics['throttled'], 2)
+        self.assert_raises(ValueError, RequestGovernor, rate=0)
+
+    def test_max_in_flight(self):
+        governor = RequestGovernor(max_in_flight=2)
+        state = dict(in_flight=0, max_in_flight=0)
+        lock = Lock()
+        def send_request():
+            with governor.request():
+                with lock:
+                    state['in_flight'] += 1
+                    state['max_in_flight'] = max(state['max_in_flight'],
+                                                 state['in_flight'])
+                time.sleep(0.02)
+                with lock:
+                    state['in_flight'] -= 1
+        threads = [Thread(target=send_request) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assert_equal(state['max_in_flight'], 2)
+        self.assert_equal(governor.in_flight, 0)
+
+    def test_deadline(self):
+        governor = RequestGovernor(max_in_flight=1)
+        governor.acquire()
+        self.assert_raises(RequestTimeout, governor.acquire,
+                           deadline=Deadline(0.05))
+        governor.release(0)
+        governor.acquire(deadline=Deadline(0.05))
+        self.assert_equal(governor.in_flight, 1)
+
+    def test_adaptive_limit(self):
+        governor = RequestGovernor(max_in_flight=8, target_latency=0.1)
+        self.assert_equal(governor.concurrency_limit, 8)
+        governor.acquire()
+        governor.release(0.5)
+        self.assert_equal(governor.concurrency_limit, 4)
+        # Slow responses of the same round trip decrease the limit once.
+        governor.acquire()
+        governor.release(0.5)
+        self.assert_equal(governor.concurrency_limit, 4)
+        self.assert_equal(governor.statistics['decreases'], 1)
+        # Fast responses raise the limit by about one per round.
+        for _ in range(5):
+            governor.acquire()
+            governor.release(0.01)
+        self.assert_equal(governor.concurrency_limit, 5)
+        for _ in range(100):
+            governor.acquire()
+            governor.release(0.01)
+        self.assert_equal(governor.concurrency_limit, 8)
+
+    def test_target_latency_without_max_in_flight(self):
+        self.assert_raises(ValueError, RequestGovernor, target_latency=0.1)
+        governor = RequestGovernor(rate=10)
+        self.assert_raises(ValueError, governor.configure,
+                           target_latency=0.1)
+        governor.configure(max_in_flight=2)
+        governor.configure(target_latency=0.1)
+        self.assert_equal(governor.target_latency, 0.1)
+
+
+class ApiGovernorTestCase(BaseTestCase):
+
+    REALM = 'http://governed.example.com/trac/xmlrpc'
+
+    def tear_down(self):
+        remove_governor(self.REALM)
+        BaseTestCase.tear_down(self)
+
+    def __create_api(self, **kw):
+        return make_api(realm=self.REALM, username='test_user',
+                        password='password', load_dummy=True, **kw)
+
+    def test_shared_governor(self):
+        plain_api = self.__create_api()
+        self.assert_is_none(plain_api.governor)
+        api = self.__create_api(rate_limit=1000, max_in_flight=4)
+        governor = api.governor
+        self.assert_equal(governor.rate, 1000)
+        self.assert_true(plain_api.governor is governor)
+        other_api = self.__create_api(max_in_flight=2)
+        self.assert_true(other_api.governor is governor)
+        self.assert_equal(governor.concurrency_limit, 2)
+        self.assert_true(get_governor(self.REALM) is governor)
+        self.assert_true(configure_governor(self.REALM) is governor)
+        ticket_id = api.create_ticket(TicketWrapper(summary='Governed',
+                                                    description='Test.'))
+        plain_api.get_ticket(ticket_id)
+        other_api.delete_ticket(ticket_id)
+        self.assert_equal(governor.statistics['requests'], 3)
+        self.assert_equal(governor.in_flight, 0)
+
+    def test_deadline(self):
+        api = self.__create_api(max_in_flight=1)
+        api.governor.acquire()
+        with api.deadline(0.05):
+            self.assert_raises(RequestTimeout, api.get_ticket, 1)
+        api.governor.release(0)
+
+    def test_config(self):
+        cnf = TractorConfig()
+        cnf.parse('[tractor]\nrealm = %s\nusername = user\n'
+                  'password = pw\nload_dummy = True\nrate_limit = 10\n'
+                  'rate_burst = 5\nmax_in_flight = 4\n'
+                  'target_latency = 0.5\n' % self.REALM)
+        self.assert_equal(cnf.settings['rate_limit'], 10.0)
+        self.assert_equal(cnf.settings['max_in_flight'], 4)
+        api = make_api(**cnf.settings)
+        governor = api.governor
+        self.assert_equal(governor.burst, 5)
+        self.assert_equal(governor.max_in_flight, 4)
+        self.assert_equal(governor.target_latency, 0.5)
@@ -0,0 +1,123 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from tractor import make_api
+from tractor.api import Tractor
+from tractor.hooks import AFTER_RESPONSE
+from tractor.hooks import BEFORE_REQUEST
+from tractor.hooks import ON_ERROR
+from tractor.hooks import RequestHooks
+from tractor.hooks import summarize_args
+from tractor.tests.base import BaseTestCase
+from tractor.tests.base import EchoService
+from tractor.tests.base import LocalXmlRpcServer
+from tractor.ticket import TicketWrapper
+from xmlrpclib import Binary
+from xmlrpclib import Fault
+
+
+class RequestHooksTestCase(BaseTestCase):
+
+    def test_registry(self):
+        hooks = RequestHooks()
+        self.assert_false(hooks.is_active)
+        callback = lambda event: None
+        self.assert_true(hooks.before_request(callback) is callback)
+        hooks.register(ON_ERROR, callback)
+        self.assert_true(hooks.is_active)
+        self.assert_equal(hooks.get_callbacks(BEFORE_REQUEST), (callback,))
+        self.assert_raises(ValueError, hooks.register, 'after_request',
+                           callback)
+        self.assert_raises(ValueError, hooks.unregister, AFTER_RESPONSE,
+                           callback)
+        hooks.unregister(BEFORE_REQUEST, callback)
+        self.assert_true(hooks.is_active)
+        hooks.clear()
+        self.assert_false(hooks.is_active)
+        self.assert_equal(hooks.get_callbacks(ON_ERROR), ())
+
+    def test_summarize_args(self):
+        self.assert_equal(summarize_args((1, 'summary')), "(1, 'summary')")
+        self.assert_equal(summarize_args((Binary('abc'),)),
+                          '(<binary: 3 bytes>)')
+        self.assert_equal(summarize_args(([1, 2, 3, 4],)), '(<list: 4 items>)')
+        summary = summarize_args(('x' * 200,), max_length=20)
+        self.assert_equal(summary, "('xxxxxxxxxxxxxxxx...)")
+
+
+class ApiHooksTestCase(BaseTestCase):
+
+    def set_up(self):
+        BaseTestCase.set_up(self)
+        self.events = []
+        self.api = make_api(realm='http://mycompany.com/mytrac/login/xmlrpc',
+                            username='test_user', password='password',
+                            load_dummy=True)
+        hooks = self.api.hooks
+        for event_name in (BEFORE_REQUEST, AFTER_RESPONSE, ON_ERROR):
+            hooks.register(event_name, self.__create_callback(event_name))
+
+    def __create_callback(self, event_name):
+        def callback(event):
+            self.events.append((event_name, event.method_name,
+                                event.latency))
+            event.context[event_name] = True
+        return callback
+
+    def test_events(self):
+        ticket_id = self.api.create_ticket(TicketWrapper(summary='Hooks',
+                                                         description='Test.'))
+        self.assert_equal([event[:2] for event in self.events],
+                          [(BEFORE_REQUEST, 'ticket.create'),
+                           (AFTER_RESPONSE, 'ticket.create')])
+        self.assert_is_none(self.events[0][2])
+        self.assert_true(self.events[1][2] >= 0)
+        del self.events[:]
+        self.assert_raises(Fault, self.api.get_ticket, -1)
+        self.assert_equal([event[:2] for event in self.events],
+                          [(BEFORE_REQUEST, 'ticket.get'),
+                           (ON_ERROR, 'ticket.get')])
+        del self.events[:]
+        with self.api.batch():
+            self.api.get_ticket(ticket_id)
+        self.assert_equal([event[1] for event in self.events],
+                          ['system.multicall', 'system.multicall'])
+
+    def test_shared_event(self):
+        errors = []
+        @self.api.hooks.on_error
+        def check_event(event): # pylint: disable=W0612
+            errors.append(event)
+        self.assert_raises(Fault, self.api.get_ticket, -1)
+        event = errors[0]
+        self.assert_true(isinstance(event.error, Fault))
+        self.assert_equal(event.args_summary, '(-1)')
+        # The callbacks of one request share the event.
+        self.assert_true(event.context[BEFORE_REQUEST])
+        self.assert_true(event.context[ON_ERROR])
+
+    def test_shared_registry(self):
+        other_api = make_api(realm='http://mycompany.com/mytrac/login/xmlrpc',
+                             username='test_user', password='password',
+                             load_dummy=True, hooks=self.api.hooks)
+        self.assert_true(other_api.hooks is self.api.hooks)
+        self.api.hooks.clear()
+        self.api.get_ticket(1)
+        self.assert_equal(self.events, [])
+
+    def test_payload_sizes(self):
+        server = LocalXmlRpcServer(EchoService())
+        server.start()
+        try:
+            events = []
+            api = Tractor(server.address, 'test_user', 'pw')
+            api.hooks.after_response(events.append)
+            api.send_request('echo', ('x' * 1000,))
+            self.assert_true(events[0].request_bytes > 1000)
+            self.assert_true(events[0].response_bytes > 1000)
+        finally:
+            server.stop()
@@ -0,0 +1,147 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from tractor import make_api
+from tractor.api import Tractor
+from tractor.dummy import GET_ONLY_USER
+from tractor.metrics import MetricsSink
+from tractor.metrics import PrometheusExporter
+from tractor.metrics import RequestMetrics
+from tractor.tests.base import BaseTestCase
+from tractor.tests.base import EchoService
+from tractor.tests.base import LocalXmlRpcServer
+from tractor.ticket import TicketWrapper
+from xmlrpclib import Fault
+from xmlrpclib import ProtocolError
+import os
+import shutil
+import tempfile
+
+
+class RequestMetricsTestCase(BaseTestCase):
+
+    def test_record_request(self):
+        metrics = RequestMetrics(latency_buckets=(0.1, 1.0))
+        metrics.record_request('ticket.get', 0.05, 100, 400, None)
+        metrics.record_request('ticket.get', 0.1, 100, 400, None)
+        metrics.record_request('ticket.get', 2.0, 100, None, 'timeout')
+        metrics.record_request('ticket.update', 0.5, None, None, 'fault')
+        method_metrics = metrics.get_method_metrics('ticket.get')
+        self.assert_equal(method_metrics.request_count, 3)
+        self.assert_equal(method_metrics.bucket_counts, [2, 0, 1])
+        self.assert_almost_equal(method_metrics.latency_sum, 2.15)
+        self.assert_equal(method_metrics.request_bytes, 300)
+        self.assert_equal(method_metrics.response_bytes, 800)
+        self.assert_equal(method_metrics.error_counts, dict(timeout=1))
+        self.assert_is_none(metrics.get_method_metrics('ticket.delete'))
+        # Snapshots are copies.
+        snapshot = metrics.get_snapshot()
+        self.assert_equal([m.method_name for m in snapshot],
+                          ['ticket.get', 'ticket.update'])
+        metrics.record_request('ticket.update', 0.5, None, None, None)
+        self.assert_equal(snapshot[1].request_count, 1)
+        metrics.reset()
+        self.assert_equal(metrics.get_snapshot(), [])
+
+    def test_prometheus_exporter(self):
+        metrics = RequestMetrics(latency_buckets=(0.1, 1.0))
+        metrics.record_request('ticket.get', 0.05, 100, 400, None)
+        metrics.record_request('ticket.get', 0.5, 100, 400, 'fault')
+        exporter = PrometheusExporter(metrics, labels=dict(realm='main'))
+        lines = exporter.render().splitlines()
+        self.assert_true('# TYPE tractor_requests_total counter' in lines)
+        self.assert_true('tractor_requests_total{method="ticket.get",'
+                         'realm="main"} 2' in lines)
+        self.assert_true('tractor_request_errors_total{kind="fault",'
+                         'method="ticket.get",realm="main"} 1' in lines)
+        self.assert_true('tractor_request_bytes_total{method="ticket.get",'
+                         'realm="main"} 200' in lines)
+        self.assert_true('tractor_request_duration_seconds_bucket{'
+                         'le="0.1",method="ticket.get",realm="main"} 1'
+                         in lines)
+        self.assert_true('tractor_request_duration_seconds_bucket{'
+                         'le="+Inf",method="ticket.get",realm="main"} 2'
+                         in lines)
+        self.assert_true('tractor_request_duration_seconds_count{'
+                         'method="ticket.get",realm="main"} 2' in lines)
+        openmetrics_lines = PrometheusExporter(metrics, openmetrics=True) \
+                                        .render().splitlines()
+        self.assert_true('# TYPE tractor_requests counter'
+                         in openmetrics_lines)
+        self.assert_equal(openmetrics_lines[-1], '# EOF')
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, 'tractor.prom')
+            exporter.write(path)
+            with open(path, 'rb') as fp:
+                self.assert_equal(fp.read(), exporter.render())
+            self.assert_false(os.path.exists(path + '.tmp'))
+        finally:
+            shutil.rmtree(tmp_dir)
+
+
+class ApiMetricsTestCase(BaseTestCase):
+
+    def __create_api(self, **kw):
+        return make_api(realm='http://mycompany.com/mytrac/login/xmlrpc',
+                        password='password', load_dummy=True, **kw)
+
+    def test_dummy_api(self):
+        metrics = RequestMetrics()
+        api = self.__create_api(username='test_user', metrics=metrics)
+        self.assert_true(api.metrics is metrics)
+        self.assert_is_none(self.__create_api(username='test_user').metrics)
+        ticket_id = api.create_ticket(TicketWrapper(summary='Metrics',
+                                                    description='Test.'))
+        api.get_ticket(ticket_id)
+        self.assert_raises(Fault, api.get_ticket, -1)
+        get_metrics = metrics.get_method_metrics('ticket.get')
+        self.assert_equal(get_metrics.request_count, 2)
+        self.assert_equal(get_metrics.error_counts, dict(fault=1))
+        # Dummy connections do not report sizes.
+        self.assert_equal(get_metrics.response_bytes, 0)
+        self.assert_equal(
+                metrics.get_method_metrics('ticket.create').request_count, 1)
+        get_only_api = self.__create_api(username=GET_ONLY_USER,
+                                         metrics=metrics)
+        self.assert_raises(ProtocolError, get_only_api.delete_ticket,
+                           ticket_id)
+        self.assert_equal(
+                metrics.get_method_metrics('ticket.delete').error_counts,
+                dict(protocol_error=1))
+        with api.batch():
+            api.get_ticket(ticket_id)
+        self.assert_equal(
+            metrics.get_method_metrics('system.multicall').request_count, 1)
+
+    def test_transferred_bytes(self):
+        server = LocalXmlRpcServer(EchoService())
+        server.start()
+        try:
+            metrics = RequestMetrics()
+            api = Tractor(server.address, 'test_user', 'pw', metrics=metrics)
+            api.send_request('echo', ('x' * 1000,))
+            echo_metrics = metrics.get_method_metrics('echo')
+            self.assert_true(echo_metrics.request_bytes > 1000)
+            self.assert_true(echo_metrics.response_bytes > 1000)
+            self.assert_raises(Fault, api.send_request, 'fail', ())
+            fail_metrics = metrics.get_method_metrics('fail')
+            self.assert_equal(fail_metrics.error_counts, dict(fault=1))
+            self.assert_true(fail_metrics.response_bytes > 0)
+        finally:
+            server.stop()
+
+    def test_custom_sink(self):
+        records = []
+        class RecordingSink(MetricsSink):
+            def record_request(self, method_name, latency, request_bytes,
+                               response_bytes, error_kind):
+                records.append((method_name, error_kind))
+        api = self.__create_api(username='test_user',
+                                metrics=RecordingSink())
+        self.assert_raises(Fault, api.get_ticket, -1)
+        self.assert_equal(records, [('ticket.get', 'fault')])
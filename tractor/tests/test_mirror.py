@@ -0,0 +1,122 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from tractor import make_api
+from tractor.mirror import TicketMirror
+from tractor.tests.base import BaseTestCase
+from tractor.ticket import TicketWrapper
+from xmlrpclib import Fault
+import os
+import shutil
+import tempfile
+
+
+class TicketMirrorTestCase(BaseTestCase):
+
+    def set_up(self):
+        BaseTestCase.set_up(self)
+        self.api = make_api(realm='http://mycompany.com/mytrac/login/xmlrpc',
+                            username='test_user', password='password',
+                            load_dummy=True)
+        # The dummy trac is shared with other tests.
+        self.milestone = 'mirror-%s' % (self._testMethodName)
+        self.query = 'milestone=%s' % (self.milestone)
+        self.ticket_ids = [self.api.create_ticket(TicketWrapper(
+                                    summary='Mirrored %i' % i,
+                                    description='Test.',
+                                    milestone=self.milestone,
+                                    component='c%i' % (i % 2)))
+                           for i in range(5)]
+        self.db_dir = tempfile.mkdtemp()
+
+    def tear_down(self):
+        shutil.rmtree(self.db_dir)
+        BaseTestCase.tear_down(self)
+
+    def test_load_and_read(self):
+        mirror = TicketMirror(self.api, batch_size=2)
+        self.assert_is_none(mirror.high_water_mark)
+        self.assert_equal(mirror.load(self.query), 5)
+        self.assert_equal(len(mirror), 5)
+        self.assert_is_not_none(mirror.high_water_mark)
+        ticket = mirror.get_ticket(self.ticket_ids[0])
+        self.assert_true(isinstance(ticket, TicketWrapper))
+        self.assert_equal(ticket.summary, 'Mirrored 0')
+        self.assert_equal(ticket.time,
+                          self.api.get_ticket(self.ticket_ids[0]).time)
+        self.assert_is_none(ticket.resolution)
+        # Reads are served from the mirror.
+        self.api.delete_ticket(self.ticket_ids[1])
+        self.assert_equal(mirror.get_ticket(self.ticket_ids[1]).summary,
+                          'Mirrored 1')
+        self.assert_equal([t.ticket_id for t in mirror.query(component='c0')],
+                          self.ticket_ids[::2])
+        self.assert_equal(len(mirror.query(component=['c0', 'c1'],
+                                           milestone=self.milestone)), 5)
+        self.assert_equal(len(mirror.query(resolution=None)), 5)
+        self.assert_equal(mirror.query(component=[]), [])
+        self.assert_equal(len(mirror.query()), 5)
+        self.assert_raises(ValueError, mirror.query, unknown='value')
+        # Misses fall back to the trac.
+        other_id = self.api.create_ticket(TicketWrapper(summary='Other',
+                                                        description='Test.'))
+        self.assert_equal(mirror.get_ticket(other_id).summary, 'Other')
+        self.assert_equal(len(mirror), 6)
+        self.assert_raises(Fault, mirror.get_ticket, self.ticket_ids[1] + 1000)
+        # A new load drops deleted tickets.
+        self.assert_equal(mirror.load(self.query), 4)
+        self.assert_equal(len(mirror), 4)
+        mirror.close()
+
+    def test_sync(self):
+        database = os.path.join(self.db_dir, 'mirror.db')
+        mirror = TicketMirror(self.api, database=database)
+        self.assert_raises(ValueError, mirror.sync)
+        mirror.load(self.query)
+        self.api.update_ticket(TicketWrapper(ticket_id=self.ticket_ids[2],
+                                             component='synced'))
+        changed = mirror.sync()
+        self.assert_true(self.ticket_ids[2] in
+                         [ticket.ticket_id for ticket in changed])
+        self.assert_equal(mirror.get_ticket(self.ticket_ids[2]).component,
+                          'synced')
+        high_water_mark = mirror.high_water_mark
+        # Syncs store all changed tickets (not just those matching the load
+        # query) and the dummy trac is shared with other tests.
+        count = len(mirror)
+        self.assert_true(count >= 5)
+        mirror.close()
+        reopened = TicketMirror(self.api, database=database)
+        self.assert_equal(reopened.high_water_mark, high_water_mark)
+        self.assert_equal(len(reopened), count)
+        self.api.assign_ticket(self.ticket_ids[3], 'mirror user')
+        reopened.sync()
+        self.assert_equal([t.ticket_id for t
+                           in reopened.query(owner='mirror user')],
+                          [self.ticket_ids[3]])
+        reopened.close()
+
+    def test_failed_load(self):
+        mirror = TicketMirror(self.api, batch_size=2)
+        mirror.load(self.query)
+        high_water_mark = mirror.high_water_mark
+        iter_query = self.api.iter_query
+        def failing_iter_query(query, page_size):
+            for i, ticket in enumerate(iter_query(query,
+                                                  page_size=page_size)):
+                if i == 3:
+                    raise Fault(1, 'Failure.')
+                yield ticket
+        self.api.iter_query = failing_iter_query
+        self.assert_raises(Fault, mirror.load, self.query)
+        # The previously loaded tickets and the high-water mark are kept.
+        self.assert_equal(len(mirror), 5)
+        self.assert_equal(mirror.high_water_mark, high_water_mark)
+        del self.api.iter_query
+        self.assert_equal(mirror.load(self.query), 5)
+        self.assert_equal(len(mirror), 5)
+        mirror.close()
@@ -0,0 +1,126 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from threading import Thread
+from tractor import make_api
+from tractor.api import Tractor
+from tractor.dummy import DummyConnection
+from tractor.factory import TractorConfig
+from tractor.pool import ConnectionPool
+from tractor.pool import PoolTimeout
+from tractor.tests.base import BaseTestCase
+from tractor.tests.base import LocalXmlRpcServer
+from tractor.ticket import TicketWrapper
+
+
+class ConnectionPoolTestCase(BaseTestCase):
+
+    def set_up(self):
+        BaseTestCase.set_up(self)
+        self.created = []
+
+    def __create_connection(self):
+        conn = object()
+        self.created.append(conn)
+        return conn
+
+    def test_lazy_creation_and_reuse(self):
+        pool = ConnectionPool(self.__create_connection, 2)
+        self.assert_equal(pool.created_count, 0)
+        conn1 = pool.checkout()
+        pool.checkin(conn1)
+        self.assert_true(pool.checkout() is conn1)
+        conn2 = pool.checkout()
+        self.assert_false(conn2 is conn1)
+        self.assert_equal(pool.created_count, 2)
+        self.assert_equal(pool.idle_count, 0)
+
+    def test_timeout(self):
+        pool = ConnectionPool(self.__create_connection, 1, timeout=0.01)
+        with pool.connection() as conn:
+            self.assert_raises(PoolTimeout, pool.checkout)
+            self.assert_raises(PoolTimeout, pool.checkout, timeout=0.01)
+        self.assert_true(pool.checkout() is conn)
+
+    def test_factory_failure(self):
+        def fail():
+            raise IOError('unreachable')
+        pool = ConnectionPool(fail, 1, timeout=0)
+        self.assert_raises(IOError, pool.checkout)
+        self.assert_equal(pool.created_count, 0)
+
+    def test_invalid_size(self):
+        self.assert_raises(ValueError, ConnectionPool,
+                           *(self.__create_connection, 0))
+
+
+class TicketService(object):
+
+    def __init__(self):
+        self.ticket = self
+
+    def get(self, ticket_id):
+        return [ticket_id, '', '', dict(summary='ticket %s' % ticket_id)]
+
+
+class PooledTractorTestCase(BaseTestCase):
+
+    def __run_threads(self, function, thread_count):
+        errors = []
+        def run():
+            try:
+                function()
+            except Exception as exc: # pylint: disable=W0703
+                errors.append(exc)
+        threads = [Thread(target=run) for _ in range(thread_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return errors
+
+    def test_shared_pooled_tractor(self):
+        server = LocalXmlRpcServer(TicketService())
+        server.start()
+        try:
+            api = Tractor(server.address, 'user', 'pw', pool_size=2,
+                          pool_timeout=5)
+            def get_tickets():
+                for ticket_id in range(20):
+                    ticket = api.get_ticket(ticket_id)
+                    assert ticket.summary == 'ticket %s' % ticket_id
+            errors = self.__run_threads(get_tickets, 8)
+        finally:
+            server.stop()
+        self.assert_equal(errors, [])
+        self.assert_equal(api._pool.created_count, 2) # pylint: disable=W0212
+
+    def test_thread_bound_batches(self):
+        api = make_api(realm='http://mycompany.com/mytrac/login/xmlrpc',
+                       username='test_user', password='password',
+                       load_dummy=True, pool_size=2)
+        ticket_id = api.create_ticket(TicketWrapper(summary='Pooled ticket',
+                                                    description='Test.'))
+        results = []
+        with api.batch():
+            self.__run_threads(lambda: results.append(
+                                    api.get_ticket(ticket_id)), 1)
+            call = api.get_ticket(ticket_id)
+        self.assert_true(isinstance(results[0], TicketWrapper))
+        self.assert_equal(call.result().ticket_id, ticket_id)
+        self.assert_true(isinstance(api._get_connection(), # pylint: disable=W0212
+                                    DummyConnection))
+
+    def test_config(self):
+        cnf = TractorConfig()
+        cnf.parse('[tractor]\nrealm = mytrac\nusername = user\n'
+                  'password = pw\npool_size = 4\npool_timeout = 2.5\n')
+        self.assert_equal(cnf.settings['pool_size'], 4)
+        self.assert_equal(cnf.settings['pool_timeout'], 2.5)
+        api = make_api(**cnf.settings)
+        self.assert_equal(api._pool.size, 4) # pylint: disable=W0212
+        self.assert_equal(api._pool.timeout, 2.5) # pylint: disable=W0212
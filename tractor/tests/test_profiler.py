@@ -0,0 +1,130 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from StringIO import StringIO
+from tractor import make_api
+from tractor.api import Tractor
+from tractor.attachment import AttachmentWrapper
+from tractor.profiler import PhaseStatistics
+from tractor.profiler import RequestProfile
+from tractor.profiler import RequestProfiler
+from tractor.server import DummyTracServer
+from tractor.tests.base import BaseTestCase
+from tractor.tests.base import EchoService
+from tractor.tests.base import LocalXmlRpcServer
+from tractor.ticket import TicketWrapper
+from xmlrpclib import Fault
+import time
+
+
+class RequestProfilerTestCase(BaseTestCase):
+
+    def test_profile(self):
+        profile = RequestProfile('ticket.get')
+        profile.add('network', 0.5)
+        profile.add('network', 0.25)
+        with profile.measure('wrap'):
+            time.sleep(0.01)
+        self.assert_equal(profile.phase_times['network'], 0.75)
+        self.assert_true(profile.phase_times['wrap'] >= 0.01)
+        self.assert_true(profile.total_time >= 0.76)
+        statistics = PhaseStatistics()
+        statistics.add(0.1)
+        statistics.add(0.3)
+        self.assert_almost_equal(statistics.mean_time, 0.2)
+        self.assert_equal(statistics.max_time, 0.3)
+
+    def test_report(self):
+        profiler = RequestProfiler()
+        for network_time in (0.1, 0.3):
+            profile = RequestProfile('ticket.get')
+            profile.add('network', network_time)
+            profile.add('wrap', 0.01)
+            profiler.record(profile)
+        profile = RequestProfile('ticket.query')
+        profile.add('network', 0.2)
+        profiler.record(profile)
+        self.assert_equal(profiler.method_names,
+                          ['ticket.get', 'ticket.query'])
+        self.assert_equal(profiler.get_request_count('ticket.get'), 2)
+        statistics = profiler.get_phase_statistics('ticket.get')
+        self.assert_almost_equal(statistics['network'].mean_time, 0.2)
+        lines = profiler.get_report().splitlines()
+        self.assert_equal(lines[0].split(),
+                          ['method', 'requests', 'network', 'wrap', 'total'])
+        self.assert_equal(lines[1].split(),
+                          ['ticket.get', '2', '200.00', '10.00', '210.00'])
+        self.assert_equal(lines[2].split(),
+                          ['ticket.query', '1', '200.00', '-', '200.00'])
+        profiler.reset()
+        self.assert_equal(profiler.method_names, [])
+
+
+class ApiProfilerTestCase(BaseTestCase):
+
+    def set_up(self):
+        BaseTestCase.set_up(self)
+        self.profiles = []
+        self.profiler = RequestProfiler(callback=self.profiles.append)
+
+    def test_dummy_api(self):
+        api = make_api(realm='http://mycompany.com/mytrac/login/xmlrpc',
+                       username='test_user', password='password',
+                       load_dummy=True, profiler=self.profiler)
+        self.assert_true(api.profiler is self.profiler)
+        ticket_id = api.create_ticket(TicketWrapper(summary='Profiled',
+                                                    description='Test.'))
+        api.get_ticket(ticket_id)
+        self.assert_equal([profile.method_name for profile in self.profiles],
+                          ['ticket.create', 'ticket.get'])
+        # The conversion of the result belongs to the same profile.
+        self.assert_equal(sorted(self.profiles[1].phase_times),
+                          ['call', 'wait', 'wrap'])
+        self.assert_raises(Fault, api.get_ticket, -1)
+        self.assert_true(isinstance(self.profiles[-1].error, Fault))
+        self.assert_equal(self.profiler.get_request_count('ticket.get'), 2)
+        with api.batch():
+            api.get_ticket(ticket_id)
+        self.assert_equal(self.profiles[-1].method_name, 'system.multicall')
+
+    def test_remote_phases(self):
+        server = LocalXmlRpcServer(EchoService())
+        server.start()
+        try:
+            api = Tractor(server.address, 'test_user', 'pw',
+                          profiler=self.profiler)
+            self.assert_equal(api.send_request('echo', ('x' * 1000,)),
+                              'x' * 1000)
+            profile = self.profiles[0]
+            self.assert_equal(sorted(profile.phase_times),
+                              ['marshal', 'network', 'unmarshal', 'wait'])
+            for seconds in profile.phase_times.values():
+                self.assert_true(seconds >= 0)
+        finally:
+            server.stop()
+
+    def test_remote_download(self):
+        server = DummyTracServer()
+        server.start()
+        try:
+            api = Tractor(server.address, 'test_user', 'pw',
+                          profiler=self.profiler)
+            ticket_id = api.create_ticket(TicketWrapper(summary='Download',
+                                                        description='Test.'))
+            api.add_attachment(ticket_id, AttachmentWrapper(content='data',
+                                    file_name='data.txt', description='Test.'))
+            output = StringIO()
+            api.download_attachment(ticket_id, 'data.txt', output)
+            self.assert_equal(output.getvalue(), 'data')
+            self.assert_true('ticket.getAttachment' in
+                             self.profiler.method_names)
+            profile = self.profiles[-1]
+            self.assert_equal(profile.method_name, 'ticket.getAttachment')
+            self.assert_equal(sorted(profile.phase_times),
+                              ['marshal', 'network', 'unmarshal', 'wait'])
+        finally:
+            server.stop()
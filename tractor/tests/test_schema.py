@@ -0,0 +1,156 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from tractor import make_api
+from tractor.factory import TractorConfig
+from tractor.schema import TicketSchema
+from tractor.schema import load_schema
+from tractor.tests.base import BaseTestCase
+from tractor.ticket import TicketWrapper
+import os
+import shutil
+import tempfile
+import time
+
+
+class TicketSchemaTestCase(BaseTestCase):
+
+    def set_up(self):
+        BaseTestCase.set_up(self)
+        self.api = self.__create_api()
+        self.schema_dir = tempfile.mkdtemp()
+        self.schema_file = os.path.join(self.schema_dir, 'schema.json')
+        self.multicalls = []
+
+    def tear_down(self):
+        shutil.rmtree(self.schema_dir)
+        BaseTestCase.tear_down(self)
+
+    def __create_api(self, **kw):
+        return make_api(realm='http://mycompany.com/mytrac/login/xmlrpc',
+                        username='test_user', password='password',
+                        load_dummy=True, **kw)
+
+    def __record_multicalls(self, api):
+        send_multicall = api._send_multicall
+        def record_multicall(calls):
+            self.multicalls.append([call.method_name for call in calls])
+            return send_multicall(calls)
+        api._send_multicall = record_multicall
+
+    def test_fetch(self):
+        self.__record_multicalls(self.api)
+        schema = TicketSchema.fetch(self.api)
+        self.assert_equal(len(self.multicalls), 1)
+        self.assert_equal(len(self.multicalls[0]), 4)
+        self.assert_equal(schema.custom_field_names, ['platform', 'estimate'])
+        names_lookup = schema.attribute_names_lookup
+        self.assert_true('platform' in names_lookup)
+        self.assert_false('time' in names_lookup)
+        self.assert_equal(schema.attribute_options_lookup['milestone'].ALL,
+                          ['milestone1', 'milestone2', 'milestone3',
+                           'milestone4'])
+        self.assert_is_none(schema.attribute_options_lookup['estimate'])
+        validator = schema.attribute_validator
+        self.assert_true(validator is schema.attribute_validator)
+        validator.check('resolution', None)
+        validator.check('platform', None)
+        self.assert_raises(ValueError, validator.check, 'platform', 'mac')
+        self.assert_raises(ValueError, validator.check, 'milestone', 'm9')
+        self.assert_raises(ValueError, validator.check, 'summary', None)
+
+    def test_create_wrapper(self):
+        schema = TicketSchema.fetch(self.api)
+        ticket = schema.create_wrapper(summary='Schema ticket',
+                                       description='Test.',
+                                       platform='linux', estimate='3')
+        value_map = ticket.get_value_map_for_ticket_creation()
+        self.assert_equal(value_map['platform'], 'linux')
+        self.assert_equal(value_map['estimate'], '3')
+        self.assert_equal(value_map['component'], 'Other')
+        ticket.platform = 'mac'
+        self.assert_raises(ValueError, ticket.get_value_map_for_ticket_creation)
+        self.assert_raises(TypeError, schema.create_wrapper, unknown='value')
+
+    def test_missing_fields(self):
+        fields = [dict(name='summary', type='text', value=''),
+                  dict(name='component', type='select', value='',
+                       options=['core'])]
+        schema = TicketSchema(fields)
+        validator = schema.attribute_validator
+        # Unknown standard attributes do not accept any value.
+        validator.check('severity', None)
+        self.assert_raises(ValueError, validator.check, 'severity', 'major')
+        # Missing defaults are left to the trac.
+        ticket = schema.create_wrapper(summary='Test')
+        self.assert_equal(ticket.get_value_map_for_ticket_creation(), dict())
+
+    def test_cache_file(self):
+        self.__record_multicalls(self.api)
+        schema = load_schema(self.api, cache_file=self.schema_file)
+        self.assert_equal(len(self.multicalls), 1)
+        self.assert_true(os.path.exists(self.schema_file))
+        cached_schema = load_schema(self.api, cache_file=self.schema_file)
+        self.assert_equal(len(self.multicalls), 1)
+        self.assert_equal(cached_schema.custom_field_names,
+                          schema.custom_field_names)
+        self.assert_equal(cached_schema.enum_values, schema.enum_values)
+        # Expired schemas, other realms and corrupted files are refetched.
+        load_schema(self.api, cache_file=self.schema_file, ttl=-1)
+        self.assert_equal(len(self.multicalls), 2)
+        other_api = make_api(realm='http://mycompany.com/other/xmlrpc',
+                             username='test_user', password='password',
+                             load_dummy=True)
+        self.__record_multicalls(other_api)
+        load_schema(other_api, cache_file=self.schema_file)
+        self.assert_equal(len(self.multicalls), 3)
+        with open(self.schema_file, 'wb') as fp:
+            fp.write('{corrupted')
+        load_schema(other_api, cache_file=self.schema_file)
+        self.assert_equal(len(self.multicalls), 4)
+        for content in ('[]', '{"realm": "%s", "loaded_at": %f}'
+                              % (other_api.realm, time.time())):
+            with open(self.schema_file, 'wb') as fp:
+                fp.write(content)
+            load_schema(other_api, cache_file=self.schema_file)
+        self.assert_equal(len(self.multicalls), 6)
+        load_schema(other_api, cache_file=self.schema_file, refresh=True)
+        self.assert_equal(len(self.multicalls), 7)
+
+    def test_api_validation(self):
+        self.assert_is_none(self.api.schema)
+        api = self.__create_api(schema_file=self.schema_file)
+        self.assert_false(os.path.exists(self.schema_file))
+        self.assert_raises(ValueError, api.create_ticket,
+                           TicketWrapper(summary='Schema ticket',
+                                         description='Test.',
+                                         milestone='unknown milestone'))
+        self.assert_true(os.path.exists(self.schema_file))
+        ticket_id = api.create_ticket(TicketWrapper(summary='Schema ticket',
+                                                    description='Test.',
+                                                    milestone='milestone1'))
+        ticket = api.get_ticket(ticket_id)
+        ticket.platform = 'windows'
+        self.assert_equal(api.update_ticket(ticket).platform, 'windows')
+        ticket.platform = 'mac'
+        self.assert_raises(ValueError, api.update_ticket, ticket)
+        self.assert_equal(api.close_ticket(ticket_id, 'fixed').status,
+                          'closed')
+        # The schema validation can also be enabled explicitly.
+        schema = self.api.load_schema()
+        self.assert_true(self.api.schema is schema)
+        self.assert_false(self.api.load_schema(refresh=True) is schema)
+
+    def test_config(self):
+        cnf = TractorConfig()
+        cnf.parse('[tractor]\nrealm = mytrac\nusername = user\n'
+                  'password = pw\nload_dummy = True\nschema_file = %s\n'
+                  'schema_ttl = 60\n' % (self.schema_file))
+        self.assert_equal(cnf.settings['schema_ttl'], 60.0)
+        api = make_api(**cnf.settings)
+        self.assert_equal(api.schema.custom_field_names,
+                          ['platform', 'estimate'])
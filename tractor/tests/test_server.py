@@ -0,0 +1,145 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from StringIO import StringIO
+from threading import Thread
+from tractor.api import Tractor
+from tractor.dummy import GET_ONLY_USER
+from tractor.server import DummyTracServer
+from tractor.server import XmlRpcServer
+from tractor.tests.base import BaseTestCase
+from tractor.tests.base import DroppingRequestHandler
+from tractor.tests.base import EchoService
+from tractor.ticket import TicketWrapper
+from xmlrpclib import Fault
+from xmlrpclib import ProtocolError
+import sys
+import time
+
+
+class DummyTracServerTestCase(BaseTestCase):
+
+    def set_up(self):
+        BaseTestCase.set_up(self)
+        self.server = None
+
+    def tear_down(self):
+        if not self.server is None:
+            self.server.stop()
+        BaseTestCase.tear_down(self)
+
+    def __start_server(self, server):
+        self.server = server
+        server.start()
+        return server
+
+    def test_ticket_methods(self):
+        server = self.__start_server(DummyTracServer())
+        api = Tractor(server.address, 'test_user', 'pw')
+        ticket_id = api.create_ticket(TicketWrapper(summary='Served',
+                                                    description='Test.'))
+        ticket = api.get_ticket(ticket_id)
+        self.assert_equal(ticket.summary, 'Served')
+        self.assert_equal(ticket.reporter, 'test_user')
+        self.assert_raises(Fault, api.get_ticket, -1)
+        with api.batch():
+            calls = [api.get_ticket(ticket_id), api.get_ticket(-1)]
+        self.assert_equal(calls[0].result().ticket_id, ticket_id)
+        self.assert_true(isinstance(calls[1].fault, Fault))
+        self.assert_true('milestone1' in
+                         api.send_request('ticket.milestone.getAll', ()))
+        get_only_api = Tractor(server.address, GET_ONLY_USER, 'pw')
+        try:
+            get_only_api.delete_ticket(ticket_id)
+        except ProtocolError as exc:
+            self.assert_equal(exc.errcode, 401)
+        else:
+            self.fail('The get-only user must not delete tickets.')
+        self.assert_equal(get_only_api.get_ticket(ticket_id).ticket_id,
+                          ticket_id)
+
+    def test_credentials(self):
+        server = self.__start_server(
+                    DummyTracServer(credentials=dict(test_user='secret')))
+        api = Tractor(server.address, 'test_user', 'secret')
+        self.assert_true(len(api.send_request('ticket.getTicketFields', ())))
+        for username, password in (('test_user', 'wrong'),
+                                   ('other_user', 'secret')):
+            api = Tractor(server.address, username, password)
+            try:
+                api.send_request('ticket.getTicketFields', ())
+            except ProtocolError as exc:
+                self.assert_equal(exc.errcode, 401)
+            else:
+                self.fail('Invalid credentials must be rejected.')
+
+    def test_injected_errors(self):
+        server = self.__start_server(DummyTracServer(error_rate=1))
+        api = Tractor(server.address, 'test_user', 'pw')
+        try:
+            api.send_request('ticket.getTicketFields', ())
+        except ProtocolError as exc:
+            self.assert_equal(exc.errcode, 503)
+        else:
+            self.fail('The error rate is 1.')
+        # The connection is kept alive.
+        server.error_rate = 0
+        self.assert_true(len(api.send_request('ticket.getTicketFields', ())))
+
+    def test_latency(self):
+        server = self.__start_server(DummyTracServer(latency=0.1))
+        api = Tractor(server.address, 'test_user', 'pw')
+        start_time = time.time()
+        api.send_request('ticket.version.getAll', ())
+        self.assert_true(time.time() - start_time >= 0.1)
+
+    def test_bandwidth(self):
+        server = self.__start_server(XmlRpcServer(EchoService(),
+                                                  bandwidth=100000))
+        api = Tractor(server.address, 'test_user', 'pw')
+        start_time = time.time()
+        self.assert_equal(api.send_request('echo', ('x' * 10000,)),
+                          'x' * 10000)
+        # The 10 KB request is received at 100 KB/s (the response is
+        # compressed).
+        self.assert_true(time.time() - start_time >= 0.1)
+
+    def test_closed_connections(self):
+        server = self.__start_server(
+                    XmlRpcServer(EchoService(),
+                                 handler_class=DroppingRequestHandler))
+        api = Tractor(server.address, 'test_user', 'pw')
+        for i in range(5):
+            self.assert_equal(api.send_request('echo', (i,)), i)
+        # Closed connections are released once their handlers are done.
+        timeout = time.time() + 5
+        while server.connection_count > 0 and time.time() < timeout:
+            time.sleep(0.01)
+        self.assert_equal(server.connection_count, 0)
+
+    def test_quiet_stop(self):
+        server = self.__start_server(XmlRpcServer(EchoService(),
+                                                  latency=0.2))
+        api = Tractor(server.address, 'test_user', 'pw')
+        thread = Thread(target=self.assert_raises,
+                        args=(Exception, api.send_request, 'echo', (1,)))
+        thread.start()
+        timeout = time.time() + 5
+        while server.connection_count == 0 and time.time() < timeout:
+            time.sleep(0.01)
+        stderr = sys.stderr
+        sys.stderr = StringIO()
+        try:
+            self.server = None
+            server.stop()
+            thread.join()
+            # The handler threads fail once the connections are closed.
+            while server.connection_count > 0 and time.time() < timeout:
+                time.sleep(0.01)
+            self.assert_equal(sys.stderr.getvalue(), '')
+        finally:
+            sys.stderr = stderr
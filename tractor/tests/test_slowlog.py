@@ -0,0 +1,127 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from StringIO import StringIO
+from tractor import make_api
+from tractor.api import Tractor
+from tractor.attachment import AttachmentWrapper
+from tractor.profiler import RequestProfile
+from tractor.server import DummyTracServer
+from tractor.slowlog import SlowRequestLog
+from tractor.slowlog import get_ticket_ids
+from tractor.tests.base import BaseTestCase
+from tractor.ticket import TicketWrapper
+import time
+
+
+class SlowRequestLogTestCase(BaseTestCase):
+
+    def set_up(self):
+        BaseTestCase.set_up(self)
+        self.records = []
+
+    def __create_profile(self, latency, ticket_id=1, started_at=None):
+        profile = RequestProfile('ticket.get', (ticket_id,))
+        profile.add('network', latency)
+        if not started_at is None:
+            profile.started_at = started_at
+        return profile
+
+    def test_get_ticket_ids(self):
+        self.assert_equal(get_ticket_ids('ticket.get', (3,)), [3])
+        self.assert_equal(get_ticket_ids('ticket.update', (4, 'c', {})), [4])
+        self.assert_equal(get_ticket_ids('ticket.query', ('status=new',)), [])
+        self.assert_equal(get_ticket_ids('ticket.create', ('s', 'd')), [])
+        signatures = [dict(methodName='ticket.get', params=[5]),
+                      dict(methodName='ticket.getAll', params=[]),
+                      dict(methodName='ticket.delete', params=[6])]
+        self.assert_equal(get_ticket_ids('system.multicall', (signatures,)),
+                          [5, 6])
+
+    def test_threshold(self):
+        slow_log = SlowRequestLog(threshold=1, callback=self.records.append)
+        slow_log.observe(self.__create_profile(0.5))
+        self.assert_equal(self.records, [])
+        slow_log.observe(self.__create_profile(1.5, ticket_id=7))
+        record = self.records[0]
+        self.assert_equal(record.method_name, 'ticket.get')
+        self.assert_equal(record.ticket_ids, [7])
+        self.assert_equal(record.latency, 1.5)
+        self.assert_equal(record.phase_times, dict(network=1.5))
+        self.assert_true('tickets #7' in str(record))
+        self.assert_true('network 1500.0 ms' in str(record))
+        self.assert_equal(slow_log.slow_count, 1)
+
+    def test_slowest_requests(self):
+        slow_log = SlowRequestLog(threshold=1, capacity=3,
+                                  callback=self.records.append)
+        for latency in (2, 5, 1, 4, 3):
+            slow_log.observe(self.__create_profile(latency))
+        self.assert_equal([record.latency
+                           for record in slow_log.get_slowest()], [5, 4, 3])
+        self.assert_equal(len(slow_log.dump().splitlines()), 3)
+        self.assert_equal(slow_log.slow_count, 5)
+        slow_log.clear()
+        self.assert_equal(slow_log.get_slowest(), [])
+
+    def test_max_age(self):
+        slow_log = SlowRequestLog(threshold=1, max_age=60,
+                                  callback=self.records.append)
+        slow_log.observe(self.__create_profile(5,
+                                               started_at=time.time() - 120))
+        slow_log.observe(self.__create_profile(2))
+        self.assert_equal([record.latency
+                           for record in slow_log.get_slowest()], [2])
+
+    def test_sampling(self):
+        slow_log = SlowRequestLog(threshold=1, sample_rate=0,
+                                  callback=self.records.append)
+        slow_log.observe(self.__create_profile(2))
+        # Requests that are not sampled are still buffered.
+        self.assert_equal(self.records, [])
+        self.assert_equal(len(slow_log.get_slowest()), 1)
+        self.assert_raises(ValueError, SlowRequestLog, sample_rate=2)
+        self.assert_raises(ValueError, SlowRequestLog, capacity=0)
+
+    def test_api(self):
+        slow_log = SlowRequestLog(threshold=0, callback=self.records.append)
+        api = make_api(realm='http://mycompany.com/mytrac/login/xmlrpc',
+                       username='test_user', password='password',
+                       load_dummy=True, slow_log=slow_log)
+        self.assert_true(api.slow_log is slow_log)
+        ticket_id = api.create_ticket(TicketWrapper(summary='Slow log',
+                                                    description='Test.'))
+        api.get_ticket(ticket_id)
+        record = self.records[-1]
+        self.assert_equal(record.method_name, 'ticket.get')
+        self.assert_equal(record.ticket_ids, [ticket_id])
+        self.assert_equal(sorted(record.phase_times),
+                          ['call', 'wait', 'wrap'])
+        self.assert_equal(record.args_summary, '(%i)' % (ticket_id))
+
+    def test_remote_download(self):
+        server = DummyTracServer()
+        server.start()
+        try:
+            slow_log = SlowRequestLog(threshold=0.05,
+                                      callback=self.records.append)
+            api = Tractor(server.address, 'test_user', 'pw',
+                          slow_log=slow_log)
+            ticket_id = api.create_ticket(TicketWrapper(summary='Download',
+                                                        description='Test.'))
+            api.add_attachment(ticket_id, AttachmentWrapper(content='data',
+                                    file_name='data.txt', description='Test.'))
+            self.assert_equal(self.records, [])
+            server.latency = 0.1
+            api.download_attachment(ticket_id, 'data.txt', StringIO())
+            self.assert_equal(len(self.records), 1)
+            record = self.records[0]
+            self.assert_equal(record.method_name, 'ticket.getAttachment')
+            self.assert_equal(record.ticket_ids, [ticket_id])
+            self.assert_true(record.latency >= 0.1)
+        finally:
+            server.stop()
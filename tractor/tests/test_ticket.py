@@ -9,17 +9,24 @@ from datetime import datetime
 from tractor.tests.base import BaseTestCase
 from tractor.ticket import ATTRIBUTE_NAMES
 from tractor.ticket import ATTRIBUTE_OPTIONS
+from tractor.ticket import AttributeLookup
 from tractor.ticket import DescriptionAttribute
+from tractor.ticket import MAX_SHARED_VALIDATORS
 from tractor.ticket import PRIORITY_ATTRIBUTE_VALUES
 from tractor.ticket import PriorityAttribute
+from tractor.ticket import ResolutionAttribute
 from tractor.ticket import SEVERITY_ATTRIBUTE_VALUES
 from tractor.ticket import STATUS_ATTRIBUTE_VALUES
 from tractor.ticket import SummaryAttribute
 from tractor.ticket import TYPE_ATTRIBUTE_VALUES
 from tractor.ticket import TicketAttribute
 from tractor.ticket import TicketWrapper
+from tractor.ticket import VersionAttribute
 from tractor.ticket import create_wrapper_for_ticket_creation
 from tractor.ticket import create_wrapper_for_ticket_update
+from tractor.ticket import get_attribute_validator
+from tractor.ticket import validate_many
+import copy
 
 
 class TicketAttributeTest(BaseTestCase):
@@ -155,6 +162,109 @@ class TicketTestCase(BaseTestCase):
                 self.assert_equal(getattr(ticket, attr_name),
                                   self.init_data[attr_name])
 
+    def test_attribute_validator(self):
+        validator = get_attribute_validator()
+        self.assert_true(validator is get_attribute_validator(ATTRIBUTE_NAMES,
+                                                            ATTRIBUTE_OPTIONS))
+        validator.check(VersionAttribute.NAME, '1.0')
+        validator.check(ResolutionAttribute.NAME, None)
+        self.assert_raises(ValueError, validator.check, SummaryAttribute.NAME,
+                           None)
+        self.assert_raises(ValueError, validator.check, PriorityAttribute.NAME,
+                           ['unhashable'])
+        self.assert_raises(KeyError, validator.check, 'unknown', 'value')
+        rule = validator.get_rule(PriorityAttribute.NAME)
+        self.assert_true(rule.is_valid(PRIORITY_ATTRIBUTE_VALUES.LOW))
+        self.assert_false(rule.is_valid('unregistered value'))
+        # Changed lookups are recompiled.
+        alt_lookup = dict(ATTRIBUTE_OPTIONS)
+        alt_validator = get_attribute_validator(ATTRIBUTE_NAMES, alt_lookup)
+        self.assert_true(alt_validator is get_attribute_validator(
+                                            ATTRIBUTE_NAMES, alt_lookup))
+        alt_lookup[PriorityAttribute.NAME] = TestAlternativePriorityOptions
+        alt_validator = get_attribute_validator(ATTRIBUTE_NAMES, alt_lookup)
+        alt_validator.check(PriorityAttribute.NAME,
+                            TestAlternativePriorityOptions.UNREGISTERED)
+        # Attribute lookups are compared by version.
+        alt_lookup = AttributeLookup(ATTRIBUTE_OPTIONS)
+        alt_validator = get_attribute_validator(ATTRIBUTE_NAMES, alt_lookup)
+        self.assert_true(alt_validator.is_current(ATTRIBUTE_NAMES,
+                                                  alt_lookup))
+        del alt_lookup[PriorityAttribute.NAME]
+        alt_lookup[PriorityAttribute.NAME] = \
+                                    ATTRIBUTE_OPTIONS[PriorityAttribute.NAME]
+        self.assert_false(alt_validator.is_current(ATTRIBUTE_NAMES,
+                                                   alt_lookup))
+        self.assert_false(alt_validator is
+                          get_attribute_validator(ATTRIBUTE_NAMES, alt_lookup))
+        # The number of shared validators is limited.
+        lookups = [AttributeLookup(ATTRIBUTE_OPTIONS)
+                   for _ in range(MAX_SHARED_VALIDATORS + 1)]
+        validators = [get_attribute_validator(ATTRIBUTE_NAMES, lookup)
+                      for lookup in lookups]
+        self.assert_false(validators[0] is
+                          get_attribute_validator(ATTRIBUTE_NAMES, lookups[0]))
+        self.assert_true(validators[-1] is
+                         get_attribute_validator(ATTRIBUTE_NAMES, lookups[-1]))
+
+    def test_validate_many(self):
+        wrappers = [TicketWrapper(summary='Valid', description='Test.'),
+                    TicketWrapper(summary='Bad priority', description='Test.',
+                                  priority='urgent', severity='unknown'),
+                    TicketWrapper(description='No summary'),
+                    TicketWrapper(summary='Valid too', description='Test.',
+                                  priority=PRIORITY_ATTRIBUTE_VALUES.LOW)]
+        report = validate_many(wrappers)
+        self.assert_false(report.is_valid)
+        self.assert_equal(report.errors,
+                          [(1, PriorityAttribute.NAME, 'urgent'),
+                           (1, 'severity', 'unknown'),
+                           (2, SummaryAttribute.NAME, None)])
+        self.assert_equal(report.invalid_indices, [1, 2])
+        self.assert_equal([wrapper.summary
+                           for wrapper in report.valid_wrappers],
+                          ['Valid', 'Valid too'])
+        self.assert_true("1 priority: 'urgent'" in str(report))
+        # Updates only check changed attributes and require IDs.
+        wrappers = [TicketWrapper(ticket_id=1, priority='urgent'),
+                    TicketWrapper(summary='No ID'),
+                    TicketWrapper(ticket_id=3, version='1.0')]
+        report = validate_many(wrappers, for_update=True)
+        self.assert_equal(report.errors,
+                          [(0, PriorityAttribute.NAME, 'urgent'),
+                           (1, 'ticket_id', None)])
+        self.assert_equal(report.valid_wrappers, [wrappers[2]])
+        self.assert_true(validate_many([]).is_valid)
+
+    def test_update_version(self):
+        ticket = TicketWrapper(ticket_id=123, version='1.0')
+        self.assert_equal(ticket.get_value_map_for_update(),
+                          {VersionAttribute.NAME : '1.0'})
+
+    def test_changed_attributes(self):
+        ticket = TicketWrapper(ticket_id=123, summary='Changed summary')
+        self.assert_equal(ticket.changed_attributes,
+                          set(['ticket_id', SummaryAttribute.NAME]))
+        del self.init_data['ticket_id']
+        trac_data = (123, datetime.now(), datetime.now(), self.init_data)
+        ticket = TicketWrapper.create_from_trac_data(trac_data)
+        self.assert_equal(ticket.changed_attributes, set())
+        self.assert_equal(ticket.get_value_map_for_update(), dict())
+        # Assigning the current value is not a change.
+        ticket.summary = self.init_data[SummaryAttribute.NAME]
+        ticket.priority = PRIORITY_ATTRIBUTE_VALUES.LOW
+        self.assert_equal(ticket.changed_attributes,
+                          set([PriorityAttribute.NAME]))
+        self.assert_equal(ticket.get_value_map_for_update(),
+                          {PriorityAttribute.NAME :
+                                        PRIORITY_ATTRIBUTE_VALUES.LOW})
+        ticket_copy = copy.copy(ticket)
+        ticket_copy.summary = 'Copy summary'
+        self.assert_equal(len(ticket_copy.changed_attributes), 2)
+        self.assert_equal(len(ticket.changed_attributes), 1)
+        ticket.reset_changes()
+        self.assert_equal(ticket.get_value_map_for_update(), dict())
+
     def get_value_map_for_update(self):
         # Empty ticket return empty maps.
         ticket = TicketWrapper(ticket_id=123)
@@ -5,10 +5,19 @@ See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
 Created on Jan 06, 2012.
 """
 
+from collections import OrderedDict
+from threading import Lock
+
 __docformat__ = 'reStructuredText en'
 __all__ = ['create_wrapper_for_ticket_creation',
            'create_wrapper_for_ticket_update',
-           'TicketWrapper'
+           'get_attribute_validator',
+           'validate_many',
+           'TicketWrapper',
+           'AttributeLookup',
+           'AttributeValidator',
+           'AttributeRule',
+           'ValidationReport',
            'TicketAttribute',
            'TicketAttributeValues',
            'SummaryAttribute',
@@ -121,6 +130,8 @@ class TicketWrapper(object):
             specify a lookup, the ticket object will use the default
             lookups (ATTRIBUTE_NAMES and ATTRIBUTE_OPTIONS) instead.
         """
+        #: The names of the attributes changed since the last reset.
+        self.__changed_attributes = set()
 
         self.ticket_id = ticket_id
 
@@ -169,81 +180,123 @@ class TicketWrapper(object):
                 attr_value = None
             setattr(ticket, attr_name, attr_value)
 
+        ticket.reset_changes()
         return ticket
 
+    @property
+    def changed_attributes(self):
+        """
+        The names of the attributes that have been changed since the wrapper
+        has been created or :func:`reset_changes` has been called (wrappers
+        converted from trac data start without changes).
+        """
+        return set(self.__changed_attributes)
+
+    def reset_changes(self):
+        """
+        Marks all attributes as unchanged.
+        """
+        self.__changed_attributes.clear()
+
     def check_attribute_validity(self, attribute_name, value=None):
         """
         Checks whether a non-optional attribute is present and
         whether each value is a valid option (used before ticket creation
         and update).
 
-        :raises AttributeError: In case of invalid attribute name.
+        :raises KeyError: In case of invalid attribute name.
         :raises ValueError: In case of an invalid value.
         """
         if value is None:
             value = getattr(self, attribute_name)
-        attr_cls = self.__attribute_names_lookup[attribute_name]
-        options = self.__attribute_options_lookup[attribute_name]
+        self.__get_validator().check(attribute_name, value)
 
-        if value is None:
-            if not attr_cls.IS_OPTIONAL:
-                if options is None:
-                    msg = 'The value for a %s attribute must not be None!' \
-                           % (attribute_name)
-                    raise ValueError(msg)
-                elif not value in options.ALL:
-                    msg = 'Invalid value "%s" for attribute %s. Valid ' \
-                          'options are: %s.' % (value, attribute_name,
-                                                options.ALL)
-                    raise ValueError(msg)
-
-        else:
-            if not options is None and not value in options.ALL:
-                msg = 'Invalid value "%s" for attribute %s. Valid options ' \
-                      'are: %s.' % (value, attribute_name, options.ALL)
-                raise ValueError(msg)
-
-    def get_value_map_for_ticket_creation(self):
+    def get_value_map_for_ticket_creation(self, attribute_validator=None):
         """
         Returns a value map for ticket creation - non-optional attribute
         with None value will be set to their DEFAULT_VALUE.
+
+        :param attribute_validator: Replaces the validator for the lookups
+            of the wrapper (e.g. the validator of a
+            :class:`tractor.schema.TicketSchema`).
+        :type attribute_validator: :class:`AttributeValidator`
         """
         value_map = dict()
+        validator = attribute_validator
+        if validator is None:
+            validator = self.__get_validator()
 
-        for attr_name, attr_cls in self.__attribute_names_lookup.iteritems():
-            value = getattr(self, attr_name)
-
-            # Summary and description must be passed as extra arguments.
-            if attr_name == SummaryAttribute.NAME or \
-                                    attr_name == DescriptionAttribute.NAME:
-                self.check_attribute_validity(attr_name)
-                continue
+        # Summary and description must be passed as extra arguments.
+        for rule in validator.argument_rules:
+            rule.check(getattr(self, rule.name))
 
+        for rule in validator.value_map_rules:
+            # Custom fields are only set if they have a value.
+            value = getattr(self, rule.name, None)
             if value is None:
-                if attr_cls.IS_OPTIONAL:
+                if rule.is_optional:
                     continue
                 else:
-                    value = attr_cls.DEFAULT_VALUE
+                    value = rule.default_value
 
-            self.check_attribute_validity(attr_name, value)
+            rule.check(value)
             if not value is None:
-                value_map[attr_name] = value
+                value_map[rule.name] = value
 
         return value_map
 
-    def get_value_map_for_update(self):
+    def get_value_map_for_update(self, attribute_validator=None):
         """
-        Returns a value map containing the value for all set attributes.
+        Returns a value map containing the value for all set attributes
+        that have been changed (see :attr:`changed_attributes`).
+
+        :param attribute_validator: Replaces the validator for the lookups
+            of the wrapper (see :func:`get_value_map_for_ticket_creation`).
+        :type attribute_validator: :class:`AttributeValidator`
         """
         value_map = dict()
-        for attr_name in self.__attribute_names_lookup.keys():
+        validator = attribute_validator
+        if validator is None:
+            validator = self.__get_validator()
+        for attr_name in self.__changed_attributes:
+            rule = validator.find_rule(attr_name)
+            if rule is None:
+                continue
             value = getattr(self, attr_name)
             if not value is None:
-                self.check_attribute_validity(attr_name, value)
+                rule.check(value)
                 value_map[attr_name] = value
 
         return value_map
 
+    @property
+    def attribute_validator(self):
+        """
+        The :class:`AttributeValidator` for the lookups of this wrapper.
+        """
+        return self.__get_validator()
+
+    def __get_validator(self):
+        return get_attribute_validator(self.__attribute_names_lookup,
+                                       self.__attribute_options_lookup)
+
+    def __setattr__(self, name, value):
+        if not name.startswith('_'):
+            if name in self.__dict__:
+                is_changed = self.__dict__[name] != value
+            else:
+                # Unset constructor arguments are not changes.
+                is_changed = not value is None
+            if is_changed:
+                self.__changed_attributes.add(name)
+        object.__setattr__(self, name, value)
+
+    def __copy__(self):
+        ticket = self.__class__.__new__(self.__class__)
+        ticket.__dict__.update(self.__dict__)
+        ticket.__changed_attributes = set(self.__changed_attributes)
+        return ticket
+
     def __eq__(self, other):
         """
         Within one realm, tickets are equal if their ID is equal.
@@ -266,6 +319,359 @@ class TicketWrapper(object):
         return str_format % params
 
 
+def validate_many(ticket_wrappers, for_update=False,
+                  attribute_validator=None):
+    """
+    Validates many ticket wrappers at once and reports all errors instead
+    of failing on the first one. The values are checked column by column
+    (one attribute for all wrappers at a time)::
+
+        report = validate_many(wrappers)
+        with api.batch():
+            for wrapper in report.valid_wrappers:
+                api.create_ticket(wrapper)
+
+    :param ticket_wrappers: The ticket wrappers to validate.
+    :type ticket_wrappers: sequence of :class:`TicketWrapper`
+    :param for_update: If *True*, the wrappers are validated like for
+        ticket updates (only the changed attributes are checked and the
+        ticket ID is required), otherwise like for ticket creations.
+    :type for_update: :class:`bool`
+    :default for_update: *False*
+    :param attribute_validator: Replaces the validators for the lookups of
+        the wrappers (e.g. the validator of a
+        :class:`tractor.schema.TicketSchema`).
+    :type attribute_validator: :class:`AttributeValidator`
+    :return: A :class:`ValidationReport`.
+    """
+    # Wrappers with different lookups have different validators.
+    groups = dict()
+    for index, wrapper in enumerate(ticket_wrappers):
+        validator = attribute_validator
+        if validator is None:
+            validator = wrapper.attribute_validator
+        groups.setdefault(validator, []).append((index, wrapper))
+    errors = []
+    for validator, group in groups.iteritems():
+        if for_update:
+            errors.extend(_validate_update_columns(validator, group))
+        else:
+            errors.extend(_validate_creation_columns(validator, group))
+    errors.sort()
+    invalid_indices = set([error[0] for error in errors])
+    valid_wrappers = [wrapper for index, wrapper in enumerate(ticket_wrappers)
+                      if not index in invalid_indices]
+    return ValidationReport(valid_wrappers, errors)
+
+
+def _validate_creation_columns(validator, group):
+    errors = []
+    for rule in validator.argument_rules:
+        for index, wrapper in group:
+            value = getattr(wrapper, rule.name)
+            if not rule.is_valid(value):
+                errors.append((index, rule.name, value))
+    for rule in validator.value_map_rules:
+        for index, wrapper in group:
+            value = getattr(wrapper, rule.name, None)
+            if value is None and not rule.is_optional:
+                value = rule.default_value
+            if not rule.is_valid(value):
+                errors.append((index, rule.name, value))
+    return errors
+
+
+def _validate_update_columns(validator, group):
+    errors = [(index, 'ticket_id', None) for index, wrapper in group
+              if wrapper.ticket_id is None]
+    changed = [(index, wrapper, wrapper.changed_attributes)
+               for index, wrapper in group]
+    for rule in validator.rules:
+        for index, wrapper, changed_attributes in changed:
+            if not rule.name in changed_attributes:
+                continue
+            value = getattr(wrapper, rule.name)
+            if not value is None and not rule.is_valid(value):
+                errors.append((index, rule.name, value))
+    return errors
+
+
+class ValidationReport(object):
+    """
+    The result of a bulk validation (see :func:`validate_many`).
+    """
+
+    def __init__(self, valid_wrappers, errors):
+        """
+        Constructor.
+
+        :param valid_wrappers: The wrappers without errors (in their
+            original order).
+        :param errors: The errors as (wrapper index, attribute name, invalid
+            value) tuples.
+        """
+        #: The wrappers without errors (in their original order).
+        self.valid_wrappers = valid_wrappers
+        #: The errors as (wrapper index, attribute name, invalid value)
+        #: tuples, sorted by index and attribute name.
+        self.errors = errors
+
+    @property
+    def is_valid(self):
+        """
+        Indicates whether all wrappers are valid.
+        """
+        return len(self.errors) == 0
+
+    @property
+    def invalid_indices(self):
+        """
+        The (sorted) indices of the invalid wrappers.
+        """
+        return sorted(set([error[0] for error in self.errors]))
+
+    def __str__(self):
+        return '\n'.join(['%i %s: %r' % error for error in self.errors])
+
+    def __repr__(self):
+        str_format = '<%s, valid: %i, errors: %i>'
+        params = (self.__class__.__name__, len(self.valid_wrappers),
+                  len(self.errors))
+        return str_format % params
+
+
+def get_attribute_validator(attribute_names_lookup=None,
+                            attribute_options_lookup=None):
+    """
+    Returns the :class:`AttributeValidator` for the given lookups (the
+    default lookups ATTRIBUTE_NAMES and ATTRIBUTE_OPTIONS are used for
+    lookups that are not specified).
+
+    Validators are compiled once and shared by all callers using the same
+    lookups. A validator is recompiled if its lookups have been changed
+    since. The validators of the last :const:`MAX_SHARED_VALIDATORS` lookup
+    pairs are kept.
+    """
+    if attribute_names_lookup is None:
+        attribute_names_lookup = ATTRIBUTE_NAMES
+    if attribute_options_lookup is None:
+        attribute_options_lookup = ATTRIBUTE_OPTIONS
+    key = (id(attribute_names_lookup), id(attribute_options_lookup))
+    validator = _VALIDATORS.get(key)
+    if validator is None or not validator.is_current(attribute_names_lookup,
+                                                     attribute_options_lookup):
+        validator = AttributeValidator(attribute_names_lookup,
+                                       attribute_options_lookup)
+        with _VALIDATORS_LOCK:
+            _VALIDATORS.pop(key, None)
+            _VALIDATORS[key] = validator
+            while len(_VALIDATORS) > MAX_SHARED_VALIDATORS:
+                _VALIDATORS.popitem(last=False)
+    return validator
+
+
+class AttributeLookup(dict):
+    """
+    A lookup dictionary counting its modifications, so validators compiled
+    from it can tell whether they are outdated without comparing the
+    content (see :func:`AttributeValidator.is_current`).
+    """
+
+    #: The number of modifications.
+    version = 0
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self.version += 1
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self.version += 1
+
+    def clear(self):
+        dict.clear(self)
+        self.version += 1
+
+    def pop(self, *args):
+        self.version += 1
+        return dict.pop(self, *args)
+
+    def popitem(self):
+        self.version += 1
+        return dict.popitem(self)
+
+    def setdefault(self, key, default=None):
+        self.version += 1
+        return dict.setdefault(self, key, default)
+
+    def update(self, *args, **kw):
+        dict.update(self, *args, **kw)
+        self.version += 1
+
+
+class AttributeValidator(object):
+    """
+    Validates ticket attribute values against a pair of attribute names and
+    attribute options lookups.
+
+    The lookups are compiled into one :class:`AttributeRule` per attribute,
+    so that a check is a set membership test. Use
+    :func:`get_attribute_validator` to obtain a shared instance.
+    """
+
+    def __init__(self, attribute_names_lookup, attribute_options_lookup):
+        """
+        Constructor.
+
+        :param attribute_names_lookup: Maps attribute names onto attribute
+            classes.
+        :param attribute_options_lookup: Maps attribute names onto
+            attribute value classes (or *None* for attributes with an
+            unlimited value range).
+        """
+        self.__names_lookup = attribute_names_lookup
+        self.__options_lookup = attribute_options_lookup
+        self.__names_state = self.__get_state(attribute_names_lookup)
+        self.__options_state = self.__get_state(attribute_options_lookup)
+        #: The attribute rules (in the order of the names lookup).
+        self.rules = [AttributeRule(attr_name, attr_cls,
+                                    attribute_options_lookup[attr_name])
+                      for attr_name, attr_cls
+                      in attribute_names_lookup.iteritems()]
+        #: The rules for the attributes passed as extra arguments for ticket
+        #: creations (summary and description).
+        self.argument_rules = [rule for rule in self.rules
+                               if rule.name in _ARGUMENT_ATTRIBUTE_NAMES]
+        #: The rules for the attributes passed in value maps.
+        self.value_map_rules = [rule for rule in self.rules
+                                if not rule.name in _ARGUMENT_ATTRIBUTE_NAMES]
+        self.__rule_map = dict([(rule.name, rule) for rule in self.rules])
+
+    def is_current(self, attribute_names_lookup, attribute_options_lookup):
+        """
+        Checks whether the validator has been compiled from the given
+        lookups and whether these have not been changed since. This is a
+        version comparison for :class:`AttributeLookup` objects and a
+        content comparison for other dictionaries.
+        """
+        # The state of an attribute lookup is its version, the state of
+        # other dictionaries their content.
+        return self.__names_lookup is attribute_names_lookup and \
+               self.__options_lookup is attribute_options_lookup and \
+               self.__names_state == getattr(attribute_names_lookup,
+                                    'version', attribute_names_lookup) and \
+               self.__options_state == getattr(attribute_options_lookup,
+                                    'version', attribute_options_lookup)
+
+    @staticmethod
+    def __get_state(lookup):
+        if isinstance(lookup, AttributeLookup):
+            return lookup.version
+        return dict(lookup)
+
+    def get_rule(self, attribute_name):
+        """
+        Returns the rule for the given attribute name.
+
+        :raises KeyError: In case of invalid attribute name.
+        """
+        return self.__rule_map[attribute_name]
+
+    def find_rule(self, attribute_name):
+        """
+        Returns the rule for the given attribute name (or *None* for
+        unknown attribute names).
+        """
+        return self.__rule_map.get(attribute_name)
+
+    def check(self, attribute_name, value):
+        """
+        Checks a value for the given attribute.
+
+        :raises KeyError: In case of invalid attribute name.
+        :raises ValueError: In case of an invalid value.
+        """
+        self.__rule_map[attribute_name].check(value)
+
+
+class AttributeRule(object):
+    """
+    The compiled validation rule for one ticket attribute.
+    """
+
+    __slots__ = ['name', 'is_optional', 'default_value', 'options',
+                 '__valid_values', '__accepts_none']
+
+    def __init__(self, name, attribute_class, options_class):
+        """
+        Constructor.
+
+        :param name: The attribute name.
+        :param attribute_class: The ticket attribute class.
+        :param options_class: The attribute value class (*None* for
+            attributes with an unlimited value range).
+        """
+        #: The attribute name.
+        self.name = name
+        #: Indicates whether the value may be *None*.
+        self.is_optional = attribute_class.IS_OPTIONAL
+        #: The default value for ticket creations.
+        self.default_value = getattr(attribute_class, 'DEFAULT_VALUE', None)
+        #: The list of valid values (*None* for an unlimited value range).
+        self.options = None
+        if not options_class is None:
+            self.options = options_class.ALL
+        if self.options is None:
+            self.__valid_values = None
+            self.__accepts_none = self.is_optional
+        else:
+            self.__valid_values = frozenset(self.options)
+            self.__accepts_none = self.is_optional or \
+                                  None in self.__valid_values
+
+    def is_valid(self, value):
+        """
+        Checks whether the given value is valid for the attribute.
+        """
+        if value is None:
+            return self.__accepts_none
+        if self.__valid_values is None:
+            return True
+        try:
+            return value in self.__valid_values
+        except TypeError: # Unhashable values are never valid options.
+            return False
+
+    def check(self, value):
+        """
+        Checks whether the given value is valid for the attribute.
+
+        :raises ValueError: In case of an invalid value.
+        """
+        # The membership tests of is_valid are inlined (hot path).
+        if value is None:
+            is_valid = self.__accepts_none
+        elif self.__valid_values is None:
+            is_valid = True
+        else:
+            try:
+                is_valid = value in self.__valid_values
+            except TypeError:
+                is_valid = False
+        if not is_valid:
+            raise ValueError(self.get_error_message(value))
+
+    def get_error_message(self, value):
+        """
+        Returns the validation error message for the given (invalid) value.
+        """
+        if value is None and self.options is None:
+            return 'The value for a %s attribute must not be None!' \
+                   % (self.name)
+        return 'Invalid value "%s" for attribute %s. Valid options are: %s.' \
+               % (value, self.name, self.options)
+
+
 class TicketAttribute(object):
     """
     A superclass for ticket attributes
@@ -487,7 +893,7 @@ class CcAttribute(TicketAttribute):
 
 
 #: Map attribute classes onto NAMES of ticket attributes classes.
-ATTRIBUTE_NAMES = \
+ATTRIBUTE_NAMES = AttributeLookup(
        {SummaryAttribute.NAME : SummaryAttribute,
         ReporterAttribute.NAME: ReporterAttribute,
         OwnerAttribute.NAME : OwnerAttribute,
@@ -502,10 +908,10 @@ ATTRIBUTE_NAMES = \
         ResolutionAttribute.NAME : ResolutionAttribute,
         KeywordsAttribute.NAME : KeywordsAttribute,
         CcAttribute.NAME : CcAttribute
-        }
+        })
 
 #: Maps valid attribute lists onto NAMES of ticket attributes classes.
-ATTRIBUTE_OPTIONS = \
+ATTRIBUTE_OPTIONS = AttributeLookup(
     {SummaryAttribute.NAME : None,
      ReporterAttribute.NAME : None,
      OwnerAttribute.NAME : None,
@@ -515,9 +921,20 @@ ATTRIBUTE_OPTIONS = \
      PriorityAttribute.NAME : PRIORITY_ATTRIBUTE_VALUES,
      MilestoneAttribute.NAME : None,
      ComponentAttribute.NAME : None,
-     VersionAttribute : None,
+     VersionAttribute.NAME : None,
      SeverityAttribute.NAME : SEVERITY_ATTRIBUTE_VALUES,
      ResolutionAttribute.NAME : RESOLUTION_ATTRIBUTE_VALUES,
      KeywordsAttribute.NAME : None,
-     CcAttribute.NAME : None}
+     CcAttribute.NAME : None})
+
+#: The attributes passed as extra arguments for ticket creations.
+_ARGUMENT_ATTRIBUTE_NAMES = frozenset([SummaryAttribute.NAME,
+                                       DescriptionAttribute.NAME])
+
+#: The maximum number of validators shared by
+#: :func:`get_attribute_validator`.
+MAX_SHARED_VALIDATORS = 32
 
+#: The shared attribute validators (see :func:`get_attribute_validator`).
+_VALIDATORS = OrderedDict()
+_VALIDATORS_LOCK = Lock()
@@ -0,0 +1,587 @@
+"""
+This file is part of the tractor library.
+See LICENSE.txt for licensing, CONTRIBUTORS.txt for contributor information.
+
+Created on Oct 17, 2026.
+"""
+
+from .attachment import Base64Stream
+from .deadline import RequestTimeout
+from xmlrpclib import ExpatParser
+from xmlrpclib import ServerProxy
+from xmlrpclib import Transport
+from xmlrpclib import Unmarshaller
+from xmlrpclib import dumps
+import base64
+import errno
+import httplib
+import re
+import socket
+import time
+import urllib
+import uuid
+
+try:
+    import ssl
+except ImportError: # pragma: no cover
+    ssl = None
+
+__docformat__ = 'reStructuredText en'
+__all__ = ['KeepAliveTransport',
+           'SafeKeepAliveTransport',
+           'StreamingRequestBody',
+           'StreamingServerProxy',
+           'create_default_ssl_context',
+           'create_request_body',
+           'create_transport']
+
+
+#: Socket error numbers indicating that the server has dropped a kept-alive
+#: connection.
+STALE_CONNECTION_ERRNOS = (errno.ECONNRESET, errno.ECONNABORTED, errno.EPIPE)
+
+
+def create_default_ssl_context():
+    """
+    Returns the SSL context the standard library would use for HTTPS
+    connections (*None* if SSL contexts are not supported).
+    """
+    if ssl is None or not hasattr(ssl, '_create_default_https_context'):
+        return None
+    return ssl._create_default_https_context() # pylint: disable=W0212
+
+
+def create_transport(url, max_idle_time=None, connect_timeout=None,
+                     read_timeout=None, get_deadline=None):
+    """
+    Creates a keep-alive transport matching the scheme of the given URL.
+
+    :param max_idle_time: Connections that have been idle for longer than
+        this number of seconds are closed before the next request. If you
+        do not pass a value, idle connections are reused until the server
+        drops them.
+    :param connect_timeout: See :class:`KeepAliveTransport`.
+    :param read_timeout: See :class:`KeepAliveTransport`.
+    :param get_deadline: See :class:`KeepAliveTransport`.
+    """
+    scheme = urllib.splittype(url)[0]
+    if scheme == 'https':
+        transport_cls = SafeKeepAliveTransport
+    else:
+        transport_cls = KeepAliveTransport
+    return transport_cls(max_idle_time=max_idle_time,
+                         connect_timeout=connect_timeout,
+                         read_timeout=read_timeout, get_deadline=get_deadline)
+
+
+def create_request_body(method_name, params, encoding=None,
+                        allow_none=False):
+    """
+    Marshals an XML-RPC request. If the parameters contain
+    :class:`tractor.attachment.Base64Stream` objects (also nested in lists
+    and structs), a :class:`StreamingRequestBody` is returned instead of
+    a string.
+    """
+    streams = dict()
+    def replace_streams(value):
+        if isinstance(value, Base64Stream):
+            marker = 'tractor-stream-%s' % (uuid.uuid4().hex)
+            streams[marker] = value
+            return marker
+        elif isinstance(value, (list, tuple)):
+            return type(value)([replace_streams(item) for item in value])
+        elif isinstance(value, dict):
+            return dict([(key, replace_streams(item))
+                         for key, item in value.iteritems()])
+        return value
+
+    params = replace_streams(params)
+    request = dumps(params, method_name, encoding=encoding,
+                    allow_none=allow_none)
+    if len(streams) < 1:
+        return request
+
+    # The markers are replaced in the order they appear in the document.
+    pattern = '|'.join(['<value><string>(%s)</string></value>' % (marker)
+                        for marker in streams])
+    parts = []
+    for index, item in enumerate(re.split(pattern, request)):
+        if index % (len(streams) + 1) == 0:
+            parts.append(item)
+        elif not item is None:
+            parts.extend(['<value><base64>', streams[item],
+                          '</base64></value>'])
+    return StreamingRequestBody(parts)
+
+
+class StreamingRequestBody(object):
+    """
+    An XML-RPC request body consisting of strings and
+    :class:`tractor.attachment.Base64Stream` objects. The streams are
+    encoded chunk by chunk while the body is iterated.
+    """
+
+    def __init__(self, parts):
+        """
+        Constructor.
+
+        :param parts: Strings and base64 streams in body order.
+        """
+        self.__parts = parts
+
+    def __len__(self):
+        length = 0
+        for part in self.__parts:
+            if isinstance(part, Base64Stream):
+                length += part.encoded_size
+            else:
+                length += len(part)
+        return length
+
+    def __iter__(self):
+        for part in self.__parts:
+            if isinstance(part, Base64Stream):
+                for chunk in part:
+                    yield chunk
+            else:
+                yield part
+
+
+class StreamingServerProxy(ServerProxy):
+    """
+    Server proxy sending :class:`tractor.attachment.Base64Stream`
+    parameters without loading them into memory. The transport must support
+    :class:`StreamingRequestBody` objects and binary outputs (like the
+    :class:`KeepAliveTransport`).
+    """
+
+    def __init__(self, uri, transport=None, encoding=None, verbose=0,
+                 allow_none=0, use_datetime=0):
+        ServerProxy.__init__(self, uri, transport=transport,
+                             encoding=encoding, verbose=verbose,
+                             allow_none=allow_none, use_datetime=use_datetime)
+        self.__marshal_time = None
+
+    def download(self, binary_output, method_name, *params):
+        """
+        Invokes a method returning a base64 value and writes the decoded
+        data to the given file object while the response is parsed.
+
+        :return: The number of bytes written.
+        """
+        # pylint: disable=E1101
+        start_time = time.time()
+        request = create_request_body(method_name, params,
+                                      encoding=self._ServerProxy__encoding,
+                                      allow_none=self._ServerProxy__allow_none)
+        self.__marshal_time = time.time() - start_time
+        return self._ServerProxy__transport.request(
+                                    self._ServerProxy__host,
+                                    self._ServerProxy__handler,
+                                    request,
+                                    verbose=self._ServerProxy__verbose,
+                                    binary_output=binary_output)
+
+    def _ServerProxy__request(self, methodname, params):
+        # pylint: disable=E1101
+        start_time = time.time()
+        request = create_request_body(methodname, params,
+                                      encoding=self._ServerProxy__encoding,
+                                      allow_none=self._ServerProxy__allow_none)
+        self.__marshal_time = time.time() - start_time
+        response = self._ServerProxy__transport.request(
+                                    self._ServerProxy__host,
+                                    self._ServerProxy__handler,
+                                    request,
+                                    verbose=self._ServerProxy__verbose)
+        if len(response) == 1:
+            response = response[0]
+        return response
+
+
+    def get_transfer_sizes(self):
+        """
+        Returns the size of the last request body and the number of
+        response bytes received for it (*None* values if the transport does
+        not count them).
+        """
+        # pylint: disable=E1101
+        transport = self._ServerProxy__transport
+        return (getattr(transport, 'request_bytes', None),
+                getattr(transport, 'response_bytes', None))
+
+    def get_phase_times(self):
+        """
+        Returns a dictionary with the marshal, network and unmarshal times
+        (in seconds) of the last request. The network and unmarshal times
+        are only available if the transport measures them (see
+        :attr:`KeepAliveTransport.measure_phases`).
+        """
+        # pylint: disable=E1101
+        phase_times = dict(getattr(self._ServerProxy__transport,
+                                   'phase_times', None) or {})
+        if not self.__marshal_time is None:
+            phase_times['marshal'] = self.__marshal_time
+        return phase_times
+
+
+class KeepAliveTransport(Transport):
+    """
+    XML-RPC transport keeping the HTTP/1.1 connection to the trac alive
+    between requests.
+
+    If the server has closed a kept-alive connection in the meantime, the
+    transport reconnects and resends the request transparently. Requests
+    sent over a freshly opened connection are never repeated.
+
+    Timeouts are raised as :class:`tractor.deadline.RequestTimeout`; the
+    connection is closed in this case.
+    """
+
+    def __init__(self, use_datetime=0, max_idle_time=None,
+                 connect_timeout=None, read_timeout=None, get_deadline=None):
+        """
+        Constructor.
+
+        :param max_idle_time: Connections that have been idle for longer than
+            this number of seconds are closed before the next request.
+        :type max_idle_time: :class:`float`
+        :default max_idle_time: *None* (no limit)
+        :param connect_timeout: The maximum number of seconds for
+            establishing a connection.
+        :type connect_timeout: :class:`float`
+        :default connect_timeout: *None* (the default socket timeout)
+        :param read_timeout: The maximum number of seconds to wait for data
+            (per socket operation).
+        :type read_timeout: :class:`float`
+        :default read_timeout: *None* (the default socket timeout)
+        :param get_deadline: Is invoked without arguments before each
+            request and returns the :class:`tractor.deadline.Deadline` of
+            the request (or *None*). The timeouts of the request are
+            reduced to the time remaining until the deadline.
+        """
+        Transport.__init__(self, use_datetime=use_datetime)
+        #: The maximum time (seconds) a connection may idle before it is
+        #: discarded (*None* for no limit).
+        self.max_idle_time = max_idle_time
+        #: The connect timeout in seconds (*None* for the default timeout).
+        self.connect_timeout = connect_timeout
+        #: The read timeout in seconds (*None* for the default timeout).
+        self.read_timeout = read_timeout
+        self.__get_deadline = get_deadline
+        self.__timeouts = (connect_timeout, read_timeout)
+        #: The size of the last request body.
+        self.request_bytes = None
+        #: The number of response body bytes received for the last request.
+        self.response_bytes = None
+        #: If *True*, the network and unmarshal times of each request are
+        #: measured (see :attr:`phase_times`).
+        self.measure_phases = False
+        #: The network and unmarshal times (seconds) of the last request.
+        self.phase_times = dict()
+        self.__started_at = None
+        self.__last_used = None
+        self.__binary_output = None
+        self.__decoder = None
+
+    def request(self, host, handler, request_body, verbose=0,
+                binary_output=None):
+        """
+        Sends the request over the kept-alive connection (if there is one)
+        and parses the response.
+
+        :param binary_output: If you pass a file object, the base64 value
+            of the response is decoded into this file while the response is
+            read and the number of bytes written is returned instead of the
+            response.
+        """
+        self.__close_idle_connection()
+        is_reused = self.__has_open_connection()
+        self.__binary_output = binary_output
+        self.__decoder = None
+        self.__timeouts = self.__get_timeouts()
+        self.request_bytes = len(request_body)
+        self.response_bytes = 0
+        if self.measure_phases:
+            self.phase_times = dict()
+            self.__started_at = time.time()
+        try:
+            try:
+                return self.single_request(host, handler, request_body,
+                                           verbose)
+            except (socket.error, httplib.HTTPException) as exc:
+                if not is_reused or not self.__is_stale_connection_error(exc) \
+                        or self.__has_written_output():
+                    raise
+                self.close()
+                return self.single_request(host, handler, request_body,
+                                           verbose)
+        except Exception as exc:
+            if not self.__is_timeout_error(exc):
+                raise
+            # The connection is in an undefined state.
+            self.close()
+            raise RequestTimeout('The request to %s timed out (%s).'
+                                 % (host.split('@')[-1], exc))
+        finally:
+            self.__last_used = time.time()
+            self.__binary_output = None
+            self.__decoder = None
+
+    def make_connection(self, host):
+        """
+        Returns the kept-alive connection or creates a new one. The
+        timeouts of the current request are applied to the connection.
+        """
+        if self._connection and host == self._connection[0]:
+            connection = self._connection[1]
+        else:
+            chost, self._extra_headers, x509 = self.get_host_info(host)
+            connection = self._create_http_connection(chost, x509)
+            self._connection = host, connection
+        # pylint: disable=W0212
+        connect_timeout, read_timeout = self.__timeouts
+        if connect_timeout is None:
+            connect_timeout = socket._GLOBAL_DEFAULT_TIMEOUT
+        if read_timeout is None:
+            read_timeout = socket.getdefaulttimeout()
+        connection.timeout = connect_timeout
+        connection.read_timeout = read_timeout
+        if not connection.sock is None:
+            connection.sock.settimeout(read_timeout)
+        return connection
+
+    def _create_http_connection(self, chost, x509): # pylint: disable=W0613
+        """
+        Creates a new connection for the given host.
+        """
+        return _HTTPConnection(chost)
+
+    def getparser(self):
+        """
+        Returns a parser and unmarshaller for the response. If a binary
+        output is set, the parser decodes base64 values into the output
+        instead of passing them on to the unmarshaller.
+        """
+        if self.__binary_output is None:
+            return Transport.getparser(self)
+        unmarshaller = Unmarshaller(use_datetime=self._use_datetime)
+        self.__decoder = _Base64DecodingTarget(unmarshaller,
+                                               self.__binary_output)
+        return ExpatParser(self.__decoder), unmarshaller
+
+    def parse_response(self, response):
+        """
+        Parses the response. Returns the number of decoded bytes instead of
+        the response if a binary output is set.
+        """
+        self.response_bytes = 0
+        counting_response = _CountingResponse(response, self,
+                                              self.measure_phases)
+        parse_started_at = time.time()
+        try:
+            result = Transport.parse_response(self, counting_response)
+        finally:
+            if self.measure_phases:
+                # Reading the response counts as network time.
+                read_time = counting_response.read_time
+                self.phase_times = dict(
+                    network=parse_started_at - self.__started_at + read_time,
+                    unmarshal=time.time() - parse_started_at - read_time)
+        if self.__decoder is None:
+            return result
+        return self.__decoder.written_bytes
+
+    def send_content(self, connection, request_body):
+        """
+        Sends the request body. :class:`StreamingRequestBody` objects are
+        sent chunk by chunk.
+        """
+        if not isinstance(request_body, StreamingRequestBody):
+            return Transport.send_content(self, connection, request_body)
+        connection.putheader('Content-Type', 'text/xml')
+        connection.putheader('Content-Length', str(len(request_body)))
+        connection.endheaders()
+        for chunk in request_body:
+            connection.send(chunk)
+
+    def __get_timeouts(self):
+        connect_timeout, read_timeout = self.connect_timeout, self.read_timeout
+        deadline = None
+        if not self.__get_deadline is None:
+            deadline = self.__get_deadline()
+        if not deadline is None:
+            connect_timeout = deadline.get_timeout(connect_timeout)
+            read_timeout = deadline.get_timeout(read_timeout)
+        return connect_timeout, read_timeout
+
+    def __is_timeout_error(self, exc):
+        if isinstance(exc, socket.timeout):
+            return True
+        # SSL sockets report timeouts as SSL errors.
+        return not ssl is None and isinstance(exc, ssl.SSLError) and \
+               'timed out' in str(exc)
+
+    def __has_written_output(self):
+        return not self.__decoder is None and self.__decoder.written_bytes > 0
+
+    def __has_open_connection(self):
+        connection = self._connection[1]
+        return not connection is None and not connection.sock is None
+
+    def __close_idle_connection(self):
+        if self.max_idle_time is None or self.__last_used is None:
+            return
+        if time.time() - self.__last_used > self.max_idle_time:
+            self.close()
+
+    def __is_stale_connection_error(self, exc):
+        if isinstance(exc, socket.error):
+            return exc.errno in STALE_CONNECTION_ERRNOS
+        return isinstance(exc, (httplib.BadStatusLine,
+                                httplib.CannotSendRequest,
+                                httplib.ResponseNotReady))
+
+
+class SafeKeepAliveTransport(KeepAliveTransport):
+    """
+    Keep-alive transport for HTTPS realms.
+
+    All connections of the transport share one SSL context, so certificates
+    are only loaded once. Since the connection is kept alive, the TLS
+    handshake is only repeated after a reconnect.
+    """
+
+    def __init__(self, use_datetime=0, max_idle_time=None,
+                 connect_timeout=None, read_timeout=None, get_deadline=None,
+                 context=None):
+        """
+        Constructor.
+
+        :param context: The SSL context for the connections. If you do not
+            pass a context, the default HTTPS context is used.
+        """
+        KeepAliveTransport.__init__(self, use_datetime=use_datetime,
+                                    max_idle_time=max_idle_time,
+                                    connect_timeout=connect_timeout,
+                                    read_timeout=read_timeout,
+                                    get_deadline=get_deadline)
+        if context is None:
+            context = create_default_ssl_context()
+        #: The SSL context shared by all connections of this transport.
+        self.context = context
+
+    def _create_http_connection(self, chost, x509):
+        """
+        Creates a new HTTPS connection for the given host.
+        """
+        if self.context is None:
+            return _HTTPSConnection(chost, None, **(x509 or {}))
+        return _HTTPSConnection(chost, None, context=self.context,
+                                **(x509 or {}))
+
+
+class _HTTPConnection(httplib.HTTPConnection):
+    """
+    HTTP connection with separate connect and read timeouts (the connect
+    timeout is the *timeout* attribute).
+    """
+
+    #: The socket timeout after the connection has been established.
+    read_timeout = None
+
+    def connect(self):
+        httplib.HTTPConnection.connect(self)
+        self.sock.settimeout(self.read_timeout)
+
+
+class _HTTPSConnection(httplib.HTTPSConnection):
+    """
+    HTTPS connection with separate connect (including the TLS handshake)
+    and read timeouts.
+    """
+
+    #: The socket timeout after the connection has been established.
+    read_timeout = None
+
+    def connect(self):
+        httplib.HTTPSConnection.connect(self)
+        self.sock.settimeout(self.read_timeout)
+
+
+class _CountingResponse(object):
+    """
+    Wraps an HTTP response and adds the number of body bytes read to the
+    *response_bytes* of the transport (and optionally measures the time
+    spent reading).
+    """
+
+    def __init__(self, response, transport, measure_time=False):
+        self.__response = response
+        self.__transport = transport
+        self.__measure_time = measure_time
+        #: The time (seconds) spent reading (if measured).
+        self.read_time = 0.0
+
+    def read(self, amt=None):
+        if self.__measure_time:
+            start_time = time.time()
+            data = self.__response.read(amt)
+            self.read_time += time.time() - start_time
+        else:
+            data = self.__response.read(amt)
+        self.__transport.response_bytes += len(data)
+        return data
+
+    def getheader(self, name, default=None):
+        return self.__response.getheader(name, default)
+
+    def close(self):
+        self.__response.close()
+
+
+class _Base64DecodingTarget(object):
+    """
+    Parser target decoding base64 values into a file object on the fly.
+    All other parse events are passed on to the unmarshaller (which only
+    receives empty base64 values).
+    """
+
+    def __init__(self, unmarshaller, output):
+        self.__unmarshaller = unmarshaller
+        self.__output = output
+        self.__is_base64 = False
+        self.__pending = ''
+        #: The number of decoded bytes written to the output.
+        self.written_bytes = 0
+
+    def xml(self, encoding, standalone):
+        self.__unmarshaller.xml(encoding, standalone)
+
+    def start(self, tag, attrs):
+        if tag == 'base64':
+            self.__is_base64 = True
+        self.__unmarshaller.start(tag, attrs)
+
+    def data(self, text):
+        if not self.__is_base64:
+            self.__unmarshaller.data(text)
+            return
+        # Decode complete 4-character groups only.
+        text = self.__pending + ''.join(text.split())
+        cut = len(text) - len(text) % 4
+        self.__pending = text[cut:]
+        self.__write(text[:cut])
+
+    def end(self, tag):
+        if tag == 'base64':
+            self.__write(self.__pending)
+            self.__pending = ''
+            self.__is_base64 = False
+        self.__unmarshaller.end(tag)
+
+    def __write(self, encoded):
+        if encoded:
+            decoded = base64.b64decode(encoded)
+            self.__output.write(decoded)
+            self.written_bytes += len(decoded)